@@ -1,9 +1,38 @@
+import os
 from flask import Flask
 from flask_cors import CORS
 
 def create_app():
     app = Flask(__name__)
-    CORS(app)
+    CORS(app, expose_headers=["X-Next-Cursor", "X-Report-As-Of", "X-Cache", "Server-Timing"])
+
+    # Aplicar migraciones de esquema pendientes
+    from app.database.database import get_connection
+    from app.database.migrations import aplicar_migraciones
+    with get_connection() as conn:
+        aplicar_migraciones(conn)
+
+    # Reconstruir el índice de disponibilidad (desactivar con INDICE_DISPONIBILIDAD=0)
+    if os.environ.get("INDICE_DISPONIBILIDAD", "1") == "1":
+        from app.repository.IndiceDisponibilidad import indice_disponibilidad
+        indice_disponibilidad.cargar()
+
+    # Barrido periódico del estado materializado de los vehículos (0 lo desactiva)
+    intervalo_barrido = float(os.environ.get("ESTADO_VEHICULOS_BARRIDO", "600"))
+    if intervalo_barrido > 0:
+        from app.repository.EstadoVehiculos import iniciar_barrido
+        iniciar_barrido(intervalo_barrido)
+
+    # Server-Timing y log de consultas lentas por pedido (desactivar con SQL_INSTRUMENTACION=0)
+    from app.database.database import SQL_INSTRUMENTACION
+    if SQL_INSTRUMENTACION:
+        from app.routes.Instrumentacion import registrar_instrumentacion
+        registrar_instrumentacion(app)
+
+    # Métricas en formato Prometheus en GET /metrics (desactivar con METRICAS=0)
+    if os.environ.get("METRICAS", "1") == "1":
+        from app.routes.Metricas import registrar_metricas
+        registrar_metricas(app)
 
     # Importar y registrar los blueprints
     from app.routes.Vehiculo import vehiculos_bp
@@ -12,6 +41,8 @@ def create_app():
     from app.routes.Reserva import reservas_bp
     from app.routes.Mantenimiento import mantenimientos_bp
     from app.routes.Reporte import reportes_bp
+    from app.routes.Tarifa import tarifas_bp
+    from app.routes.Importacion import importacion_bp
 
     app.register_blueprint(vehiculos_bp)
     app.register_blueprint(clientes_bp)
@@ -19,5 +50,7 @@ def create_app():
     app.register_blueprint(reservas_bp)
     app.register_blueprint(mantenimientos_bp)
     app.register_blueprint(reportes_bp)
+    app.register_blueprint(tarifas_bp)
+    app.register_blueprint(importacion_bp)
 
     return app
@@ -0,0 +1,53 @@
+"""
+Recarga de ingresos_mensuales_rollup desde la historia de alquileres.
+
+Los triggers de la migración 3 mantienen la tabla al día; este comando la
+reconstruye completa (o un año) por si se cargaron datos con los triggers
+desactivados o se restauró una copia:
+
+    python3 -m app.database.backfill_ingresos [--anio 2025] [--base ruta/a/database.db]
+"""
+import argparse
+import sqlite3
+
+from app.database.database import DB_PATH
+from app.database.migrations import aplicar_migraciones, recalcular_ingresos_sql
+
+
+def recalcular_ingresos(conn: sqlite3.Connection, anio: str = None) -> int:
+    """
+    Reconstruye las filas del rollup (todas o las de un año).
+
+    Returns:
+        Cantidad de filas (año, mes, vehículo) cargadas
+    """
+    try:
+        conn.execute("BEGIN")
+        if anio is None:
+            conn.execute("DELETE FROM ingresos_mensuales_rollup")
+            cursor = conn.execute(recalcular_ingresos_sql())
+        else:
+            conn.execute("DELETE FROM ingresos_mensuales_rollup WHERE anio = ?", (anio,))
+            cursor = conn.execute(recalcular_ingresos_sql("AND strftime('%Y', a.fecha_entrega) = ?"), (anio,))
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return cursor.rowcount
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default=DB_PATH)
+    parser.add_argument("--anio", help="Año a recalcular (YYYY); todos si no se indica")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.base)
+    try:
+        aplicar_migraciones(conn)
+        filas = recalcular_ingresos(conn, args.anio)
+        print(f"✓ ingresos_mensuales_rollup recalculada ({filas} filas)")
+    except sqlite3.Error as e:
+        print(f"Error al recalcular ingresos: {e}")
+    finally:
+        conn.close()
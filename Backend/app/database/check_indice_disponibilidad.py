@@ -0,0 +1,140 @@
+"""
+Verificación de consistencia del índice de disponibilidad en memoria.
+
+Sobre una copia temporal de la base carga el índice, ejecuta una secuencia
+aleatoria de altas, modificaciones y bajas de alquileres y reservas a través de
+los repositorios y, después de cada operación, compara las respuestas del índice
+con las consultas SQL equivalentes. Al final compara el índice completo con uno
+reconstruido desde la base. Sale con código 1 ante cualquier diferencia:
+
+    python3 -m app.database.check_indice_disponibilidad [--operaciones 500] [--semilla 7]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import date, timedelta
+
+from app.database.database import DB_PATH, configurar_pool
+from app.database.migrations import aplicar_migraciones
+from app.models.Alquiler import Alquiler
+from app.models.Reserva import Reserva
+from app.repository.Alquiler import AlquilerRepository
+from app.repository.ReservaRepository import ReservaRepository
+from app.repository.IndiceDisponibilidad import IndiceDisponibilidad
+
+
+def _fecha_aleatoria(rnd: random.Random) -> date:
+    return date(2025, 1, 1) + timedelta(days=rnd.randint(0, 120))
+
+
+def _comparar_respuestas(rnd, vehiculos, alquiler_idx, alquiler_sql, reserva_idx, reserva_sql) -> list[str]:
+    errores = []
+    for _ in range(10):
+        vehiculo_id = rnd.choice(vehiculos)
+        inicio = _fecha_aleatoria(rnd)
+        fin = inicio + timedelta(days=rnd.randint(0, 10))
+        args = (vehiculo_id, inicio.isoformat(), fin.isoformat())
+        if alquiler_idx.verificar_disponibilidad(*args) != alquiler_sql.verificar_disponibilidad(*args):
+            errores.append(f"verificar_disponibilidad de alquiler difiere para {args}")
+        args = (vehiculo_id, inicio.isoformat())
+        if reserva_idx.verificar_disponibilidad(*args) != reserva_sql.verificar_disponibilidad(*args):
+            errores.append(f"verificar_disponibilidad de reserva difiere para {args}")
+    return errores
+
+
+def verificar_indice(db_path: str = DB_PATH, operaciones: int = 500, semilla: int = 7) -> list[str]:
+    """
+    Ejecuta la carga de trabajo aleatoria sobre una copia de la base.
+
+    Returns:
+        Lista de diferencias encontradas entre el índice y la base
+    """
+    rnd = random.Random(semilla)
+    carpeta = tempfile.mkdtemp()
+    copia = os.path.join(carpeta, "indice.db")
+    shutil.copyfile(db_path, copia)
+
+    conn = sqlite3.connect(copia)
+    aplicar_migraciones(conn)
+    vehiculos = [fila[0] for fila in conn.execute("SELECT id_vehiculo FROM vehiculos")] or [1]
+    conn.close()
+
+    pool = configurar_pool(db_path=copia)
+    indice = IndiceDisponibilidad()
+    indice.cargar()
+
+    alquiler_idx, alquiler_sql = AlquilerRepository(indice=indice), AlquilerRepository(indice=None)
+    reserva_idx, reserva_sql = ReservaRepository(indice=indice), ReservaRepository(indice=None)
+
+    errores = []
+    alquileres, reservas = [], []
+    try:
+        for _ in range(operaciones):
+            operacion = rnd.random()
+            inicio = _fecha_aleatoria(rnd)
+            prevista = inicio + timedelta(days=rnd.randint(0, 10))
+            entrega = rnd.choice([None, None, prevista.isoformat(), ""])
+
+            if operacion < 0.35 or not alquileres:
+                alquiler = Alquiler(
+                    cliente=1, vehiculo=rnd.choice(vehiculos), empleado=1,
+                    estado_alquiler=rnd.choice([1, 2, 3, 4]), creado_en=None,
+                    fecha_inicio=inicio.isoformat(), fecha_prevista=prevista.isoformat(),
+                    fecha_entrega=entrega, km_salida=0
+                )
+                alquileres.append(alquiler_idx.crear(alquiler).id_alquiler)
+            elif operacion < 0.55:
+                id_alquiler = rnd.choice(alquileres)
+                alquiler = Alquiler(
+                    cliente=1, vehiculo=rnd.choice(vehiculos), empleado=1,
+                    estado_alquiler=rnd.choice([1, 2, 3, 4]), creado_en=None,
+                    fecha_inicio=inicio.isoformat(), fecha_prevista=prevista.isoformat(),
+                    fecha_entrega=entrega, km_salida=0
+                )
+                alquiler_idx.actualizar(id_alquiler, alquiler)
+            elif operacion < 0.65:
+                id_alquiler = alquileres.pop(rnd.randrange(len(alquileres)))
+                alquiler_idx.eliminar(id_alquiler)
+            elif operacion < 0.9 or not reservas:
+                reserva = Reserva(
+                    cliente=1, vehiculo=rnd.choice(vehiculos), empleado=1,
+                    estado_reserva=rnd.choice([1, 2, 3, 4]),
+                    fecha_reserva=inicio.isoformat(), fecha_alquiler=prevista.isoformat()
+                )
+                reservas.append(reserva_idx.crear(reserva).id_reserva)
+            else:
+                id_reserva = reservas.pop(rnd.randrange(len(reservas)))
+                with pool.conexion() as c:
+                    c.execute("DELETE FROM reservas WHERE id_reserva = ?", (id_reserva,))
+                    c.commit()
+                reserva_idx.quitar_del_indice(id_reserva)
+
+            errores.extend(_comparar_respuestas(rnd, vehiculos, alquiler_idx, alquiler_sql, reserva_idx, reserva_sql))
+
+        errores.extend(indice.verificar_consistencia())
+    finally:
+        pool.cerrar()
+        configurar_pool()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    return errores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default=DB_PATH)
+    parser.add_argument("--operaciones", type=int, default=500)
+    parser.add_argument("--semilla", type=int, default=7)
+    args = parser.parse_args()
+
+    errores = verificar_indice(args.base, args.operaciones, args.semilla)
+    if errores:
+        print(f"✗ El índice de disponibilidad no coincide con la base ({len(errores)} diferencias):")
+        for error in errores[:20]:
+            print(f"  - {error}")
+        sys.exit(1)
+    print("✓ El índice de disponibilidad coincide con la base")
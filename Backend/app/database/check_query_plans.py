@@ -0,0 +1,219 @@
+"""
+Verificación de planes de consulta (EXPLAIN QUERY PLAN) para las consultas frecuentes.
+
+Trabaja sobre una copia en memoria de la base con las migraciones aplicadas y
+falla (código de salida 1) si alguna consulta frecuente recorre una tabla
+completa (SCAN sin índice) o necesita ordenar en una tabla temporal, o si un
+filtro por rango de fechas no se resuelve con una búsqueda por rango en un
+índice (por ejemplo, porque la columna quedó envuelta en date()).
+Pensado para correr en CI:
+
+    python3 -m app.database.check_query_plans [ruta/a/database.db]
+"""
+import sqlite3
+import sys
+from contextlib import contextmanager
+
+from app.database.database import DB_PATH
+from app.database.migrations import aplicar_migraciones
+from app.repository.Alquiler import AlquilerRepository
+from app.repository.ReservaRepository import ReservaRepository
+from app.repository.MantenimientoRepository import MantenimientoRepository
+from app.repository.VehiculoRepository import VehiculoRepository
+from app.repository.Paginacion import codificar_cursor
+
+# En cada consulta se indican las tablas/alias que pueden recorrerse completos
+# (tablas que agrupan o subconsultas ya filtradas). "ORDER BY" permite ordenar en memoria.
+
+# Consultas de repositorios: (nombre, llamada, permitidos)
+CONSULTAS_REPOSITORIO = [
+    ("AlquilerRepository.verificar_disponibilidad",
+     lambda f: AlquilerRepository(f).verificar_disponibilidad(1, "2025-01-01", "2025-01-05"), set()),
+    ("AlquilerRepository.obtener_todos",
+     lambda f: AlquilerRepository(f).obtener_todos(), set()),
+    ("AlquilerRepository.obtener_con_filtros(estado)",
+     lambda f: AlquilerRepository(f).obtener_con_filtros(estado_id=2), set()),
+    ("AlquilerRepository.obtener_pagina(cursor)",
+     lambda f: AlquilerRepository(f).obtener_pagina(50, codificar_cursor("2025-06-01", 10)), set()),
+    ("AlquilerRepository.obtener_pagina(estado, cursor)",
+     lambda f: AlquilerRepository(f).obtener_pagina(50, codificar_cursor("2025-06-01", 10), estado_id=2), set()),
+    ("ReservaRepository.verificar_disponibilidad",
+     lambda f: ReservaRepository(f).verificar_disponibilidad(1, "2025-01-01"), {"conflictos"}),
+    ("ReservaRepository.obtener_todos",
+     lambda f: ReservaRepository(f).obtener_todos(), set()),
+    ("ReservaRepository.obtener_con_filtros(estado)",
+     lambda f: ReservaRepository(f).obtener_con_filtros(estado_id=1), set()),
+    ("ReservaRepository.obtener_pagina(cursor)",
+     lambda f: ReservaRepository(f).obtener_pagina(50, codificar_cursor("2025-06-01", 10)), set()),
+    ("ReservaRepository.obtener_pagina(estado, cursor)",
+     lambda f: ReservaRepository(f).obtener_pagina(50, codificar_cursor("2025-06-01", 10), estado_id=1), set()),
+    ("ReservaRepository.obtener_por_id",
+     lambda f: ReservaRepository(f).obtener_por_id(1), set()),
+    ("ReservaRepository.existe",
+     lambda f: ReservaRepository(f).existe(1), set()),
+    ("MantenimientoRepository.obtener_por_id",
+     lambda f: MantenimientoRepository(f).obtener_por_id(1), set()),
+    ("MantenimientoRepository.existe",
+     lambda f: MantenimientoRepository(f).existe(1), set()),
+    ("MantenimientoRepository.vehiculo_en_mantenimiento",
+     lambda f: MantenimientoRepository(f).vehiculo_en_mantenimiento(1), set()),
+    ("VehiculoRepository.obtener_disponibles",
+     lambda f: VehiculoRepository(f).obtener_disponibles("2025-01-01", "2025-01-05"), {"v"}),
+    # Devuelve toda la flota: el recorrido de vehiculos es esperado, el estado se busca por clave
+    ("VehiculoRepository.obtener_todos_con_estado",
+     lambda f: VehiculoRepository(f).obtener_todos_con_estado(), {"v"}),
+]
+
+# Filtros por fecha que deben resolverse como rango sobre un índice:
+# (nombre, llamada, permitidos, columna del rango)
+CONSULTAS_RANGO_FECHAS = [
+    ("AlquilerRepository.obtener_con_filtros(fechas)",
+     lambda f: AlquilerRepository(f).obtener_con_filtros(fecha_desde="2025-01-01", fecha_hasta="2025-06-30"),
+     set(), "fecha_inicio"),
+    ("AlquilerRepository.obtener_con_filtros(estado, fechas)",
+     lambda f: AlquilerRepository(f).obtener_con_filtros(estado_id=1, fecha_desde="2025-01-01",
+                                                         fecha_hasta="2025-06-30"),
+     set(), "fecha_inicio"),
+    # Se ordena por fecha_reserva solo lo que quedó dentro del rango
+    ("ReservaRepository.obtener_con_filtros(fechas)",
+     lambda f: ReservaRepository(f).obtener_con_filtros(fecha_desde="2025-01-01", fecha_hasta="2025-06-30"),
+     {"ORDER BY"}, "fecha_alquiler"),
+    ("ReservaRepository.obtener_con_filtros(estado, fechas)",
+     lambda f: ReservaRepository(f).obtener_con_filtros(estado_id=1, fecha_desde="2025-01-01",
+                                                        fecha_hasta="2025-06-30"),
+     {"ORDER BY"}, "fecha_alquiler"),
+    ("ReservaRepository.verificar_disponibilidad",
+     lambda f: ReservaRepository(f).verificar_disponibilidad(1, "2025-01-01"), {"conflictos"}, "fecha_inicio"),
+]
+
+# Consultas de reportes (routes/Reporte.py): (nombre, sql, permitidos)
+CONSULTAS_REPORTES = [
+    ("reporte vehiculos-mas-alquilados", """
+        SELECT v.id_vehiculo, COUNT(a.id_alquiler)
+        FROM vehiculos v
+        LEFT JOIN alquileres a ON v.id_vehiculo = a.vehiculo_id
+        GROUP BY v.id_vehiculo
+    """, {"v"}),
+    ("reporte clientes-top", """
+        SELECT c.id_cliente, COUNT(a.id_alquiler)
+        FROM clientes c
+        LEFT JOIN alquileres a ON c.id_cliente = a.cliente_id
+        GROUP BY c.id_cliente
+    """, {"c"}),
+    ("reporte mantenimientos-proximos", """
+        SELECT m.id_mantenimiento, v.patente
+        FROM mantenimientos m
+        JOIN vehiculos v ON m.vehiculo_id = v.id_vehiculo
+        WHERE m.estado_mantenimiento IN ('PROGRAMADO', 'EN_CURSO')
+        ORDER BY m.fecha_programada ASC
+    """, {"ORDER BY"}),  # IN con dos estados: se ordenan solo los mantenimientos abiertos
+    ("reporte ingresos-mensuales", """
+        SELECT mes, anio, SUM(total_ingresos), SUM(cantidad_alquileres)
+        FROM ingresos_mensuales_rollup
+        WHERE anio = '2025'
+        GROUP BY anio, mes
+        ORDER BY anio, mes
+    """, set()),
+    ("estadisticas ingresos del mes", """
+        SELECT COALESCE(SUM(total_ingresos), 0)
+        FROM ingresos_mensuales_rollup
+        WHERE anio = strftime('%Y', 'now') AND mes = strftime('%m', 'now')
+    """, set()),
+    ("estadisticas alquileres activos", """
+        SELECT COUNT(*) FROM alquileres
+        WHERE estado_alquiler_id IN (
+            SELECT id_estado_alquiler FROM estados_alquiler WHERE codigo IN ('ACTIVO', 'PENDIENTE')
+        )
+    """, {"estados_alquiler"}),
+    ("estadisticas reservas pendientes", """
+        SELECT COUNT(*) FROM reservas
+        WHERE estado_reserva_id IN (
+            SELECT id_estado_reserva FROM estados_reserva WHERE codigo = 'PENDIENTE'
+        )
+    """, {"estados_reserva"}),
+]
+
+
+def _problemas_del_plan(conn: sqlite3.Connection, sql: str, permitidos: set) -> list[str]:
+    problemas = []
+    for fila in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall():
+        detalle = fila[3]
+        if detalle.startswith("SCAN ") and "USING" not in detalle:
+            objetivo = detalle.split()[1]
+            if objetivo not in permitidos:
+                problemas.append(detalle)
+        elif detalle.startswith("USE TEMP B-TREE FOR ORDER BY") and "ORDER BY" not in permitidos:
+            problemas.append(detalle)
+    return problemas
+
+
+def _usa_rango(conn: sqlite3.Connection, sql: str, columna: str) -> bool:
+    for fila in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall():
+        detalle = fila[3]
+        if detalle.startswith("SEARCH ") and (f"{columna}>" in detalle or f"{columna}<" in detalle):
+            return True
+    return False
+
+
+def _selects(sentencias: list[str]) -> list[str]:
+    return [s for s in sentencias if s.lstrip().upper().startswith(("SELECT", "WITH"))]
+
+
+def verificar_planes(db_path: str = DB_PATH) -> list[str]:
+    """
+    Revisa los planes de las consultas frecuentes.
+
+    Returns:
+        Lista de errores encontrados (vacía si todos los planes usan índices)
+    """
+    origen = sqlite3.connect(db_path)
+    conn = sqlite3.connect(":memory:")
+    origen.backup(conn)
+    origen.close()
+    conn.row_factory = sqlite3.Row
+    aplicar_migraciones(conn)
+
+    sentencias = []
+    conn.set_trace_callback(sentencias.append)
+
+    @contextmanager
+    def factory():
+        yield conn
+
+    errores = []
+    for nombre, llamada, permitidos in CONSULTAS_REPOSITORIO:
+        sentencias.clear()
+        llamada(factory)
+        for sql in _selects(sentencias):
+            for problema in _problemas_del_plan(conn, sql, permitidos):
+                errores.append(f"{nombre}: {problema}")
+
+    for nombre, llamada, permitidos, columna in CONSULTAS_RANGO_FECHAS:
+        sentencias.clear()
+        llamada(factory)
+        selects = _selects(sentencias)
+        for sql in selects:
+            for problema in _problemas_del_plan(conn, sql, permitidos):
+                errores.append(f"{nombre}: {problema}")
+        if not any(_usa_rango(conn, sql, columna) for sql in selects):
+            errores.append(f"{nombre}: el filtro por {columna} no usa un rango sobre un índice")
+
+    conn.set_trace_callback(None)
+
+    for nombre, sql, permitidos in CONSULTAS_REPORTES:
+        for problema in _problemas_del_plan(conn, sql, permitidos):
+            errores.append(f"{nombre}: {problema}")
+
+    conn.close()
+    return errores
+
+
+if __name__ == "__main__":
+    ruta = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    errores = verificar_planes(ruta)
+    if errores:
+        print("✗ Consultas frecuentes sin índice:")
+        for error in errores:
+            print(f"  - {error}")
+        sys.exit(1)
+    print("✓ Todas las consultas frecuentes usan índices")
@@ -0,0 +1,243 @@
+"""
+Prueba de estrés de las altas concurrentes de alquileres y reservas.
+
+Sobre una copia temporal de la base agrega unos pocos vehículos por ronda y
+dispara miles de intentos de alquiler y de reserva superpuestos (mismos autos, fechas en una
+ventana corta) a través de crear_alquiler_service y crear_reserva_service, mezclados con
+modificaciones (actualizar_alquiler_service) que mueven alquileres existentes a otro auto
+y otras fechas dentro de la misma ventana:
+
+1. desde varios threads de este proceso, con el índice de disponibilidad cargado;
+2. desde varios procesos a la vez, cada uno con sus threads y su propio índice
+   cargado (como varios workers): cada índice se atrasa respecto de las altas de
+   los otros procesos y la verificación dentro de la transacción tiene que ir a la base.
+
+Al final busca en la base alquileres activos o pendientes del mismo vehículo con
+períodos superpuestos y reservas vigentes del mismo vehículo para el mismo día.
+Sale con código 1 si encuentra alguno o si algún intento falló con un error
+distinto de "no disponible":
+
+    python3 -m app.database.check_reservas_concurrentes [--intentos 2000] [--procesos 4] [--hilos 8]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from app.database.database import DB_PATH, configurar_pool
+from app.database.migrations import aplicar_migraciones
+from app.repository.IndiceDisponibilidad import indice_disponibilidad
+from app.services.AlquilerService import actualizar_alquiler_service, crear_alquiler_service
+from app.services.ReservaService import crear_reserva_service
+
+VEHICULOS = 6
+MOVIBLES = 12
+DIA_CERO = date(2030, 1, 1)
+
+
+def preparar_base(db_path: str, carpeta: str, rondas: int = 2) -> tuple[str, list[list[int]], int, list[list[int]]]:
+    """
+    Copia la base y agrega un cliente y, para cada ronda, los vehículos sobre los que se
+    compite y unos alquileres "movibles" que los intentos de modificación llevan a la
+    ventana en disputa. Arrancan un año después de esa ventana, así no la ocupan.
+    """
+    copia = os.path.join(carpeta, "concurrencia.db")
+    shutil.copyfile(db_path, copia)
+
+    conn = sqlite3.connect(copia)
+    aplicar_migraciones(conn)
+    cursor = conn.execute(
+        "INSERT INTO clientes (nombre, apellido, email, telefono, licencia_num, licencia_venc, habilitado) "
+        "VALUES ('Prueba', 'Concurrencia', 'concurrencia@prueba.local', '0', 'CONC-0001', '2099-12-31', 1)"
+    )
+    cliente_id = cursor.lastrowid
+    vehiculos = [[] for _ in range(rondas)]
+    movibles = [[] for _ in range(rondas)]
+    lejos = DIA_CERO + timedelta(days=365)
+    for ronda in range(rondas):
+        for i in range(VEHICULOS):
+            cursor = conn.execute(
+                "INSERT INTO vehiculos (patente, marca, modelo, anio, tarifa_base_dia, km_actual, habilitado) "
+                "VALUES (?, 'Marca', 'Modelo', 2024, 10000, 0, 1)",
+                (f"CONC{ronda}{i:03d}",)
+            )
+            vehiculos[ronda].append(cursor.lastrowid)
+        for i in range(MOVIBLES):
+            inicio = lejos + timedelta(days=10 * i)
+            cursor = conn.execute(
+                "INSERT INTO alquileres (cliente_id, vehiculo_id, empleado_id, estado_alquiler_id, fecha_inicio, "
+                "fecha_prevista, fecha_entrega, km_salida, creado_en) VALUES (?, ?, 1, 1, ?, ?, ?, 0, ?)",
+                (cliente_id, vehiculos[ronda][i % VEHICULOS], inicio.isoformat(),
+                 (inicio + timedelta(days=2)).isoformat(), (inicio + timedelta(days=2)).isoformat(),
+                 DIA_CERO.isoformat())
+            )
+            movibles[ronda].append(cursor.lastrowid)
+    conn.commit()
+    conn.close()
+    return copia, vehiculos, cliente_id, movibles
+
+
+def _intento(rnd: random.Random, vehiculos: list[int], cliente_id: int, movibles: list[int]) -> str:
+    vehiculo_id = rnd.choice(vehiculos)
+    inicio = DIA_CERO + timedelta(days=rnd.randint(0, 60))
+    tipo = rnd.random()
+    try:
+        if tipo < 0.2:
+            # Mover un alquiler existente (quizás a otro auto) a un período de la ventana en disputa
+            actualizar_alquiler_service(rnd.choice(movibles), {
+                "cliente_id": cliente_id,
+                "vehiculo_id": vehiculo_id,
+                "fecha_inicio": inicio.isoformat(),
+                "fecha_prevista": (inicio + timedelta(days=rnd.randint(0, 4))).isoformat(),
+                "km_salida": 0,
+            })
+            return "modificados"
+        if tipo < 0.6:
+            crear_alquiler_service({
+                "cliente_id": cliente_id,
+                "vehiculo_id": vehiculo_id,
+                "fecha_inicio": inicio.isoformat(),
+                "fecha_prevista": (inicio + timedelta(days=rnd.randint(0, 4))).isoformat(),
+                "km_salida": 0,
+            })
+        else:
+            crear_reserva_service({
+                "cliente_id": cliente_id,
+                "vehiculo_id": vehiculo_id,
+                "fecha_reserva": DIA_CERO.isoformat(),
+                "fecha_alquiler": inicio.isoformat(),
+            })
+        return "creados"
+    except ValueError:
+        return "rechazados"
+    except Exception as e:
+        return f"error: {type(e).__name__}: {e}"
+
+
+def disparar(intentos: int, hilos: int, vehiculos: list[int], cliente_id: int, movibles: list[int],
+             semilla: int) -> dict:
+    """Reparte los intentos entre `hilos` threads y cuenta los resultados."""
+    def trabajar(numero: int) -> dict:
+        rnd = random.Random(semilla * 1000 + numero)
+        resultados = {}
+        for _ in range(intentos // hilos):
+            resultado = _intento(rnd, vehiculos, cliente_id, movibles)
+            resultados[resultado] = resultados.get(resultado, 0) + 1
+        return resultados
+
+    totales = {}
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        for resultados in ejecutor.map(trabajar, range(hilos)):
+            for resultado, cantidad in resultados.items():
+                totales[resultado] = totales.get(resultado, 0) + cantidad
+    return totales
+
+
+def _proceso(copia: str, intentos: int, hilos: int, vehiculos: list[int], cliente_id: int, movibles: list[int],
+             semilla: int) -> dict:
+    configurar_pool(db_path=copia, tamanio=hilos)
+    indice_disponibilidad.cargar()
+    return disparar(intentos, hilos, vehiculos, cliente_id, movibles, semilla)
+
+
+def buscar_superposiciones(copia: str, vehiculos: list[int]) -> list[str]:
+    """Devuelve los alquileres y reservas vigentes del mismo vehículo que se pisan."""
+    marcas = ",".join("?" * len(vehiculos))
+    conn = sqlite3.connect(copia)
+    errores = [
+        f"vehículo {v}: alquileres {a} y {b} se superponen"
+        for v, a, b in conn.execute(f"""
+            SELECT a.vehiculo_id, a.id_alquiler, b.id_alquiler
+            FROM alquileres a
+            JOIN alquileres b ON b.vehiculo_id = a.vehiculo_id AND b.id_alquiler > a.id_alquiler
+            WHERE a.vehiculo_id IN ({marcas})
+              AND a.estado_alquiler_id IN (1, 2) AND b.estado_alquiler_id IN (1, 2)
+              AND a.fecha_inicio <= b.fecha_prevista AND b.fecha_inicio <= a.fecha_prevista
+        """, vehiculos)
+    ]
+    errores += [
+        f"vehículo {v}: {cantidad} reservas para el {dia}"
+        for v, dia, cantidad in conn.execute(f"""
+            SELECT vehiculo_id, fecha_alquiler, COUNT(*)
+            FROM reservas
+            WHERE vehiculo_id IN ({marcas}) AND estado_reserva_id IN (1, 2)
+            GROUP BY vehiculo_id, fecha_alquiler
+            HAVING COUNT(*) > 1
+        """, vehiculos)
+    ]
+    conn.close()
+    return errores
+
+
+def verificar_concurrencia(db_path: str = DB_PATH, intentos: int = 2000, procesos: int = 4,
+                           hilos: int = 8, semilla: int = 11) -> tuple[list[str], dict]:
+    """
+    Ejecuta las dos rondas de intentos sobre una copia de la base.
+
+    Returns:
+        Tupla (errores encontrados, resultados por ronda)
+    """
+    carpeta = tempfile.mkdtemp()
+    copia, (vehiculos_threads, vehiculos_procesos), cliente_id, (movibles_threads, movibles_procesos) = \
+        preparar_base(db_path, carpeta)
+    resultados = {}
+    try:
+        pool = configurar_pool(db_path=copia, tamanio=hilos)
+        indice_disponibilidad.cargar()
+        inicio = time.perf_counter()
+        resultados["threads"] = disparar(intentos, hilos, vehiculos_threads, cliente_id, movibles_threads, semilla)
+        resultados["threads"]["segundos"] = round(time.perf_counter() - inicio, 2)
+        indice_disponibilidad.descargar()
+        pool.cerrar()
+
+        # spawn: cada proceso arranca sin las conexiones de este y carga su propio índice
+        contexto = multiprocessing.get_context("spawn")
+        inicio = time.perf_counter()
+        with contexto.Pool(procesos) as procesos_pool:
+            parciales = procesos_pool.starmap(_proceso, [
+                (copia, intentos // procesos, hilos, vehiculos_procesos, cliente_id, movibles_procesos,
+                 semilla + 1 + i)
+                for i in range(procesos)
+            ])
+        resultados["procesos"] = {}
+        for parcial in parciales:
+            for resultado, cantidad in parcial.items():
+                resultados["procesos"][resultado] = resultados["procesos"].get(resultado, 0) + cantidad
+        resultados["procesos"]["segundos"] = round(time.perf_counter() - inicio, 2)
+
+        errores = buscar_superposiciones(copia, vehiculos_threads + vehiculos_procesos)
+        for ronda in resultados.values():
+            errores += [f"{cantidad} intentos con {resultado}" for resultado, cantidad in ronda.items()
+                        if resultado.startswith("error")]
+    finally:
+        configurar_pool()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    return errores, resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default=DB_PATH)
+    parser.add_argument("--intentos", type=int, default=2000, help="Intentos por ronda")
+    parser.add_argument("--procesos", type=int, default=4)
+    parser.add_argument("--hilos", type=int, default=8, help="Threads por proceso")
+    parser.add_argument("--semilla", type=int, default=11)
+    args = parser.parse_args()
+
+    errores, resultados = verificar_concurrencia(args.base, args.intentos, args.procesos, args.hilos, args.semilla)
+    for ronda, conteo in resultados.items():
+        print(f"{ronda:9} " + "  ".join(f"{clave}={valor}" for clave, valor in sorted(conteo.items())))
+    if errores:
+        print(f"✗ Hay alquileres o reservas superpuestos ({len(errores)}):")
+        for error in errores[:20]:
+            print(f"  - {error}")
+        sys.exit(1)
+    print("✓ Ningún vehículo quedó reservado dos veces")
@@ -1,16 +1,268 @@
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
 import os
 
+from app.database.instrumentacion import ConexionInstrumentada
+
 # Ruta de la base de datos (dentro de la carpeta database)
 DB_PATH = os.path.join(os.path.dirname(__file__), "database.db")
 
+# Configuración por defecto del pool (se puede sobreescribir con variables de entorno)
+POOL_TAMANIO = int(os.environ.get("DB_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+POOL_MAX_USOS = int(os.environ.get("DB_POOL_MAX_USOS", "1000"))
+POOL_MAX_EDAD = float(os.environ.get("DB_POOL_MAX_EDAD", "3600"))
+
+# Perfiles de PRAGMA que se aplican una vez a cada conexión nueva del pool.
+# WAL permite que los reportes lean mientras se registran alquileres.
+PERFILES_PRAGMA = {
+    # Máxima seguridad ante cortes de energía: fsync en cada commit
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "cache_size": -16000,      # ~16 MB
+        "temp_store": "MEMORY",
+        "mmap_size": 0,
+    },
+    # Perfil de producción: en WAL, NORMAL solo arriesga el último commit ante un corte de energía
+    "rapido": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -64000,      # ~64 MB
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,    # 256 MB
+    },
+}
+PRAGMA_PERFIL = os.environ.get("DB_PRAGMA_PERFIL", "rapido")
+
+# Medición de consultas por pedido (ver instrumentacion.py)
+SQL_INSTRUMENTACION = os.environ.get("SQL_INSTRUMENTACION", "1") == "1"
+
+
+def aplicar_pragmas(conn: sqlite3.Connection, perfil: str = PRAGMA_PERFIL):
+    """Aplica a la conexión los PRAGMA del perfil indicado."""
+    for nombre, valor in PERFILES_PRAGMA[perfil].items():
+        conn.execute(f"PRAGMA {nombre} = {valor}").fetchall()
+
+
+class _ConexionPool:
+    """Conexión física administrada por el pool, con datos para reciclarla."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.creada_en = time.monotonic()
+        self.usos = 0
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones SQLite con reutilización por thread.
+
+    - Mantiene como máximo `tamanio` conexiones abiertas.
+    - Si un thread pide una conexión mientras ya tiene una en uso (llamadas
+      anidadas a get_connection), recibe la misma conexión.
+    - Antes de entregar una conexión se verifica que siga sana (SELECT 1) y se
+      recicla si superó `max_usos` o `max_edad` segundos.
+    - Al devolverla se descarta cualquier transacción que haya quedado abierta.
+    - Cada conexión nueva recibe los PRAGMA del perfil configurado.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, tamanio: int = POOL_TAMANIO, timeout: float = POOL_TIMEOUT,
+                 max_usos: int = POOL_MAX_USOS, max_edad: float = POOL_MAX_EDAD, perfil: str = PRAGMA_PERFIL):
+        if tamanio < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        if perfil not in PERFILES_PRAGMA:
+            raise ValueError(f"Perfil de PRAGMA '{perfil}' no válido. "
+                             f"Opciones: {', '.join(PERFILES_PRAGMA)}")
+
+        self.db_path = db_path
+        self.tamanio = tamanio
+        self.timeout = timeout
+        self.max_usos = max_usos
+        self.max_edad = max_edad
+        self.perfil = perfil
+
+        self._libres: list[_ConexionPool] = []
+        self._lock = threading.Lock()
+        self._cupos = threading.BoundedSemaphore(tamanio)
+        self._local = threading.local()
+        self._abiertas = 0
+        self._cerrado = False
+
+    def _crear_conexion(self) -> _ConexionPool:
+        # Con SQL_INSTRUMENTACION=0 las conexiones son las de sqlite3, sin medición por pedido
+        fabrica = ConexionInstrumentada if SQL_INSTRUMENTACION else sqlite3.Connection
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False, factory=fabrica)
+        conn.row_factory = sqlite3.Row  # permite acceder por nombre de columna
+        aplicar_pragmas(conn, self.perfil)
+        with self._lock:
+            self._abiertas += 1
+        return _ConexionPool(conn)
+
+    def _descartar(self, conexion: _ConexionPool):
+        try:
+            conexion.conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._abiertas -= 1
+
+    def _esta_sana(self, conexion: _ConexionPool) -> bool:
+        if conexion.usos >= self.max_usos:
+            return False
+        if time.monotonic() - conexion.creada_en >= self.max_edad:
+            return False
+        try:
+            # Directo a sqlite3 para que el chequeo no cuente como consulta del pedido
+            sqlite3.Connection.execute(conexion.conn, "SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _adquirir(self) -> _ConexionPool:
+        if self._cerrado:
+            raise RuntimeError("El pool de conexiones está cerrado")
+        if not self._cupos.acquire(timeout=self.timeout):
+            raise RuntimeError("No hay conexiones disponibles en el pool")
+
+        try:
+            while True:
+                with self._lock:
+                    conexion = self._libres.pop() if self._libres else None
+                if conexion is None:
+                    conexion = self._crear_conexion()
+                    break
+                if self._esta_sana(conexion):
+                    break
+                self._descartar(conexion)
+        except Exception:
+            self._cupos.release()
+            raise
+
+        conexion.usos += 1
+        return conexion
+
+    def _liberar(self, conexion: _ConexionPool):
+        try:
+            if conexion.conn.in_transaction:
+                conexion.conn.rollback()
+            reutilizable = not self._cerrado
+        except sqlite3.Error:
+            reutilizable = False
+
+        if reutilizable:
+            with self._lock:
+                self._libres.append(conexion)
+        else:
+            self._descartar(conexion)
+        self._cupos.release()
+
+    @contextmanager
+    def conexion(self):
+        """Entrega la conexión del thread actual o toma una del pool."""
+        local = self._local
+        actual = getattr(local, "conexion", None)
+
+        if actual is not None:
+            local.profundidad += 1
+            try:
+                yield actual.conn
+            finally:
+                local.profundidad -= 1
+            return
+
+        actual = self._adquirir()
+        local.conexion = actual
+        local.profundidad = 1
+        try:
+            yield actual.conn
+        finally:
+            local.conexion = None
+            local.profundidad = 0
+            self._liberar(actual)
+
+    def estadisticas(self) -> dict:
+        """Devuelve el estado actual del pool."""
+        with self._lock:
+            libres = len(self._libres)
+            abiertas = self._abiertas
+        return {
+            "tamanio": self.tamanio,
+            "perfil": self.perfil,
+            "abiertas": abiertas,
+            "libres": libres,
+            "en_uso": abiertas - libres,
+        }
+
+    def cerrar(self):
+        """Cierra todas las conexiones libres; las que están en uso se cierran al devolverse."""
+        self._cerrado = True
+        with self._lock:
+            libres, self._libres = self._libres, []
+        for conexion in libres:
+            self._descartar(conexion)
+
+
+_pool = ConnectionPool()
+
+
+def configurar_pool(**kwargs) -> ConnectionPool:
+    """
+    Reemplaza el pool global por uno nuevo con la configuración indicada.
+
+    Acepta los mismos parámetros que ConnectionPool (db_path, tamanio, timeout,
+    max_usos, max_edad, perfil). Pensado para llamarse una vez al iniciar la app.
+    """
+    global _pool
+    anterior = _pool
+    _pool = ConnectionPool(**kwargs)
+    anterior.cerrar()
+    return _pool
+
+
+def obtener_pool() -> ConnectionPool:
+    """Devuelve el pool global de conexiones."""
+    return _pool
+
+
 @contextmanager
 def get_connection():
-    """Devuelve una conexión SQLite lista para usar"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # permite acceder por nombre de columna
-    try:
+    """Devuelve una conexión SQLite lista para usar, tomada del pool"""
+    with _pool.conexion() as conn:
         yield conn
+
+
+# Acciones que dependen de que los cambios queden confirmados (invalidar caches,
+# actualizar índices en memoria). Ver UnidadDeTrabajo.
+_acciones = threading.local()
+
+
+def al_confirmar(accion):
+    """
+    Ejecuta `accion` cuando los cambios del thread queden confirmados.
+
+    Fuera de una unidad de trabajo los repositorios confirman en cada escritura,
+    así que se ejecuta en el momento. Dentro de una, se ejecuta cuando la unidad
+    hace commit y se descarta si hace rollback.
+    """
+    pendientes = getattr(_acciones, "pendientes", None)
+    if pendientes is None:
+        accion()
+    else:
+        pendientes.append(accion)
+
+
+@contextmanager
+def acciones_al_confirmar():
+    """Acumula las acciones de al_confirmar() del thread y entrega la lista para ejecutarlas o descartarlas."""
+    anteriores = getattr(_acciones, "pendientes", None)
+    pendientes = []
+    _acciones.pendientes = pendientes
+    try:
+        yield pendientes
     finally:
-        conn.close()
+        _acciones.pendientes = anteriores
@@ -0,0 +1,459 @@
+"""
+Generador de datos sintéticos a escala, para probar y medir con volúmenes reales:
+
+    python3 -m app.database.generar_datos --base /tmp/grande.db --vehiculos 20000 --clientes 2000000 \\
+        --alquileres 10000000 --reservas 1000000 --mantenimientos 200000 --pagos 10000000 --incidentes 300000
+
+Si la base no existe se crea con el esquema de app/database/database.db, las
+migraciones y los catálogos de seed_data.py; si existe, los datos se agregan a
+los que ya tiene. La base no debe estar en uso mientras se genera.
+
+Es determinista: la misma --semilla y el mismo --hasta (último día de la historia,
+hoy por defecto) generan la misma base. Las distribuciones imitan la operación:
+- alquileres en orden cronológico, sin superponerse en un mismo vehículo mientras
+  haya al menos 2 días por alquiler; FINALIZADO (con algunas devoluciones tarde),
+  CANCELADO, ACTIVO los que están en curso y PENDIENTE los de los próximos 30 días.
+- clientes con frecuencia desigual (pocos alquilan mucho).
+- pagos e incidentes asociados a los alquileres (--pagos e --incidentes son totales
+  aproximados); reservas y mantenimientos repartidos en el período.
+
+Para cargar rápido, los índices y triggers de las tablas que se llenan se quitan y
+se vuelven a crear al final; el estado de los vehículos y ingresos_mensuales_rollup
+se recalculan una sola vez. Las filas se insertan con executemany en transacciones
+de --lote filas.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+from app.database.backfill_ingresos import recalcular_ingresos
+from app.database.database import DB_PATH
+from app.database.migrations import RECALCULAR_ESTADO, aplicar_migraciones
+from app.database.seed_data import insertar_catalogos
+
+TABLAS = ("vehiculos", "clientes", "alquileres", "pagos", "incidentes", "reservas", "mantenimientos")
+
+MODELOS = [
+    ("Toyota", "Corolla", 8000), ("Toyota", "Etios", 6500), ("Toyota", "Hilux", 12000),
+    ("Ford", "Focus", 7500), ("Ford", "Ka", 6000), ("Ford", "Ranger", 11500),
+    ("Chevrolet", "Cruze", 9000), ("Chevrolet", "Onix", 6800), ("Volkswagen", "Vento", 8500),
+    ("Volkswagen", "Gol", 5800), ("Volkswagen", "Amarok", 12500), ("Honda", "Civic", 9500),
+    ("Renault", "Logan", 6500), ("Renault", "Kangoo", 7000), ("Peugeot", "208", 7000),
+    ("Peugeot", "2008", 8200), ("Fiat", "Cronos", 7200), ("Fiat", "Argo", 6600),
+]
+NOMBRES = ["Pedro", "Ana", "Luis", "Maria", "Juan", "Sofia", "Carlos", "Lucia", "Martin", "Valentina",
+           "Diego", "Camila", "Jorge", "Julieta", "Pablo", "Florencia", "Nicolas", "Agustina", "Tomas", "Paula"]
+APELLIDOS = ["Martinez", "Lopez", "Fernandez", "Gonzalez", "Rodriguez", "Perez", "Gomez", "Diaz", "Sanchez",
+             "Romero", "Sosa", "Alvarez", "Torres", "Ruiz", "Ramirez", "Flores", "Acosta", "Benitez"]
+CALLES = ["Av. Corrientes", "Av. Libertador", "San Martin", "Belgrano", "Rivadavia", "Mitre", "Sarmiento",
+          "Av. Colon", "Bv. San Juan", "Dean Funes", "Av. Velez Sarsfield", "Chacabuco"]
+METODOS_PAGO = ["EFECTIVO", "TARJETA", "TARJETA", "TRANSFERENCIA"]
+# Tipos de incidente de seed_data (id, costo mínimo, costo máximo), pesados por frecuencia
+TIPOS_INCIDENTE = [(3, 15000, 120000)] * 45 + [(4, 20000, 80000)] * 30 + [(5, 50000, 600000)] * 15 \
+    + [(1, 200000, 3000000)] * 8 + [(2, 5000000, 15000000)] * 2
+TAREAS_MANTENIMIENTO = ["Service de rutina", "Cambio de aceite y filtros", "Cambio de pastillas de freno",
+                        "Cambio de neumáticos", "Alineación y balanceo", "Cambio de batería", "Revisión general"]
+
+SQL_VEHICULOS = """
+    INSERT INTO vehiculos (id_vehiculo, patente, marca, modelo, anio, tarifa_base_dia, km_actual, habilitado,
+                           seguro_venc, vtv_venc, km_service_cada, km_ultimo_service, fecha_ultimo_service)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_CLIENTES = """
+    INSERT INTO clientes (id_cliente, dni, nombre, apellido, email, telefono, direccion,
+                          licencia_num, licencia_venc, habilitado)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_ALQUILERES = """
+    INSERT INTO alquileres (id_alquiler, cliente_id, vehiculo_id, empleado_id, estado_alquiler_id,
+                            fecha_inicio, fecha_prevista, fecha_entrega, km_salida, km_entrada, creado_en)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_PAGOS = """
+    INSERT INTO pagos (alquiler_id, empleado_id, fecha, monto, metodo, descripcion)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+SQL_INCIDENTES = """
+    INSERT INTO incidentes (alquiler_id, tipo_incidente_id, estado_incidente_id, empleado_id, fecha, descripcion, costo)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_RESERVAS = """
+    INSERT INTO reservas (cliente_id, vehiculo_id, empleado_id, estado_reserva_id, fecha_reserva,
+                          fecha_alquiler, senia_monto)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_MANTENIMIENTOS = """
+    INSERT INTO mantenimientos (vehiculo_id, empleado_id, estado_mantenimiento, fecha_programada,
+                                fecha_realizada, km, costo, observacion)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+DIAS_FUTURO = 30
+
+
+def _patente(numero: int) -> str:
+    """Patente Mercosur (AA123AA) única para cada número."""
+    numero, digitos = divmod(numero, 1000)
+    letras = []
+    for _ in range(4):
+        numero, letra = divmod(numero, 26)
+        letras.append(chr(65 + letra))
+    return f"{letras[3]}{letras[2]}{digitos:03d}{letras[1]}{letras[0]}"
+
+
+def crear_base(ruta: str, plantilla: str = DB_PATH):
+    """Crea una base vacía con el esquema de la plantilla, las migraciones y los catálogos."""
+    origen = sqlite3.connect(plantilla)
+    objetos = origen.execute(
+        "SELECT type, sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+        "AND tbl_name NOT LIKE '%_old' AND tbl_name NOT LIKE '%_backup' "
+        "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 WHEN 'view' THEN 2 ELSE 3 END"
+    ).fetchall()
+    tiene_migraciones = origen.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'").fetchone()
+    migraciones = origen.execute("SELECT * FROM schema_migrations").fetchall() if tiene_migraciones else []
+    origen.close()
+
+    conn = sqlite3.connect(ruta)
+    try:
+        for _, sql in objetos:
+            conn.execute(sql)
+        if migraciones:
+            marcadores = ", ".join("?" for _ in migraciones[0])
+            conn.executemany(f"INSERT INTO schema_migrations VALUES ({marcadores})", migraciones)
+        conn.commit()
+        aplicar_migraciones(conn)
+        insertar_catalogos(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class GeneradorDatos:
+    """
+    Llena una base con datos sintéticos.
+
+    Args:
+        conn: Conexión a la base (de uso exclusivo mientras se genera)
+        semilla: Semilla del generador de números aleatorios
+        hasta: Último día de la historia ("hoy" para los datos generados)
+        anios: Años de historia
+        lote: Filas por transacción
+    """
+
+    def __init__(self, conn: sqlite3.Connection, semilla: int = 42, hasta: date = None, anios: int = 5,
+                 lote: int = 500_000):
+        self.conn = conn
+        self.rng = random.Random(semilla)
+        self.hasta = hasta or date.today()
+        self.lote = lote
+        desde = self.hasta - timedelta(days=365 * anios)
+        self.hoy = (self.hasta - desde).days
+        # Fechas ISO precalculadas: dias[i] es la fecha del día i desde el inicio de la historia
+        # (con margen: con pocos alquileres por vehículo el último puede terminar lejos)
+        self.dias = [(desde + timedelta(days=i)).isoformat() for i in range(2 * (self.hoy + DIAS_FUTURO) + 400)]
+        self.empleados = [fila[0] for fila in conn.execute("SELECT id_empleado FROM empleados")] or [None]
+
+    def _dia(self, indice: int) -> str:
+        return self.dias[indice] if indice >= 0 else (date.fromisoformat(self.dias[0])
+                                                      + timedelta(days=indice)).isoformat()
+
+    def _siguiente_id(self, tabla: str, columna: str) -> int:
+        return self.conn.execute(f"SELECT COALESCE(MAX({columna}), 0) + 1 FROM {tabla}").fetchone()[0]
+
+    def _insertar(self, nombre: str, sql: str, filas, total: int):
+        """Inserta `total` filas del iterador en transacciones de self.lote filas."""
+        filas = iter(filas)
+        inicio = time.perf_counter()
+        hechas = 0
+        while hechas < total:
+            cantidad = min(self.lote, total - hechas)
+            self.conn.executemany(sql, islice(filas, cantidad))
+            self.conn.commit()
+            hechas += cantidad
+            print(f"  {nombre}: {hechas}/{total}", end="\r", flush=True)
+        self._informar(nombre, hechas, inicio)
+
+    @staticmethod
+    def _informar(nombre: str, filas: int, inicio: float):
+        segundos = time.perf_counter() - inicio
+        print(f"  {nombre}: {filas} filas en {segundos:.1f} s ({filas / max(segundos, 1e-9):,.0f} filas/s)")
+
+    def vehiculos(self, cantidad: int):
+        r = self.rng.random
+        primer_id = self._siguiente_id("vehiculos", "id_vehiculo")
+        anio_actual = self.hasta.year
+
+        def filas():
+            for id_vehiculo in range(primer_id, primer_id + cantidad):
+                marca, modelo, tarifa = MODELOS[int(r() * len(MODELOS))]
+                antiguedad = int(r() * 10)
+                # km al comienzo de la historia; los alquileres los hacen crecer
+                km = int(antiguedad * 8000 * (0.6 + 0.8 * r()))
+                yield (
+                    id_vehiculo, _patente(id_vehiculo), marca, modelo, anio_actual - antiguedad,
+                    round(tarifa * (1 - 0.03 * antiguedad) * (0.9 + 0.2 * r()), -2), km,
+                    0 if r() < 0.03 else 1,
+                    self.dias[self.hoy + int(r() * 395) - 30], self.dias[self.hoy + int(r() * 395) - 30],
+                    10000, km - km % 10000, self.dias[self.hoy - int(r() * 180)],
+                )
+
+        self._insertar("vehiculos", SQL_VEHICULOS, filas(), cantidad)
+
+    def clientes(self, cantidad: int):
+        r = self.rng.random
+        primer_id = self._siguiente_id("clientes", "id_cliente")
+
+        def filas():
+            for id_cliente in range(primer_id, primer_id + cantidad):
+                nombre = NOMBRES[int(r() * len(NOMBRES))]
+                apellido = APELLIDOS[int(r() * len(APELLIDOS))]
+                yield (
+                    id_cliente, str(20_000_000 + id_cliente), nombre, apellido,
+                    f"{nombre.lower()}.{apellido.lower()}.{id_cliente}@ejemplo.com",
+                    f"11{int(r() * 100_000_000):08d}",
+                    f"{CALLES[int(r() * len(CALLES))]} {1 + int(r() * 6000)}",
+                    f"LIC{id_cliente:08d}", self.dias[self.hoy + int(r() * 1700) - 200],
+                    0 if r() < 0.02 else 1,
+                )
+
+        self._insertar("clientes", SQL_CLIENTES, filas(), cantidad)
+
+    def alquileres(self, cantidad: int, pagos: int, incidentes: int):
+        """
+        Alquileres en orden cronológico, con sus pagos e incidentes.
+
+        Cada vehículo recibe la misma cantidad de alquileres, uno por franja de
+        (período / cantidad) días: empieza en el primer 20% de la franja, dura hasta
+        el 60% y se devuelve tarde en el resto, así no se superpone con el siguiente.
+        """
+        r = self.rng.random
+        dias, hoy, empleados = self.dias, self.hoy, self.empleados
+        vehiculos = self.conn.execute("SELECT id_vehiculo, tarifa_base_dia, km_actual FROM vehiculos").fetchall()
+        clientes = [fila[0] for fila in self.conn.execute("SELECT id_cliente FROM clientes")]
+        if cantidad and (not vehiculos or not clientes):
+            raise ValueError("Para generar alquileres hacen falta vehículos y clientes")
+        km_vehiculo = [km for _, _, km in vehiculos]
+        por_vehiculo, resto = divmod(cantidad, len(vehiculos) or 1)
+        periodo = hoy + DIAS_FUTURO
+        pagos_por_alquiler = pagos / cantidad if cantidad else 0
+        incidentes_por_alquiler = incidentes / cantidad if cantidad else 0
+        lote_pagos, lote_incidentes = [], []
+
+        def filas():
+            id_alquiler = self._siguiente_id("alquileres", "id_alquiler")
+            for k in range(por_vehiculo + 1):
+                for v, (id_vehiculo, tarifa, _) in enumerate(vehiculos):
+                    total_vehiculo = por_vehiculo + (1 if v < resto else 0)
+                    if k >= total_vehiculo:
+                        continue
+                    franja = periodo / total_vehiculo
+                    inicio = int(k * franja + r() * franja * 0.2)
+                    duracion = 1 + int(r() * max(franja * 0.6 - 1, 0))
+                    prevista = inicio + duracion
+                    cliente = clientes[int(len(clientes) * r() * r())]
+                    empleado = empleados[int(r() * len(empleados))]
+                    km_salida = km_vehiculo[v]
+                    entrega = km_entrada = None
+
+                    if inicio > hoy:
+                        estado = 1  # PENDIENTE
+                    elif prevista >= hoy:
+                        estado = 2  # ACTIVO
+                    elif r() < 0.04:
+                        estado = 4  # CANCELADO
+                    else:
+                        estado = 3  # FINALIZADO
+                        retraso = 0 if r() < 0.85 else 1 + int(r() * max(franja * 0.2 - 1, 0))
+                        entrega = min(prevista + retraso, hoy)
+                        km_entrada = km_salida + int((entrega - inicio + 1) * (60 + 200 * r()))
+                        km_vehiculo[v] = km_entrada
+
+                    yield (id_alquiler, cliente, id_vehiculo, empleado, estado, dias[inicio], dias[prevista],
+                           dias[entrega] if entrega is not None else None, km_salida, km_entrada,
+                           f"{self._dia(inicio - int(r() * 15))} {8 + int(r() * 12):02d}:{int(r() * 60):02d}:00")
+
+                    if estado in (2, 3):
+                        fin = entrega if entrega is not None else hoy
+                        monto = round((fin - inicio) * tarifa, 2)
+                        cantidad_pagos = int(pagos_por_alquiler) + (r() < pagos_por_alquiler % 1)
+                        for p in range(cantidad_pagos):
+                            # Con más de un pago, el primero es la seña y el resto el saldo
+                            parte = monto if cantidad_pagos == 1 else (
+                                round(monto * 0.3, 2) if p == 0 else round(monto * 0.7 / (cantidad_pagos - 1), 2))
+                            lote_pagos.append((id_alquiler, empleado,
+                                               f"{dias[inicio if p == 0 else fin]} {9 + int(r() * 10):02d}:00:00",
+                                               parte, METODOS_PAGO[int(r() * len(METODOS_PAGO))],
+                                               "Seña" if p == 0 and cantidad_pagos > 1 else None))
+                        if r() < incidentes_por_alquiler:
+                            tipo, minimo, maximo = TIPOS_INCIDENTE[int(r() * len(TIPOS_INCIDENTE))]
+                            dia = inicio + int(r() * (fin - inicio + 1))
+                            if hoy - dia > 60:
+                                estado_incidente = 4 if r() < 0.7 else 3  # CERRADO / RESUELTO
+                            else:
+                                estado_incidente = 1 if r() < 0.5 else 2  # REPORTADO / EN_REVISION
+                            lote_incidentes.append((id_alquiler, tipo, estado_incidente, empleado,
+                                                    f"{dias[dia]} {8 + int(r() * 14):02d}:00:00", None,
+                                                    round(minimo + (maximo - minimo) * r(), -2)))
+                    id_alquiler += 1
+
+        inicio = time.perf_counter()
+        filas_alquileres = filas()
+        hechas = cantidad_pagos = cantidad_incidentes = 0
+        while hechas < cantidad:
+            parte = min(self.lote, cantidad - hechas)
+            self.conn.executemany(SQL_ALQUILERES, islice(filas_alquileres, parte))
+            self.conn.executemany(SQL_PAGOS, lote_pagos)
+            self.conn.executemany(SQL_INCIDENTES, lote_incidentes)
+            self.conn.commit()
+            hechas += parte
+            cantidad_pagos += len(lote_pagos)
+            cantidad_incidentes += len(lote_incidentes)
+            lote_pagos.clear()
+            lote_incidentes.clear()
+            print(f"  alquileres: {hechas}/{cantidad}", end="\r", flush=True)
+        self._informar("alquileres", hechas, inicio)
+        print(f"    con {cantidad_pagos} pagos y {cantidad_incidentes} incidentes")
+
+        # El kilometraje de cada vehículo es el de su última devolución
+        self.conn.executemany("UPDATE vehiculos SET km_actual = ?, km_ultimo_service = ? WHERE id_vehiculo = ?",
+                              [(km, km - km % 10000, fila[0]) for km, fila in zip(km_vehiculo, vehiculos)])
+        self.conn.commit()
+
+    def reservas(self, cantidad: int):
+        r = self.rng.random
+        dias, hoy, empleados = self.dias, self.hoy, self.empleados
+        vehiculos = self.conn.execute("SELECT id_vehiculo, tarifa_base_dia FROM vehiculos").fetchall()
+        clientes = [fila[0] for fila in self.conn.execute("SELECT id_cliente FROM clientes")]
+        if cantidad and (not vehiculos or not clientes):
+            raise ValueError("Para generar reservas hacen falta vehículos y clientes")
+
+        def filas():
+            for _ in range(cantidad):
+                id_vehiculo, tarifa = vehiculos[int(r() * len(vehiculos))]
+                reservado = int(r() * (hoy + 1))
+                alquiler = reservado + 1 + int(r() * 30)
+                if alquiler < hoy:
+                    estado = 4 if r() < 0.75 else 3  # COMPLETADA / CANCELADA
+                else:
+                    estado = 2 if r() < 0.6 else 1  # CONFIRMADA / PENDIENTE
+                yield (clientes[int(len(clientes) * r() * r())], id_vehiculo, empleados[int(r() * len(empleados))],
+                       estado, dias[reservado], dias[alquiler], round(tarifa * (0.5 + 1.5 * r()), -2))
+
+        self._insertar("reservas", SQL_RESERVAS, filas(), cantidad)
+
+    def mantenimientos(self, cantidad: int):
+        r = self.rng.random
+        dias, hoy, empleados = self.dias, self.hoy, self.empleados
+        vehiculos = self.conn.execute("SELECT id_vehiculo, km_actual FROM vehiculos").fetchall()
+        if cantidad and not vehiculos:
+            raise ValueError("Para generar mantenimientos hacen falta vehículos")
+        periodo = hoy + DIAS_FUTURO
+
+        def filas():
+            for _ in range(cantidad):
+                id_vehiculo, km_actual = vehiculos[int(r() * len(vehiculos))]
+                programada = int(r() * periodo)
+                realizada = None
+                if programada > hoy:
+                    estado = "PROGRAMADO"
+                elif r() < 0.05:
+                    estado = "CANCELADO"
+                else:
+                    estado = "COMPLETADO"
+                    realizada = dias[min(programada + int(r() * 3), hoy)]
+                yield (id_vehiculo, empleados[int(r() * len(empleados))], estado, dias[programada], realizada,
+                       int(km_actual * programada / periodo), round(20000 + 380000 * r(), -2),
+                       TAREAS_MANTENIMIENTO[int(r() * len(TAREAS_MANTENIMIENTO))])
+
+        self._insertar("mantenimientos", SQL_MANTENIMIENTOS, filas(), cantidad)
+
+
+def _quitar(conn: sqlite3.Connection, tipo: str, tablas) -> list[str]:
+    """Quita los índices o triggers de las tablas y devuelve su SQL para volver a crearlos."""
+    marcadores = ", ".join("?" for _ in tablas)
+    objetos = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = ? AND sql IS NOT NULL AND tbl_name IN ({marcadores})",
+        (tipo, *tablas)
+    ).fetchall()
+    for nombre, _ in objetos:
+        conn.execute(f"DROP {tipo.upper()} {nombre}")
+    conn.commit()
+    return [sql for _, sql in objetos]
+
+
+def generar(conn: sqlite3.Connection, cantidades: dict, **opciones):
+    """
+    Genera los datos pedidos en `cantidades` (vehiculos, clientes, alquileres, pagos,
+    incidentes, reservas, mantenimientos) sobre una base ya creada y migrada.
+    """
+    conn.execute("PRAGMA journal_mode = TRUNCATE")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+    indices = _quitar(conn, "index", TABLAS)
+    triggers = _quitar(conn, "trigger", TABLAS)
+    try:
+        generador = GeneradorDatos(conn, **opciones)
+        generador.vehiculos(cantidades.get("vehiculos", 0))
+        generador.clientes(cantidades.get("clientes", 0))
+        generador.alquileres(cantidades.get("alquileres", 0), cantidades.get("pagos", 0),
+                             cantidades.get("incidentes", 0))
+        generador.reservas(cantidades.get("reservas", 0))
+        generador.mantenimientos(cantidades.get("mantenimientos", 0))
+    finally:
+        inicio = time.perf_counter()
+        for sql in indices + triggers:
+            conn.execute(sql)
+        conn.commit()
+        print(f"  {len(indices)} índices y {len(triggers)} triggers recreados en {time.perf_counter() - inicio:.1f} s")
+
+    inicio = time.perf_counter()
+    conn.execute(RECALCULAR_ESTADO)
+    conn.commit()
+    filas = recalcular_ingresos(conn)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA journal_mode = WAL")
+    print(f"  estado de vehículos, ingresos_mensuales_rollup ({filas} filas) y ANALYZE "
+          f"en {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", required=True, help="Base a llenar (se crea si no existe)")
+    parser.add_argument("--vehiculos", type=int, default=2000)
+    parser.add_argument("--clientes", type=int, default=50_000)
+    parser.add_argument("--alquileres", type=int, default=500_000)
+    parser.add_argument("--pagos", type=int, help="Total aproximado; por defecto uno por alquiler")
+    parser.add_argument("--incidentes", type=int, help="Total aproximado; por defecto 3%% de los alquileres")
+    parser.add_argument("--reservas", type=int, default=50_000)
+    parser.add_argument("--mantenimientos", type=int, default=10_000)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Último día de la historia (YYYY-MM-DD), hoy por defecto")
+    parser.add_argument("--anios", type=int, default=5, help="Años de historia")
+    parser.add_argument("--lote", type=int, default=500_000, help="Filas por transacción")
+    args = parser.parse_args()
+    if args.pagos is None:
+        args.pagos = args.alquileres
+    if args.incidentes is None:
+        args.incidentes = args.alquileres * 3 // 100
+
+    if os.path.abspath(args.base) == os.path.abspath(DB_PATH):
+        parser.error("--base no puede ser la base de la aplicación; usar otra ruta")
+    if not os.path.exists(args.base):
+        crear_base(args.base)
+
+    inicio = time.perf_counter()
+    conn = sqlite3.connect(args.base)
+    try:
+        aplicar_migraciones(conn)
+        generar(conn, {tabla: getattr(args, tabla) for tabla in TABLAS},
+                semilla=args.semilla, hasta=args.hasta, anios=args.anios, lote=args.lote)
+    finally:
+        conn.close()
+    print(f"✓ {args.base} generada en {time.perf_counter() - inicio:.1f} s")
@@ -0,0 +1,47 @@
+"""
+Importación masiva de vehículos, clientes o alquileres históricos desde un archivo
+CSV (con encabezado) o NDJSON (un objeto JSON por línea):
+
+    python3 -m app.database.importar alquileres historicos.csv [--formato ndjson] [--lote 5000] [--base ruta/a/database.db]
+
+Las columnas son los campos del alta individual; los alquileres pueden indicar
+el cliente con cliente_id, cliente_email o cliente_dni y el vehículo con
+vehiculo_id o patente. Las filas válidas se insertan aunque otras fallen; termina
+con código 1 si alguna fila se rechazó.
+"""
+import argparse
+import sys
+
+from app.database.database import DB_PATH, configurar_pool, get_connection
+from app.database.migrations import aplicar_migraciones
+from app.services.ImportacionService import FORMATOS, IMPORTADORES, TAMANIO_LOTE, importar_service
+
+# Errores que se muestran en consola
+ERRORES_A_MOSTRAR = 20
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entidad", choices=list(IMPORTADORES))
+    parser.add_argument("archivo")
+    parser.add_argument("--formato", choices=FORMATOS,
+                        help="Formato del archivo; por defecto según la extensión (.ndjson/.jsonl o csv)")
+    parser.add_argument("--lote", type=int, default=TAMANIO_LOTE, help="Filas por transacción")
+    parser.add_argument("--base", default=DB_PATH)
+    args = parser.parse_args()
+
+    formato = args.formato or ("ndjson" if args.archivo.endswith((".ndjson", ".jsonl")) else "csv")
+    configurar_pool(db_path=args.base)
+    with get_connection() as conn:
+        aplicar_migraciones(conn)
+
+    with open(args.archivo, encoding="utf-8-sig", newline="") as archivo:
+        reporte = importar_service(args.entidad, archivo, formato, args.lote)
+
+    print(f"{reporte['entidad']}: {reporte['filas']} filas, {reporte['insertadas']} insertadas, "
+          f"{reporte['rechazadas']} rechazadas en {reporte['segundos']} s")
+    for error in reporte["errores"][:ERRORES_A_MOSTRAR]:
+        print(f"  línea {error['linea']}: {error['error']}")
+    if reporte["rechazadas"] > ERRORES_A_MOSTRAR:
+        print(f"  ... y {reporte['rechazadas'] - ERRORES_A_MOSTRAR} errores más")
+    sys.exit(1 if reporte["rechazadas"] else 0)
@@ -0,0 +1,248 @@
+"""
+Instrumentación de las consultas SQL por pedido.
+
+Las conexiones del pool son ConexionInstrumentada y sus cursores, CursorInstrumentado.
+Mientras hay un registro activo en el thread (medir_sql(); la app abre uno por cada
+pedido HTTP, ver app/routes/Instrumentacion.py) cada sentencia suma:
+- cantidad de ejecuciones, tiempo (execute más los fetch) y filas (leídas o modificadas)
+- agrupadas por el texto normalizado de la sentencia (espacios colapsados, literales
+  y listas IN reemplazados por ?), así cien SELECT por ID cuentan como una sentencia
+  ejecutada cien veces.
+
+Una sentencia que tarda más de SQL_LENTA_MS (default 100) se marca como lenta y se
+guarda su EXPLAIN QUERY PLAN; una que se repite más de SQL_REPETICIONES_ALERTA veces
+(default 25) en un mismo pedido es un posible N+1. Sin registro activo (scripts,
+threads de fondo) los cursores se comportan como los de sqlite3.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+SQL_LENTA_MS = float(os.environ.get("SQL_LENTA_MS", "100"))
+SQL_REPETICIONES_ALERTA = int(os.environ.get("SQL_REPETICIONES_ALERTA", "25"))
+
+_local = threading.local()
+
+_COMENTARIOS = re.compile(r"--[^\n]*")
+_ESPACIOS = re.compile(r"\s+")
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@lru_cache(maxsize=1024)
+def normalizar_sql(sql: str) -> str:
+    """Texto de la sentencia sin comentarios ni espacios de más, con literales y listas IN reemplazados por ?."""
+    normalizada = _ESPACIOS.sub(" ", _COMENTARIOS.sub("", sql)).strip()
+    normalizada = _LITERALES.sub("?", normalizada)
+    return _LISTAS.sub("(?, ...)", normalizada)
+
+
+class ConsultaSQL:
+    """Una ejecución de una sentencia: tiempo y filas acumulados entre execute y los fetch."""
+
+    __slots__ = ("registro", "sql", "parametros", "segundos", "filas", "plan")
+
+    def __init__(self, registro, sql: str, parametros):
+        self.registro = registro
+        self.sql = sql
+        self.parametros = parametros
+        self.segundos = 0.0
+        self.filas = 0
+        self.plan = None
+
+
+class RegistroSQL:
+    """Totales de las consultas ejecutadas mientras el registro está activo."""
+
+    def __init__(self, lenta_ms: float = None, repeticiones_alerta: int = None):
+        self.lenta = (SQL_LENTA_MS if lenta_ms is None else lenta_ms) / 1000
+        self.repeticiones_alerta = SQL_REPETICIONES_ALERTA if repeticiones_alerta is None else repeticiones_alerta
+        self.consultas = 0
+        self.segundos = 0.0
+        self.filas = 0
+        # sentencia normalizada -> [ejecuciones, segundos, filas]
+        self.por_sentencia = {}
+        self.lentas: list[ConsultaSQL] = []
+
+    def iniciar(self, sql: str, parametros) -> ConsultaSQL:
+        self.consultas += 1
+        acumulado = self.por_sentencia.get(sql)
+        if acumulado is None:
+            acumulado = self.por_sentencia[sql] = [0, 0.0, 0]
+        acumulado[0] += 1
+        return ConsultaSQL(self, sql, parametros)
+
+    def sumar(self, consulta: ConsultaSQL, segundos: float, filas: int, conn=None):
+        consulta.segundos += segundos
+        consulta.filas += filas
+        self.segundos += segundos
+        self.filas += filas
+        acumulado = self.por_sentencia[consulta.sql]
+        acumulado[1] += segundos
+        acumulado[2] += filas
+
+        # El plan se toma apenas la sentencia pasa el umbral, con la conexión todavía a mano
+        if consulta.plan is None and consulta.segundos >= self.lenta:
+            consulta.plan = explicar(conn, consulta.sql, consulta.parametros)
+            self.lentas.append(consulta)
+
+    def sentencias(self) -> list[dict]:
+        """Sentencias normalizadas con sus totales, de la que más tiempo llevó a la que menos."""
+        agrupadas = {}
+        for sql, (ejecuciones, segundos, filas) in self.por_sentencia.items():
+            total = agrupadas.setdefault(normalizar_sql(sql), [0, 0.0, 0])
+            total[0] += ejecuciones
+            total[1] += segundos
+            total[2] += filas
+        return [
+            {"sql": sql, "ejecuciones": ejecuciones, "ms": round(segundos * 1000, 3), "filas": filas}
+            for sql, (ejecuciones, segundos, filas) in sorted(agrupadas.items(), key=lambda e: -e[1][1])
+        ]
+
+    def repetidas(self) -> list[dict]:
+        """Sentencias ejecutadas más de `repeticiones_alerta` veces (posible N+1)."""
+        return [s for s in self.sentencias() if s["ejecuciones"] > self.repeticiones_alerta]
+
+    def to_dict(self) -> dict:
+        return {
+            "consultas": self.consultas,
+            "ms": round(self.segundos * 1000, 3),
+            "filas": self.filas,
+            "sentencias": self.sentencias(),
+            "lentas": [
+                {"sql": normalizar_sql(c.sql), "ms": round(c.segundos * 1000, 3), "filas": c.filas, "plan": c.plan}
+                for c in self.lentas
+            ],
+        }
+
+
+def explicar(conn, sql: str, parametros) -> list[str]:
+    """EXPLAIN QUERY PLAN de la sentencia (sin pasar por la instrumentación)."""
+    if conn is None:
+        return []
+    if parametros is None:
+        # executemany: el plan no depende de los valores, alcanza con NULL en cada parámetro
+        parametros = (None,) * sql.count("?")
+    try:
+        filas = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parametros).fetchall()
+        return [fila[3] for fila in filas]
+    except (sqlite3.Error, ValueError) as e:
+        return [f"(sin plan: {e})"]
+
+
+def registro_actual() -> RegistroSQL | None:
+    return getattr(_local, "registro", None)
+
+
+def activar_registro(registro: RegistroSQL = None) -> RegistroSQL:
+    """Las consultas de este thread se suman a `registro` hasta desactivar_registro()."""
+    _local.registro = registro or RegistroSQL()
+    return _local.registro
+
+
+def desactivar_registro():
+    _local.registro = None
+
+
+@contextmanager
+def medir_sql(registro: RegistroSQL = None):
+    """Activa un registro de consultas para el thread actual mientras dura el bloque."""
+    anterior = registro_actual()
+    try:
+        yield activar_registro(registro)
+    finally:
+        _local.registro = anterior
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que suma tiempo y filas de cada sentencia al registro activo del thread."""
+
+    __slots__ = ("_consulta",)
+
+    def _medir(self, metodo, argumentos, sql: str, parametros):
+        registro = getattr(_local, "registro", None)
+        if registro is None:
+            self._consulta = None
+            return metodo(*argumentos)
+        consulta = self._consulta = registro.iniciar(sql, parametros)
+        inicio = time.perf_counter()
+        try:
+            return metodo(*argumentos)
+        finally:
+            registro.sumar(consulta, time.perf_counter() - inicio, max(self.rowcount, 0), self.connection)
+
+    def execute(self, sql, parameters=()):
+        return self._medir(super().execute, (sql, parameters), sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._medir(super().executemany, (sql, seq_of_parameters), sql, None)
+
+    def _sumar_fetch(self, inicio: float, filas: int):
+        consulta = self._consulta
+        consulta.registro.sumar(consulta, time.perf_counter() - inicio, filas, self.connection)
+
+    def fetchone(self):
+        if getattr(self, "_consulta", None) is None:
+            return super().fetchone()
+        inicio = time.perf_counter()
+        fila = super().fetchone()
+        self._sumar_fetch(inicio, 0 if fila is None else 1)
+        return fila
+
+    def fetchmany(self, size=None):
+        if getattr(self, "_consulta", None) is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        inicio = time.perf_counter()
+        filas = super().fetchmany(self.arraysize if size is None else size)
+        self._sumar_fetch(inicio, len(filas))
+        return filas
+
+    def fetchall(self):
+        if getattr(self, "_consulta", None) is None:
+            return super().fetchall()
+        inicio = time.perf_counter()
+        filas = super().fetchall()
+        self._sumar_fetch(inicio, len(filas))
+        return filas
+
+    def __iter__(self):
+        if getattr(self, "_consulta", None) is None:
+            return self
+        return self._iterar()
+
+    def _iterar(self):
+        """Recorre el cursor midiendo solo el tiempo de cada paso (no el del código que consume las filas)."""
+        siguiente = super().__next__
+        segundos = 0.0
+        filas = 0
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    fila = siguiente()
+                except StopIteration:
+                    segundos += time.perf_counter() - inicio
+                    return
+                segundos += time.perf_counter() - inicio
+                filas += 1
+                yield fila
+        finally:
+            consulta = self._consulta
+            consulta.registro.sumar(consulta, segundos, filas, self.connection)
+
+
+class ConexionInstrumentada(sqlite3.Connection):
+    """Conexión cuyos cursores (también los de execute/executemany) son CursorInstrumentado."""
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,339 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada migración tiene un número de versión, un nombre y una lista de sentencias.
+Las versiones aplicadas se registran en la tabla schema_migrations, así cada
+migración corre una sola vez por base de datos. La app aplica las pendientes
+al iniciar (create_app) y también se pueden aplicar a mano con:
+
+    python3 -m app.database.migrations
+"""
+import sqlite3
+import os
+
+# Estado de cada vehículo a la fecha de hoy. Es la misma regla que usaba
+# obtener_todos_con_estado; la tabla vehiculo_estado_actual guarda su resultado.
+VISTA_ESTADO_VEHICULO = """
+    CREATE VIEW IF NOT EXISTS vehiculo_estado_calculado AS
+    SELECT
+        v.id_vehiculo AS vehiculo_id,
+        CASE
+            WHEN EXISTS (
+                SELECT 1 FROM mantenimientos m
+                WHERE m.vehiculo_id = v.id_vehiculo
+                AND m.estado_mantenimiento IN ('PROGRAMADO', 'EN_PROGRESO')
+                AND (m.fecha_realizada IS NULL OR date(m.fecha_realizada) >= date('now'))
+            ) THEN 'mantenimiento'
+            WHEN EXISTS (
+                SELECT 1 FROM alquileres a
+                WHERE a.vehiculo_id = v.id_vehiculo
+                AND a.estado_alquiler_id IN (1, 2)
+                AND date(a.fecha_inicio) <= date('now')
+                AND (date(a.fecha_prevista) >= date('now') OR a.fecha_entrega IS NULL)
+            ) THEN 'alquilado'
+            WHEN EXISTS (
+                SELECT 1 FROM reservas r
+                WHERE r.vehiculo_id = v.id_vehiculo
+                AND r.estado_reserva_id IN (1, 2)
+                AND date(r.fecha_alquiler) >= date('now')
+            ) THEN 'reservado'
+            ELSE 'disponible'
+        END AS estado_actual
+    FROM vehiculos v
+"""
+
+# Misma regla que VISTA_ESTADO_VEHICULO con comparaciones directas sobre las columnas;
+# requiere fechas en formato canónico (migración 4, ver app/repository/Fechas.py)
+VISTA_ESTADO_VEHICULO_ISO = """
+    CREATE VIEW IF NOT EXISTS vehiculo_estado_calculado AS
+    SELECT
+        v.id_vehiculo AS vehiculo_id,
+        CASE
+            WHEN EXISTS (
+                SELECT 1 FROM mantenimientos m
+                WHERE m.vehiculo_id = v.id_vehiculo
+                AND m.estado_mantenimiento IN ('PROGRAMADO', 'EN_PROGRESO')
+                AND (m.fecha_realizada IS NULL OR m.fecha_realizada >= date('now'))
+            ) THEN 'mantenimiento'
+            WHEN EXISTS (
+                SELECT 1 FROM alquileres a
+                WHERE a.vehiculo_id = v.id_vehiculo
+                AND a.estado_alquiler_id IN (1, 2)
+                AND a.fecha_inicio <= date('now')
+                AND (a.fecha_prevista >= date('now') OR a.fecha_entrega IS NULL)
+            ) THEN 'alquilado'
+            WHEN EXISTS (
+                SELECT 1 FROM reservas r
+                WHERE r.vehiculo_id = v.id_vehiculo
+                AND r.estado_reserva_id IN (1, 2)
+                AND r.fecha_alquiler >= date('now')
+            ) THEN 'reservado'
+            ELSE 'disponible'
+        END AS estado_actual
+    FROM vehiculos v
+"""
+
+# Columnas DATE que se guardan en formato canónico: (tabla, columna)
+COLUMNAS_FECHA = [
+    ("alquileres", "fecha_inicio"),
+    ("alquileres", "fecha_prevista"),
+    ("alquileres", "fecha_entrega"),
+    ("reservas", "fecha_reserva"),
+    ("reservas", "fecha_alquiler"),
+    ("mantenimientos", "fecha_programada"),
+    ("mantenimientos", "fecha_realizada"),
+    ("vehiculos", "seguro_venc"),
+    ("vehiculos", "vtv_venc"),
+    ("vehiculos", "fecha_ultimo_service"),
+    ("clientes", "licencia_venc"),
+]
+
+# Columnas donde '' quería decir "todavía no" y pasa a NULL: una fecha_entrega vacía es
+# un alquiler sin devolver. El resto conserva ''; en mantenimientos.fecha_realizada un ''
+# no bloquea el vehículo y un NULL sí (vehiculo_en_mantenimiento, vehiculo_estado_calculado)
+COLUMNAS_VACIA_ES_NULL = [
+    ("alquileres", "fecha_entrega"),
+]
+
+
+def _normalizar_fechas() -> list[str]:
+    """Sentencias que dejan cada columna DATE como 'YYYY-MM-DD', NULL o ''."""
+    sentencias = [
+        f"UPDATE {tabla} SET {columna} = NULL WHERE {columna} = ''"
+        for tabla, columna in COLUMNAS_VACIA_ES_NULL
+    ]
+    for tabla, columna in COLUMNAS_FECHA:
+        sentencias.append(
+            f"UPDATE {tabla} SET {columna} = date({columna}) "
+            f"WHERE date({columna}) IS NOT NULL AND {columna} IS NOT date({columna})"
+        )
+    return sentencias
+
+
+RECALCULAR_ESTADO = (
+    "INSERT OR REPLACE INTO vehiculo_estado_actual (vehiculo_id, estado_actual, calculado_para) "
+    "SELECT vehiculo_id, estado_actual, date('now') FROM vehiculo_estado_calculado"
+)
+
+
+def _triggers_estado_vehiculo() -> list[str]:
+    """Triggers que recalculan el estado del vehículo afectado en cada escritura."""
+    sentencias = []
+    for tabla in ("alquileres", "reservas", "mantenimientos"):
+        for evento, vehiculos in (("INSERT", "NEW.vehiculo_id"),
+                                  ("UPDATE", "OLD.vehiculo_id, NEW.vehiculo_id"),
+                                  ("DELETE", "OLD.vehiculo_id")):
+            sentencias.append(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{tabla}_{evento.lower()}_estado_vehiculo "
+                f"AFTER {evento} ON {tabla} BEGIN "
+                f"{RECALCULAR_ESTADO} WHERE vehiculo_id IN ({vehiculos}); END"
+            )
+    sentencias.append(
+        "CREATE TRIGGER IF NOT EXISTS trg_vehiculos_insert_estado_vehiculo AFTER INSERT ON vehiculos BEGIN "
+        f"{RECALCULAR_ESTADO} WHERE vehiculo_id = NEW.id_vehiculo; END"
+    )
+    sentencias.append(
+        "CREATE TRIGGER IF NOT EXISTS trg_vehiculos_delete_estado_vehiculo AFTER DELETE ON vehiculos BEGIN "
+        "DELETE FROM vehiculo_estado_actual WHERE vehiculo_id = OLD.id_vehiculo; END"
+    )
+    return sentencias
+
+
+def recalcular_ingresos_sql(condicion: str = "") -> str:
+    """
+    INSERT que agrega los alquileres entregados en ingresos_mensuales_rollup.
+
+    Misma cuenta que el reporte de ingresos mensuales: días entre fecha_inicio y
+    fecha_entrega por la tarifa del vehículo. `condicion` restringe los alquileres
+    (debe empezar con AND).
+    """
+    return (
+        "INSERT INTO ingresos_mensuales_rollup (anio, mes, vehiculo_id, total_ingresos, cantidad_alquileres) "
+        "SELECT strftime('%Y', a.fecha_entrega), strftime('%m', a.fecha_entrega), a.vehiculo_id, "
+        "SUM((julianday(a.fecha_entrega) - julianday(a.fecha_inicio)) * v.tarifa_base_dia), COUNT(a.id_alquiler) "
+        "FROM alquileres a JOIN vehiculos v ON a.vehiculo_id = v.id_vehiculo "
+        f"WHERE strftime('%Y-%m', a.fecha_entrega) IS NOT NULL {condicion} "
+        "GROUP BY 1, 2, 3"
+    )
+
+
+def _recalcular_mes(vehiculo: str, fecha: str) -> str:
+    """Cuerpo de trigger que recalcula la fila (año, mes, vehículo) de una fecha de entrega."""
+    return (
+        f"DELETE FROM ingresos_mensuales_rollup WHERE vehiculo_id = {vehiculo} "
+        f"AND anio = strftime('%Y', {fecha}) AND mes = strftime('%m', {fecha}); "
+        + recalcular_ingresos_sql(
+            f"AND a.vehiculo_id = {vehiculo} AND strftime('%Y-%m', a.fecha_entrega) = strftime('%Y-%m', {fecha})"
+        ) + "; "
+    )
+
+
+def _triggers_ingresos_mensuales() -> list[str]:
+    """Triggers que mantienen ingresos_mensuales_rollup al escribir alquileres o cambiar tarifas."""
+    return [
+        "CREATE TRIGGER IF NOT EXISTS trg_alquileres_insert_ingresos AFTER INSERT ON alquileres "
+        "WHEN NEW.fecha_entrega IS NOT NULL BEGIN "
+        + _recalcular_mes("NEW.vehiculo_id", "NEW.fecha_entrega") + "END",
+        "CREATE TRIGGER IF NOT EXISTS trg_alquileres_update_ingresos AFTER UPDATE ON alquileres "
+        "WHEN OLD.fecha_entrega IS NOT NEW.fecha_entrega OR OLD.fecha_inicio IS NOT NEW.fecha_inicio "
+        "OR OLD.vehiculo_id IS NOT NEW.vehiculo_id BEGIN "
+        + _recalcular_mes("OLD.vehiculo_id", "OLD.fecha_entrega")
+        + _recalcular_mes("NEW.vehiculo_id", "NEW.fecha_entrega") + "END",
+        "CREATE TRIGGER IF NOT EXISTS trg_alquileres_delete_ingresos AFTER DELETE ON alquileres "
+        "WHEN OLD.fecha_entrega IS NOT NULL BEGIN "
+        + _recalcular_mes("OLD.vehiculo_id", "OLD.fecha_entrega") + "END",
+        # El reporte usa la tarifa vigente del vehículo: si cambia, se recalcula su historia
+        "CREATE TRIGGER IF NOT EXISTS trg_vehiculos_tarifa_ingresos AFTER UPDATE OF tarifa_base_dia ON vehiculos "
+        "WHEN OLD.tarifa_base_dia IS NOT NEW.tarifa_base_dia BEGIN "
+        "DELETE FROM ingresos_mensuales_rollup WHERE vehiculo_id = NEW.id_vehiculo; "
+        + recalcular_ingresos_sql("AND a.vehiculo_id = NEW.id_vehiculo") + "; END",
+    ]
+
+
+MIGRACIONES = [
+    (1, "indices_consultas_frecuentes", [
+        # verificar_disponibilidad de alquileres y reporte de vehículos más alquilados
+        "CREATE INDEX IF NOT EXISTS idx_alquileres_vehiculo_estado_inicio "
+        "ON alquileres (vehiculo_id, estado_alquiler_id, fecha_inicio)",
+        # Reporte de clientes top
+        "CREATE INDEX IF NOT EXISTS idx_alquileres_cliente ON alquileres (cliente_id)",
+        # obtener_con_filtros por estado y conteo de alquileres activos
+        "CREATE INDEX IF NOT EXISTS idx_alquileres_estado_inicio "
+        "ON alquileres (estado_alquiler_id, fecha_inicio)",
+        # ORDER BY de obtener_todos y filtros por rango de fechas
+        "CREATE INDEX IF NOT EXISTS idx_alquileres_inicio ON alquileres (fecha_inicio)",
+        # Reportes de ingresos
+        "CREATE INDEX IF NOT EXISTS idx_alquileres_entrega ON alquileres (fecha_entrega)",
+        # verificar_disponibilidad de reservas
+        "CREATE INDEX IF NOT EXISTS idx_reservas_vehiculo_estado_fecha "
+        "ON reservas (vehiculo_id, estado_reserva_id, fecha_alquiler)",
+        "CREATE INDEX IF NOT EXISTS idx_reservas_cliente ON reservas (cliente_id)",
+        # obtener_con_filtros por estado (ordenado por fecha_reserva) y conteo de reservas pendientes
+        "CREATE INDEX IF NOT EXISTS idx_reservas_estado_fecha "
+        "ON reservas (estado_reserva_id, fecha_reserva)",
+        # ORDER BY de obtener_todos
+        "CREATE INDEX IF NOT EXISTS idx_reservas_fecha_reserva ON reservas (fecha_reserva)",
+        # vehiculo_en_mantenimiento
+        "CREATE INDEX IF NOT EXISTS idx_mantenimientos_vehiculo_estado "
+        "ON mantenimientos (vehiculo_id, estado_mantenimiento)",
+        # Reporte de mantenimientos próximos
+        "CREATE INDEX IF NOT EXISTS idx_mantenimientos_estado_programada "
+        "ON mantenimientos (estado_mantenimiento, fecha_programada)",
+        "CREATE INDEX IF NOT EXISTS idx_pagos_alquiler ON pagos (alquiler_id)",
+        "CREATE INDEX IF NOT EXISTS idx_incidentes_alquiler ON incidentes (alquiler_id)",
+    ]),
+    (2, "estado_actual_vehiculos", [
+        # Estado materializado para /vehiculos/con-estado; lo mantienen los triggers
+        # y el barrido diario de app/repository/EstadoVehiculos.py
+        """
+        CREATE TABLE IF NOT EXISTS vehiculo_estado_actual (
+            vehiculo_id INTEGER PRIMARY KEY,
+            estado_actual TEXT NOT NULL,
+            calculado_para TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_vehiculo_estado_calculado ON vehiculo_estado_actual (calculado_para)",
+        VISTA_ESTADO_VEHICULO,
+        *_triggers_estado_vehiculo(),
+        RECALCULAR_ESTADO,
+    ]),
+    (3, "ingresos_mensuales_rollup", [
+        # Ingresos por (año, mes de entrega, vehículo) para los reportes de ingresos
+        """
+        CREATE TABLE IF NOT EXISTS ingresos_mensuales_rollup (
+            anio TEXT NOT NULL,
+            mes TEXT NOT NULL,
+            vehiculo_id INTEGER NOT NULL,
+            total_ingresos REAL,
+            cantidad_alquileres INTEGER NOT NULL,
+            PRIMARY KEY (anio, mes, vehiculo_id)
+        ) WITHOUT ROWID
+        """,
+        *_triggers_ingresos_mensuales(),
+        # Carga inicial con la historia existente
+        recalcular_ingresos_sql(),
+    ]),
+    (4, "fechas_iso", [
+        # Fechas en 'YYYY-MM-DD' y fecha_entrega '' -> NULL (ver COLUMNAS_VACIA_ES_NULL)
+        *_normalizar_fechas(),
+        # Filtros por rango de fecha_alquiler en obtener_con_filtros de reservas
+        "CREATE INDEX IF NOT EXISTS idx_reservas_fecha_alquiler ON reservas (fecha_alquiler)",
+        "CREATE INDEX IF NOT EXISTS idx_reservas_estado_alquiler ON reservas (estado_reserva_id, fecha_alquiler)",
+        # Estado de vehículos sin date() sobre las columnas
+        "DROP VIEW IF EXISTS vehiculo_estado_calculado",
+        VISTA_ESTADO_VEHICULO_ISO,
+        RECALCULAR_ESTADO,
+    ]),
+    (5, "version_registros", [
+        # Control de concurrencia optimista (app/repository/Versionado.py)
+        *[f"ALTER TABLE {tabla} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+          for tabla in ("alquileres", "reservas", "vehiculos", "mantenimientos")],
+    ]),
+]
+
+
+def _crear_tabla_migraciones(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+def version_actual(conn: sqlite3.Connection) -> int:
+    """Devuelve la última versión de esquema aplicada (0 si no hay ninguna)."""
+    _crear_tabla_migraciones(conn)
+    fila = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return fila[0] or 0
+
+
+def aplicar_migraciones(conn: sqlite3.Connection) -> list[int]:
+    """
+    Aplica en orden las migraciones pendientes, cada una en su propia transacción.
+
+    Args:
+        conn: Conexión a la base de datos a migrar
+
+    Returns:
+        Lista con las versiones aplicadas en esta llamada
+    """
+    actual = version_actual(conn)
+    aplicadas = []
+
+    for version, nombre, sentencias in MIGRACIONES:
+        if version <= actual:
+            continue
+        try:
+            conn.execute("BEGIN")
+            for sentencia in sentencias:
+                conn.execute(sentencia)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, nombre) VALUES (?, ?)",
+                (version, nombre)
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        aplicadas.append(version)
+
+    return aplicadas
+
+
+if __name__ == "__main__":
+    db_path = os.path.join(os.path.dirname(__file__), "database.db")
+    conn = sqlite3.connect(db_path)
+    try:
+        aplicadas = aplicar_migraciones(conn)
+        if aplicadas:
+            print(f"Migraciones aplicadas: {aplicadas}")
+        else:
+            print("El esquema ya está actualizado")
+        print(f"Versión actual: {version_actual(conn)}")
+    except sqlite3.Error as e:
+        print(f"Error al aplicar migraciones: {e}")
+    finally:
+        conn.close()
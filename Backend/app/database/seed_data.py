@@ -2,11 +2,9 @@ import sqlite3
 import os
 from datetime import datetime, timedelta
 
-try:
-    db_path = os.path.join(os.path.dirname(__file__), "database.db")
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
 
+def insertar_catalogos(cursor):
+    """Estados, tipos de incidente y empleados de ejemplo (también los usa generar_datos.py)."""
     # Insertar estados de alquiler
     cursor.executemany("""
         INSERT OR IGNORE INTO estados_alquiler (codigo) VALUES (?)
@@ -68,6 +66,9 @@ try:
         ('Carlos', 'Rodríguez', '11223344', 'carlos.rodriguez@empresa.com', '1133445566', 1)
     ])
 
+
+def insertar_ejemplos(cursor) -> int:
+    """Clientes y vehículos de ejemplo. Devuelve la cantidad de vehículos."""
     # Insertar clientes de ejemplo
     cursor.executemany("""
         INSERT OR IGNORE INTO clientes (dni, nombre, apellido, email, telefono, direccion, licencia_num, licencia_venc, habilitado)
@@ -99,17 +100,29 @@ try:
          km_service_cada, km_ultimo_service, fecha_ultimo_service, habilitado)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, vehiculos_ejemplo)
+    return len(vehiculos_ejemplo)
+
+
+if __name__ == "__main__":
+    conn = None
+    try:
+        db_path = os.path.join(os.path.dirname(__file__), "database.db")
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        insertar_catalogos(cursor)
+        cantidad_vehiculos = insertar_ejemplos(cursor)
 
-    conn.commit()
-    print(f"Datos de ejemplo insertados correctamente")
-    print(f"  - {len(vehiculos_ejemplo)} vehiculos")
-    print(f"  - 3 empleados")
-    print(f"  - 3 clientes")
-    print(f"  - Estados y tipos de incidente inicializados")
+        conn.commit()
+        print(f"Datos de ejemplo insertados correctamente")
+        print(f"  - {cantidad_vehiculos} vehiculos")
+        print(f"  - 3 empleados")
+        print(f"  - 3 clientes")
+        print(f"  - Estados y tipos de incidente inicializados")
 
-except sqlite3.Error as e:
-    print(f"Error al insertar datos: {e}")
+    except sqlite3.Error as e:
+        print(f"Error al insertar datos: {e}")
 
-finally:
-    if conn:
-        conn.close()
+    finally:
+        if conn:
+            conn.close()
@@ -1,5 +1,23 @@
 class Alquiler: #Posible mejora: Crear una clase Abstracta para manejar los create y actualizado.
-    def __init__(self, cliente, vehiculo, empleado, estado_alquiler, creado_en, reserva=None, fecha_inicio=None, fecha_prevista=None, fecha_entrega=None, km_salida=0, km_entrada=None, observaciones=None, actualizado_en=None, id_alquiler=None):
+    __slots__ = (
+        "id_alquiler",
+        "cliente",
+        "vehiculo",
+        "empleado",
+        "reserva",
+        "estado_alquiler",
+        "fecha_inicio",
+        "fecha_prevista",
+        "fecha_entrega",
+        "km_salida",
+        "km_entrada",
+        "observaciones",
+        "creado_en",
+        "actualizado_en",
+        "version",
+    )
+
+    def __init__(self, cliente, vehiculo, empleado, estado_alquiler, creado_en, reserva=None, fecha_inicio=None, fecha_prevista=None, fecha_entrega=None, km_salida=0, km_entrada=None, observaciones=None, actualizado_en=None, id_alquiler=None, version=None):
         self.id_alquiler = id_alquiler
         self.cliente = cliente
         self.vehiculo = vehiculo
@@ -14,6 +32,7 @@ class Alquiler: #Posible mejora: Crear una clase Abstracta para manejar los crea
         self.observaciones = observaciones
         self.creado_en = creado_en
         self.actualizado_en = actualizado_en
+        self.version = version
 
     def to_dict(self):
         return {
@@ -31,6 +50,7 @@ class Alquiler: #Posible mejora: Crear una clase Abstracta para manejar los crea
             "observaciones": self.observaciones,
             "creado_en": self.creado_en,
             "actualizado_en": self.actualizado_en,
+            "version": self.version,
         }
 
     @classmethod
@@ -50,4 +70,5 @@ class Alquiler: #Posible mejora: Crear una clase Abstracta para manejar los crea
             creado_en=data.get("creado_en"),
             actualizado_en=data.get("actualizado_en"),
             id_alquiler=data.get("id_alquiler"),
+            version=data.get("version"),
         )
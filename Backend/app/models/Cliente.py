@@ -1,4 +1,17 @@
 class Cliente:
+    __slots__ = (
+        "id_cliente",
+        "dni",
+        "nombre",
+        "apellido",
+        "email",
+        "telefono",
+        "direccion",
+        "licencia_num",
+        "licencia_venc",
+        "habilitado",
+    )
+
     def __init__(self, dni, nombre, apellido, email, telefono, direccion, licencia_num, licencia_venc=None, habilitado=True, id_cliente=None):
         self.id_cliente = id_cliente
         self.dni = dni
@@ -1,4 +1,15 @@
 class Incidente:
+    __slots__ = (
+        "id_incidente",
+        "alquiler",
+        "empleado",
+        "tipo_incidente",
+        "estado_incidente",
+        "fecha",
+        "descripcion",
+        "costo",
+    )
+
     def __init__( self, alquiler, empleado, tipo_incidente, estado_incidente, fecha, descripcion, costo=0, id_incidente=None):
         self.id_incidente = id_incidente
         self.alquiler = alquiler
@@ -1,5 +1,18 @@
 class Mantenimiento:
-    def __init__(self, vehiculo, empleado, estado_mantenimiento, fecha_programada, fecha_realizada=None, km=0, costo=0, observacion=None, id_mantenimiento=None):
+    __slots__ = (
+        "id_mantenimiento",
+        "vehiculo",
+        "empleado",
+        "estado_mantenimiento",
+        "fecha_programada",
+        "fecha_realizada",
+        "km",
+        "costo",
+        "observacion",
+        "version",
+    )
+
+    def __init__(self, vehiculo, empleado, estado_mantenimiento, fecha_programada, fecha_realizada=None, km=0, costo=0, observacion=None, id_mantenimiento=None, version=None):
         self.id_mantenimiento = id_mantenimiento
         self.vehiculo = vehiculo
         self.empleado = empleado
@@ -9,6 +22,7 @@ class Mantenimiento:
         self.km = km
         self.costo = costo
         self.observacion = observacion
+        self.version = version
 
     def to_dict(self):
         return {
@@ -21,6 +35,7 @@ class Mantenimiento:
             "km": self.km,
             "costo": self.costo,
             "observacion": self.observacion,
+            "version": self.version,
         }
 
     @classmethod
@@ -34,5 +49,6 @@ class Mantenimiento:
             km=data.get("km", 0),
             costo=data.get("costo", 0),
             observacion=data.get("observacion"),
-            id_mantenimiento=data.get("id_mantenimiento")
+            id_mantenimiento=data.get("id_mantenimiento"),
+            version=data.get("version")
         )
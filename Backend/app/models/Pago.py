@@ -1,4 +1,15 @@
 class Pago:
+    __slots__ = (
+        "id_pago",
+        "alquiler",
+        "empleado",
+        "metodo",
+        "fecha",
+        "monto",
+        "descripcion",
+        "actualizado_en",
+    )
+
     def __init__( self, alquiler, empleado, metodo, fecha, monto, descripcion=None, actualizado_en=None, id_pago=None ):
         self.id_pago = id_pago
         self.alquiler = alquiler
@@ -1,5 +1,18 @@
 class Reserva:
-    def __init__(self, cliente, vehiculo, empleado, estado_reserva, fecha_reserva, fecha_alquiler, senia_monto=0, actualizado_en=None, id_reserva=None):
+    __slots__ = (
+        "id_reserva",
+        "cliente_id",
+        "vehiculo_id",
+        "empleado_id",
+        "estado_reserva_id",
+        "fecha_reserva",
+        "fecha_alquiler",
+        "senia_monto",
+        "actualizado_en",
+        "version",
+    )
+
+    def __init__(self, cliente, vehiculo, empleado, estado_reserva, fecha_reserva, fecha_alquiler, senia_monto=0, actualizado_en=None, id_reserva=None, version=None):
         self.id_reserva = id_reserva
         self.cliente_id = cliente
         self.vehiculo_id = vehiculo
@@ -9,6 +22,7 @@ class Reserva:
         self.fecha_alquiler = fecha_alquiler
         self.senia_monto = senia_monto
         self.actualizado_en = actualizado_en
+        self.version = version
 
     def to_dict(self):
         return {
@@ -21,6 +35,7 @@ class Reserva:
             "fecha_alquiler": self.fecha_alquiler,
             "senia_monto": self.senia_monto,
             "actualizado_en": self.actualizado_en,
+            "version": self.version,
         }
     
     @classmethod
@@ -34,5 +49,6 @@ class Reserva:
             fecha_alquiler=data.get("fecha_alquiler"),
             senia_monto=data.get("senia_monto", 0),
             actualizado_en=data.get("actualizado_en"),
-            id_reserva=data.get("id_reserva")
+            id_reserva=data.get("id_reserva"),
+            version=data.get("version")
         )
@@ -1,5 +1,24 @@
 class Vehiculo:
-    def __init__(self, patente, marca, modelo, anio, tarifa_base_dia, km_actual=0, habilitado=True, id_vehiculo=None, seguro_venc=None, vtv_venc=None, km_service_cada=None, km_ultimo_service=None, fecha_ultimo_service=None, foto_url=None):
+    # Sin __dict__ por instancia (ver app/repository/MapeadorFilas.py)
+    __slots__ = (
+        "id_vehiculo",
+        "patente",
+        "marca",
+        "modelo",
+        "anio",
+        "tarifa_base_dia",
+        "km_actual",
+        "habilitado",
+        "seguro_venc",
+        "vtv_venc",
+        "km_service_cada",
+        "km_ultimo_service",
+        "fecha_ultimo_service",
+        "foto_url",
+        "version",
+    )
+
+    def __init__(self, patente, marca, modelo, anio, tarifa_base_dia, km_actual=0, habilitado=True, id_vehiculo=None, seguro_venc=None, vtv_venc=None, km_service_cada=None, km_ultimo_service=None, fecha_ultimo_service=None, foto_url=None, version=None):
         self.id_vehiculo = id_vehiculo
         self.patente = patente
         self.marca = marca
@@ -14,6 +33,7 @@ class Vehiculo:
         self.km_ultimo_service = km_ultimo_service #Calcular con el km_actual al momento de hacer el service (Mantenimiento).
         self.fecha_ultimo_service = fecha_ultimo_service #Opcional
         self.foto_url = foto_url #Opcional
+        self.version = version #Control de concurrencia optimista
 
     def to_dict(self):
         return {
@@ -30,5 +50,6 @@ class Vehiculo:
             "km_service_cada": self.km_service_cada,
             "km_ultimo_service": self.km_ultimo_service,
             "fecha_ultimo_service": self.fecha_ultimo_service,
-            "foto_url": self.foto_url
+            "foto_url": self.foto_url,
+            "version": self.version,
         }
\ No newline at end of file
@@ -5,7 +5,10 @@ Conceptos de POO aplicados:
 - Factory Pattern: Crea objetos sin exponer la lógica de creación
 - Encapsulamiento: La lógica de creación está centralizada
 - Polimorfismo: Retorna diferentes estrategias según el tipo
+- Flyweight: Las estrategias no tienen estado mutable, así que se comparte una
+  instancia por (tipo, parámetros) en lugar de crear una en cada llamada
 """
+import threading
 
 from app.models.strategies.TarifaStrategy import (
     TarifaStrategy,
@@ -21,55 +24,134 @@ class TarifaFactory:
     Factory para crear estrategias de tarifa.
 
     PATRÓN FACTORY: Centraliza la creación de objetos de estrategias.
+    PATRÓN FLYWEIGHT: Cachea una instancia inmutable por (tipo, parámetros).
+
+    Los tipos se registran con registrar(), así otros módulos pueden agregar
+    estrategias propias sin tocar esta clase.
     """
 
-    @staticmethod
-    def crear_estrategia(tipo_tarifa: str, **kwargs) -> TarifaStrategy:
+    # tipo -> (clase, parámetros aceptados con su valor por defecto)
+    _registro: dict[str, tuple[type, dict]] = {}
+    # (tipo, valores de los parámetros) -> instancia compartida
+    _instancias: dict[tuple, TarifaStrategy] = {}
+    # tipo -> instancia con los parámetros por defecto (lookup de obtener())
+    _por_defecto: dict[str, TarifaStrategy] = {}
+    _lock = threading.Lock()
+    # Los parámetros pueden venir de un pedido (costo_por_km); pasado este límite
+    # las combinaciones nuevas se crean sin cachear para no crecer sin cota
+    MAXIMO_INSTANCIAS = 256
+
+    @classmethod
+    def registrar(cls, tipo_tarifa: str, clase: type, **parametros_por_defecto):
+        """
+        Registra (o reemplaza) un tipo de estrategia.
+
+        La clase debe heredar de TarifaStrategy e implementar monto_por_dias(), y no
+        modificar su estado después de construida: la misma instancia se comparte
+        entre todos los pedidos.
+
+        Args:
+            tipo_tarifa: Nombre del tipo (se guarda en minúsculas)
+            clase: Subclase de TarifaStrategy
+            **parametros_por_defecto: Parámetros que acepta el constructor y su valor por defecto
+
+        Raises:
+            TypeError: Si la clase no hereda de TarifaStrategy
+        """
+        if not (isinstance(clase, type) and issubclass(clase, TarifaStrategy)):
+            raise TypeError(f"{clase!r} no es una subclase de TarifaStrategy")
+        tipo_tarifa = tipo_tarifa.lower()
+        with cls._lock:
+            cls._registro[tipo_tarifa] = (clase, dict(parametros_por_defecto))
+            cls._instancias = {k: v for k, v in cls._instancias.items() if k[0] != tipo_tarifa}
+            cls._por_defecto[tipo_tarifa] = cls._instancia(tipo_tarifa, tuple(parametros_por_defecto.values()))
+
+    @classmethod
+    def _instancia(cls, tipo_tarifa: str, valores: tuple) -> TarifaStrategy:
+        clave = (tipo_tarifa, valores)
+        estrategia = cls._instancias.get(clave)
+        if estrategia is None:
+            clase, parametros = cls._registro[tipo_tarifa]
+            estrategia = clase(**dict(zip(parametros, valores)))
+            if len(cls._instancias) < cls.MAXIMO_INSTANCIAS:
+                cls._instancias[clave] = estrategia
+        return estrategia
+
+    @classmethod
+    def crear_estrategia(cls, tipo_tarifa: str, **kwargs) -> TarifaStrategy:
         """
-        Crea una estrategia de tarifa según el tipo especificado.
+        Devuelve la estrategia de tarifa del tipo especificado.
 
         FACTORY METHOD: Crea diferentes objetos según el parámetro.
         POLIMORFISMO: Todas las estrategias cumplen la misma interfaz.
 
+        La instancia se crea la primera vez y después se reutiliza. Los kwargs
+        que el tipo no acepta se ignoran.
+
         Args:
-            tipo_tarifa: Tipo de estrategia ('simple', 'semanal', 'kilometraje', 'premium')
+            tipo_tarifa: Tipo de estrategia ('simple', 'semanal', 'kilometraje', 'premium' o uno registrado)
             **kwargs: Parámetros adicionales para la estrategia
 
         Returns:
-            Instancia de TarifaStrategy
+            Instancia de TarifaStrategy (compartida, no modificar)
 
         Raises:
             ValueError: Si el tipo de tarifa no es válido
         """
-        tipo_tarifa = tipo_tarifa.lower()
-
-        if tipo_tarifa == 'simple':
-            return TarifaSimple()
-
-        elif tipo_tarifa == 'semanal':
-            return TarifaConDescuentoSemanal()
-
-        elif tipo_tarifa == 'kilometraje':
-            costo_km = kwargs.get('costo_por_km', 50.0)
-            return TarifaPorKilometraje(costo_por_km=costo_km)
+        if not kwargs:
+            estrategia = cls._por_defecto.get(tipo_tarifa)
+            if estrategia is not None:
+                return estrategia
+
+        registro = cls._registro.get(tipo_tarifa)
+        if registro is None:
+            tipo_tarifa = tipo_tarifa.lower()
+            registro = cls._registro.get(tipo_tarifa)
+            if registro is None:
+                raise ValueError(f"Tipo de tarifa '{tipo_tarifa}' no válido. "
+                                 f"Opciones: {', '.join(cls._registro)}")
+
+        parametros = registro[1]
+        if not parametros:
+            return cls._por_defecto[tipo_tarifa]
+        valores = tuple(map(kwargs.get, parametros, parametros.values()))
+        estrategia = cls._instancias.get((tipo_tarifa, valores))
+        if estrategia is None:
+            with cls._lock:
+                estrategia = cls._instancia(tipo_tarifa, valores)
+        return estrategia
+
+    @classmethod
+    def obtener(cls, tipo_tarifa: str) -> TarifaStrategy:
+        """
+        Lookup de la estrategia con parámetros por defecto, sin crear objetos.
 
-        elif tipo_tarifa == 'premium':
-            costo_km = kwargs.get('costo_por_km', 30.0)
-            return TarifaPremium(costo_por_km=costo_km)
+        Pensado para el camino caliente de cotización: con el tipo ya en
+        minúsculas es una sola búsqueda en un diccionario.
 
-        else:
-            raise ValueError(f"Tipo de tarifa '{tipo_tarifa}' no válido. "
-                           f"Opciones: simple, semanal, kilometraje, premium")
+        Raises:
+            ValueError: Si el tipo de tarifa no es válido
+        """
+        try:
+            return cls._por_defecto[tipo_tarifa]
+        except KeyError:
+            return cls.crear_estrategia(tipo_tarifa)
 
-    @staticmethod
-    def tipos_disponibles() -> list:
+    @classmethod
+    def tipos_disponibles(cls) -> list:
         """
         Retorna los tipos de tarifa disponibles.
 
         Returns:
             Lista con los nombres de estrategias disponibles
         """
-        return ['simple', 'semanal', 'kilometraje', 'premium']
+        return list(cls._registro)
+
+
+TarifaFactory.registrar('simple', TarifaSimple)
+TarifaFactory.registrar('semanal', TarifaConDescuentoSemanal)
+TarifaFactory.registrar('kilometraje', TarifaPorKilometraje, costo_por_km=50.0)
+TarifaFactory.registrar('premium', TarifaPremium, costo_por_km=30.0)
 
 
 class RepositoryFactory:
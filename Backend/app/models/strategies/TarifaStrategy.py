@@ -3,13 +3,49 @@ Módulo que implementa el patrón Strategy para cálculo de tarifas.
 
 Conceptos de POO aplicados:
 - Strategy Pattern: Diferentes estrategias de cálculo
-- Polimorfismo: Cada estrategia implementa calcular() de manera diferente
+- Polimorfismo: Cada estrategia implementa monto_por_dias() de manera diferente
 - Abstracción: Clase abstracta TarifaStrategy
 - Composición: Las estrategias se componen con el servicio de alquiler
+
+Cálculo por lotes: calcular_lote() cotiza muchos pares (vehículo, período) en una
+sola llamada. Cada estrategia define su cuenta una sola vez en monto_por_dias(),
+que usan tanto calcular() como calcular_lote() (los dos definidos en TarifaStrategy),
+así ambos caminos dan exactamente el mismo resultado. El lote calcula los días de
+cada período distinto una sola vez y evita el despacho por elemento.
 """
 
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
+
+
+def dias_de_alquiler(fecha_inicio, fecha_fin) -> int:
+    """Días entre dos fechas; un alquiler en el mismo día cuenta como 1."""
+    dias = (fecha_fin - fecha_inicio).days
+    if dias == 0:
+        dias = 1  # Mínimo 1 día
+    return dias
+
+
+def _a_fecha(valor) -> datetime:
+    """
+    Acepta date/datetime o texto ISO ('YYYY-MM-DD' o con hora) y devuelve siempre un
+    datetime (un date es ese día a las 00:00), así inicio y fin se pueden restar
+    aunque lleguen en formatos distintos.
+    """
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, date):
+        return datetime.combine(valor, time.min)
+    return datetime.fromisoformat(valor)
+
+
+def _columna(valor, cantidad: int) -> list:
+    """Repite un escalar `cantidad` veces o valida el largo de una secuencia."""
+    if isinstance(valor, (list, tuple)):
+        if len(valor) != cantidad:
+            raise ValueError(f"Se esperaban {cantidad} valores y se recibieron {len(valor)}")
+        return list(valor)
+    return [valor] * cantidad
 
 
 class TarifaStrategy(ABC):
@@ -17,12 +53,12 @@ class TarifaStrategy(ABC):
     Clase abstracta que define la interfaz para estrategias de cálculo de tarifa.
 
     PATRÓN STRATEGY: Define una familia de algoritmos intercambiables.
+    Las subclases solo implementan monto_por_dias().
     """
 
-    @abstractmethod
     def calcular(self, tarifa_base: float, fecha_inicio: datetime, fecha_fin: datetime, km_recorridos: int = 0) -> float:
         """
-        Calcula el monto total del alquiler.
+        Calcula el monto total del alquiler (cuenta los días y delega en monto_por_dias).
 
         Args:
             tarifa_base: Tarifa base por día del vehículo
@@ -30,24 +66,78 @@ class TarifaStrategy(ABC):
             fecha_fin: Fecha de fin del alquiler
             km_recorridos: Kilómetros recorridos (opcional)
 
+        Returns:
+            Monto total calculado
+        """
+        return self.monto_por_dias(tarifa_base, dias_de_alquiler(fecha_inicio, fecha_fin), km_recorridos)
+
+    @abstractmethod
+    def monto_por_dias(self, tarifa_base: float, dias: int, km_recorridos: int = 0) -> float:
+        """
+        Cuenta de la estrategia a partir de la cantidad de días ya calculada.
+
+        La usan calcular() y calcular_lote(), así los dos caminos dan el mismo monto.
+
+        Args:
+            tarifa_base: Tarifa base por día del vehículo
+            dias: Días de alquiler (ver dias_de_alquiler)
+            km_recorridos: Kilómetros recorridos (opcional)
+
         Returns:
             Monto total calculado
         """
         pass
 
+    def calcular_lote(self, tarifas_base, fechas_inicio, fechas_fin, km_recorridos=0) -> list[float]:
+        """
+        Calcula el monto de muchos pares (vehículo, período) en una sola llamada.
+
+        Cada argumento puede ser una lista (un valor por par) o un escalar que se
+        repite para todos los pares. Las fechas pueden ser date/datetime o texto ISO.
+
+        Args:
+            tarifas_base: Tarifas base por día
+            fechas_inicio: Fechas de inicio
+            fechas_fin: Fechas de fin
+            km_recorridos: Kilómetros recorridos
+
+        Returns:
+            Lista de montos, en el mismo orden, iguales a los de calcular()
+
+        Raises:
+            ValueError: Si las listas tienen largos distintos
+        """
+        largos = [len(v) for v in (tarifas_base, fechas_inicio, fechas_fin, km_recorridos)
+                  if isinstance(v, (list, tuple))]
+        cantidad = max(largos) if largos else 1
+
+        tarifas = _columna(tarifas_base, cantidad)
+        inicios = _columna(fechas_inicio, cantidad)
+        fines = _columna(fechas_fin, cantidad)
+        kms = _columna(km_recorridos, cantidad)
+
+        # Una cotización de flota repite pocos períodos: los días se calculan una vez por período
+        dias_por_periodo = {}
+        dias = []
+        for inicio, fin in zip(inicios, fines):
+            periodo = (inicio, fin)
+            if periodo not in dias_por_periodo:
+                dias_por_periodo[periodo] = dias_de_alquiler(_a_fecha(inicio), _a_fecha(fin))
+            dias.append(dias_por_periodo[periodo])
+
+        monto = self.monto_por_dias
+        return [monto(tarifa, d, km) for tarifa, d, km in zip(tarifas, dias, kms)]
+
 
 class TarifaSimple(TarifaStrategy):
     """
     Estrategia de tarifa simple: tarifa_base * días.
 
-    POLIMORFISMO: Implementación específica del método calcular()
+    POLIMORFISMO: Implementación específica del método monto_por_dias()
     """
 
-    def calcular(self, tarifa_base: float, fecha_inicio: datetime, fecha_fin: datetime, km_recorridos: int = 0) -> float:
+    def monto_por_dias(self, tarifa_base: float, dias: int, km_recorridos: int = 0) -> float:
         """Calcula tarifa multiplicando tarifa base por días."""
-        dias = (fecha_fin - fecha_inicio).days
-        if dias == 0:
-            dias = 1  # Mínimo 1 día
         return tarifa_base * dias
 
 
@@ -58,12 +148,8 @@ class TarifaConDescuentoSemanal(TarifaStrategy):
     POLIMORFISMO: Implementación diferente del mismo método.
     """
 
-    def calcular(self, tarifa_base: float, fecha_inicio: datetime, fecha_fin: datetime, km_recorridos: int = 0) -> float:
+    def monto_por_dias(self, tarifa_base: float, dias: int, km_recorridos: int = 0) -> float:
         """Calcula tarifa con descuento semanal."""
-        dias = (fecha_fin - fecha_inicio).days
-        if dias == 0:
-            dias = 1
-
         monto = tarifa_base * dias
 
         # Descuento del 10% para alquileres de 7 días o más
@@ -77,7 +163,7 @@ class TarifaPorKilometraje(TarifaStrategy):
     """
     Estrategia que incluye costo por kilómetro recorrido.
 
-    POLIMORFISMO: Otra implementación del método calcular()
+    POLIMORFISMO: Otra implementación del método monto_por_dias()
     """
 
     def __init__(self, costo_por_km: float = 50.0):
@@ -87,14 +173,15 @@ class TarifaPorKilometraje(TarifaStrategy):
         Args:
             costo_por_km: Costo adicional por kilómetro recorrido
         """
-        self.costo_por_km = costo_por_km
+        self._costo_por_km = costo_por_km
 
-    def calcular(self, tarifa_base: float, fecha_inicio: datetime, fecha_fin: datetime, km_recorridos: int = 0) -> float:
-        """Calcula tarifa incluyendo kilometraje."""
-        dias = (fecha_fin - fecha_inicio).days
-        if dias == 0:
-            dias = 1
+    @property
+    def costo_por_km(self) -> float:
+        # Solo lectura: TarifaFactory comparte una misma instancia entre todos los pedidos
+        return self._costo_por_km
 
+    def monto_por_dias(self, tarifa_base: float, dias: int, km_recorridos: int = 0) -> float:
+        """Calcula tarifa incluyendo kilometraje."""
         # Tarifa base por días
         monto_base = tarifa_base * dias
 
@@ -118,14 +205,15 @@ class TarifaPremium(TarifaStrategy):
         Args:
             costo_por_km: Costo por kilómetro (reducido para premium)
         """
-        self.costo_por_km = costo_por_km
+        self._costo_por_km = costo_por_km
 
-    def calcular(self, tarifa_base: float, fecha_inicio: datetime, fecha_fin: datetime, km_recorridos: int = 0) -> float:
-        """Calcula tarifa premium con todos los beneficios."""
-        dias = (fecha_fin - fecha_inicio).days
-        if dias == 0:
-            dias = 1
+    @property
+    def costo_por_km(self) -> float:
+        # Solo lectura: TarifaFactory comparte una misma instancia entre todos los pedidos
+        return self._costo_por_km
 
+    def monto_por_dias(self, tarifa_base: float, dias: int, km_recorridos: int = 0) -> float:
+        """Calcula tarifa premium con todos los beneficios."""
         # Tarifa base
         monto = tarifa_base * dias
 
@@ -182,3 +270,36 @@ class CalculadoraTarifa:
             Monto calculado por la estrategia
         """
         return self._estrategia.calcular(tarifa_base, fecha_inicio, fecha_fin, km_recorridos)
+
+    def calcular_montos_lote(self, tarifas_base, fechas_inicio, fechas_fin, km_recorridos=0) -> list[float]:
+        """
+        Calcula muchos montos en una sola llamada (ver TarifaStrategy.calcular_lote).
+
+        Returns:
+            Lista de montos en el orden de los pares recibidos
+        """
+        return self._estrategia.calcular_lote(tarifas_base, fechas_inicio, fechas_fin, km_recorridos)
+
+    def cotizar_grilla(self, tarifas_base: list, fecha_inicio, duraciones: list, km_recorridos: int = 0) -> list[list[float]]:
+        """
+        Cotiza cada tarifa para cada duración a partir de una misma fecha de inicio.
+
+        Args:
+            tarifas_base: Tarifa base de cada vehículo
+            fecha_inicio: Fecha de inicio común (date/datetime o texto ISO)
+            duraciones: Duraciones en días (por ejemplo [1, 3, 7, 14])
+            km_recorridos: Kilómetros estimados
+
+        Returns:
+            Una fila por tarifa con el monto para cada duración
+        """
+        inicio = _a_fecha(fecha_inicio)
+        fines = [inicio + timedelta(days=d) for d in duraciones]
+        montos = self.calcular_montos_lote(
+            [t for t in tarifas_base for _ in fines],
+            inicio,
+            [fin for _ in tarifas_base for fin in fines],
+            km_recorridos
+        )
+        columnas = len(fines)
+        return [montos[i:i + columnas] for i in range(0, len(montos), columnas)]
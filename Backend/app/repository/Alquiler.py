@@ -1,12 +1,72 @@
-from app.database.database import get_connection
+from app.database.database import al_confirmar, get_connection
 from app.models.Alquiler import Alquiler
+from app.repository.IndiceDisponibilidad import indice_disponibilidad
+from app.repository.Paginacion import codificar_cursor, decodificar_cursor, recorrer_por_paginas, validar_limite
+from app.repository.MapeadorFilas import ProyeccionListado, SeleccionCompilada
+from app.repository.CacheReportes import versiones_tablas
+from app.repository.Fechas import normalizar_fecha
+from app.repository.Versionado import ConflictoDeVersion, version_actualizada
+
+# Campos disponibles en los listados: campo -> (expresión SQL, alias del JOIN que necesita)
+COLUMNAS_ALQUILER = {
+    "id_alquiler": ("a.id_alquiler", None),
+    "cliente_id": ("a.cliente_id", None),
+    "cliente_nombre_completo": (
+        "CASE WHEN c.nombre IS NOT NULL AND c.nombre != '' THEN c.nombre || ' ' || c.apellido ELSE 'N/A' END", "c"),
+    "cliente_dni": ("c.dni", "c"),
+    "vehiculo_id": ("a.vehiculo_id", None),
+    "vehiculo_descripcion": (
+        "CASE WHEN v.marca IS NOT NULL AND v.marca != '' "
+        "THEN v.marca || ' ' || v.modelo || ' - ' || v.patente ELSE 'N/A' END", "v"),
+    "empleado_id": ("a.empleado_id", None),
+    "estado_alquiler_id": ("a.estado_alquiler_id", None),
+    "estado_nombre": ("ea.codigo", "ea"),
+    "reserva_id": ("a.reserva_id", None),
+    "fecha_inicio": ("a.fecha_inicio", None),
+    "fecha_prevista": ("a.fecha_prevista", None),
+    "fecha_entrega": ("a.fecha_entrega", None),
+    "km_salida": ("a.km_salida", None),
+    "km_entrada": ("a.km_entrada", None),
+    "observaciones": ("a.observaciones", None),
+    "creado_en": ("a.creado_en", None),
+    "actualizado_en": ("a.actualizado_en", None),
+    "version": ("a.version", None),
+}
+
+JOINS_ALQUILER = {
+    "c": "LEFT JOIN clientes c ON a.cliente_id = c.id_cliente",
+    "v": "LEFT JOIN vehiculos v ON a.vehiculo_id = v.id_vehiculo",
+    "ea": "LEFT JOIN estados_alquiler ea ON a.estado_alquiler_id = ea.id_estado_alquiler",
+}
+
+PROYECCION_ALQUILER = ProyeccionListado(
+    "alquileres a", COLUMNAS_ALQUILER, JOINS_ALQUILER, orden=("a.fecha_inicio", "a.id_alquiler")
+)
 
 
 class AlquilerRepository:
-    def __init__(self, connection_factory=get_connection):
+    def __init__(self, connection_factory=get_connection, indice=indice_disponibilidad, consultar_indice: bool = True):
         self._connection_factory = connection_factory
+        self._indice = indice
+        # Dentro de una transacción de escritura la verificación va siempre a la base (ver UnidadDeTrabajo)
+        self._consultar_indice = consultar_indice
+
+    def _actualizar_indice(self, id_alquiler: int, data: dict):
+        if self._indice is not None:
+            indice = self._indice
+            al_confirmar(lambda: indice.registrar_alquiler(
+                id_alquiler, data["vehiculo_id"], data["estado_alquiler_id"],
+                data["fecha_inicio"], data["fecha_prevista"], data["fecha_entrega"]
+            ))
+
+    @staticmethod
+    def _normalizar_fechas(alquiler: Alquiler):
+        alquiler.fecha_inicio = normalizar_fecha(alquiler.fecha_inicio)
+        alquiler.fecha_prevista = normalizar_fecha(alquiler.fecha_prevista)
+        alquiler.fecha_entrega = normalizar_fecha(alquiler.fecha_entrega)
 
     def crear(self, alquiler: Alquiler) -> Alquiler:
+        self._normalizar_fechas(alquiler)
         data = alquiler.to_dict()
 
         query = """
@@ -48,57 +108,15 @@ class AlquilerRepository:
             cursor = conn.cursor()
             cursor.execute(query, valores)
             conn.commit()
+            versiones_tablas.incrementar("alquileres")
             alquiler.id_alquiler = cursor.lastrowid
+            alquiler.version = 1
+            self._actualizar_indice(alquiler.id_alquiler, data)
             return alquiler
 
     def obtener_todos(self) -> list[dict]:
         """Obtiene todos los alquileres con información completa de cliente y vehículo"""
-        query = """
-            SELECT
-                a.*,
-                c.nombre as cliente_nombre,
-                c.apellido as cliente_apellido,
-                c.dni as cliente_dni,
-                v.patente as vehiculo_patente,
-                v.marca as vehiculo_marca,
-                v.modelo as vehiculo_modelo,
-                ea.codigo as estado_nombre
-            FROM alquileres a
-            LEFT JOIN clientes c ON a.cliente_id = c.id_cliente
-            LEFT JOIN vehiculos v ON a.vehiculo_id = v.id_vehiculo
-            LEFT JOIN estados_alquiler ea ON a.estado_alquiler_id = ea.id_estado_alquiler
-            ORDER BY a.fecha_inicio DESC
-        """
-        with self._connection_factory() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            filas = cursor.fetchall()
-            alquileres = []
-
-            for fila in filas:
-                alquiler_dict = {
-                    "id_alquiler": fila["id_alquiler"],
-                    "cliente_id": fila["cliente_id"],
-                    "cliente_nombre_completo": f"{fila['cliente_nombre']} {fila['cliente_apellido']}" if fila['cliente_nombre'] else "N/A",
-                    "cliente_dni": fila["cliente_dni"],
-                    "vehiculo_id": fila["vehiculo_id"],
-                    "vehiculo_descripcion": f"{fila['vehiculo_marca']} {fila['vehiculo_modelo']} - {fila['vehiculo_patente']}" if fila['vehiculo_marca'] else "N/A",
-                    "empleado_id": fila["empleado_id"],
-                    "estado_alquiler_id": fila["estado_alquiler_id"],
-                    "estado_nombre": fila["estado_nombre"],
-                    "reserva_id": fila["reserva_id"],
-                    "fecha_inicio": fila["fecha_inicio"],
-                    "fecha_prevista": fila["fecha_prevista"],
-                    "fecha_entrega": fila["fecha_entrega"],
-                    "km_salida": fila["km_salida"],
-                    "km_entrada": fila["km_entrada"],
-                    "observaciones": fila["observaciones"],
-                    "creado_en": fila["creado_en"],
-                    "actualizado_en": fila["actualizado_en"]
-                }
-                alquileres.append(alquiler_dict)
-
-            return alquileres
+        return self.obtener_con_filtros()
 
     def obtener_por_id(self, id_alquiler: int):
         query = "SELECT * FROM alquileres WHERE id_alquiler = ?"
@@ -125,9 +143,17 @@ class AlquilerRepository:
                 observaciones=fila["observaciones"],
                 actualizado_en=fila["actualizado_en"],
                 id_alquiler=fila["id_alquiler"],
+                version=fila["version"],
             )
 
     def actualizar(self, id_alquiler: int, alquiler: Alquiler):
+        """
+        Actualiza un alquiler. Si alquiler.version no es None, solo si la fila sigue en esa versión.
+
+        Raises:
+            ConflictoDeVersion: Si el alquiler cambió o se eliminó desde esa versión
+        """
+        self._normalizar_fechas(alquiler)
         data = alquiler.to_dict()
         query = """
             UPDATE alquileres SET
@@ -141,8 +167,9 @@ class AlquilerRepository:
                 km_salida = ?,
                 km_entrada = ?,
                 observaciones = ?,
-                actualizado_en = CURRENT_TIMESTAMP
-            WHERE id_alquiler = ?
+                actualizado_en = CURRENT_TIMESTAMP,
+                version = version + 1
+            WHERE id_alquiler = ? AND (? IS NULL OR version = ?)
         """
         valores = (
             data["cliente_id"],
@@ -155,14 +182,21 @@ class AlquilerRepository:
             data["km_salida"],
             data["km_entrada"],
             data["observaciones"],
-            id_alquiler
+            id_alquiler,
+            alquiler.version,
+            alquiler.version,
         )
 
         with self._connection_factory() as conn:
             cursor = conn.cursor()
             cursor.execute(query, valores)
+            if cursor.rowcount == 0 and alquiler.version is not None:
+                raise ConflictoDeVersion("alquiler", id_alquiler, alquiler.version, self.obtener_por_id(id_alquiler))
+            alquiler.version = version_actualizada(cursor, "alquileres", "id_alquiler", id_alquiler, alquiler.version)
             conn.commit()
+            versiones_tablas.incrementar("alquileres")
             alquiler.id_alquiler = id_alquiler
+            self._actualizar_indice(id_alquiler, data)
             return alquiler
 
     def eliminar(self, id_alquiler: int) -> bool:
@@ -171,36 +205,24 @@ class AlquilerRepository:
             cursor = conn.cursor()
             cursor.execute(query, (id_alquiler,))
             conn.commit()
+            versiones_tablas.incrementar("alquileres")
+            if self._indice is not None:
+                al_confirmar(lambda: self._indice.quitar_alquiler(id_alquiler))
             return cursor.rowcount > 0
 
-    def obtener_con_filtros(self, estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None) -> list[dict]:
+    def _armar_consulta(self, estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None,
+                        campos=None, limite: int = None, despues_de: tuple = None) -> tuple[str, list, SeleccionCompilada]:
         """
-        Obtiene alquileres con filtros opcionales de estado y rango de fechas.
+        Arma la consulta de alquileres con filtros, proyección y paginación por cursor.
 
-        Args:
-            estado_id: ID del estado de alquiler para filtrar
-            fecha_desde: Fecha de inicio del rango (formato: YYYY-MM-DD)
-            fecha_hasta: Fecha de fin del rango (formato: YYYY-MM-DD)
+        Solo se seleccionan las columnas pedidas y solo se hacen los JOIN que esas
+        columnas necesitan. El orden es (fecha_inicio, id_alquiler) descendente.
 
         Returns:
-            Lista de diccionarios con información de alquileres filtrados
-        """
-        query = """
-            SELECT
-                a.*,
-                c.nombre as cliente_nombre,
-                c.apellido as cliente_apellido,
-                c.dni as cliente_dni,
-                v.patente as vehiculo_patente,
-                v.marca as vehiculo_marca,
-                v.modelo as vehiculo_modelo,
-                ea.codigo as estado_nombre
-            FROM alquileres a
-            LEFT JOIN clientes c ON a.cliente_id = c.id_cliente
-            LEFT JOIN vehiculos v ON a.vehiculo_id = v.id_vehiculo
-            LEFT JOIN estados_alquiler ea ON a.estado_alquiler_id = ea.id_estado_alquiler
-            WHERE 1=1
+            Tupla (query, parámetros, selección compilada con su mapeo)
         """
+        seleccion = PROYECCION_ALQUILER.compilar(campos)
+        query = seleccion.sql + " WHERE 1=1"
 
         params = []
 
@@ -209,51 +231,106 @@ class AlquilerRepository:
             params.append(estado_id)
 
         if fecha_desde is not None:
-            query += " AND date(a.fecha_inicio) >= date(?)"
+            query += " AND a.fecha_inicio >= date(?)"
             params.append(fecha_desde)
 
         if fecha_hasta is not None:
-            query += " AND date(a.fecha_inicio) <= date(?)"
+            query += " AND a.fecha_inicio <= date(?)"
             params.append(fecha_hasta)
 
-        query += " ORDER BY a.fecha_inicio DESC"
+        if despues_de is not None:
+            query += " AND (a.fecha_inicio, a.id_alquiler) < (?, ?)"
+            params.extend(despues_de)
+
+        query += " ORDER BY a.fecha_inicio DESC, a.id_alquiler DESC"
+
+        if limite is not None:
+            query += " LIMIT ?"
+            params.append(limite)
+
+        return query, params, seleccion
+
+    def _consulta_filtrada(self, estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None,
+                           campos=None, limite: int = None, despues_de: tuple = None) -> tuple[list[dict], tuple]:
+        """
+        Ejecuta la consulta armada por _armar_consulta.
+
+        Returns:
+            Tupla (alquileres, clave de orden de la última fila o None)
+        """
+        query, params, seleccion = self._armar_consulta(estado_id, fecha_desde, fecha_hasta, campos, limite, despues_de)
 
         with self._connection_factory() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = None
             cursor.execute(query, params)
             filas = cursor.fetchall()
-            alquileres = []
-
-            for fila in filas:
-                alquiler_dict = {
-                    "id_alquiler": fila["id_alquiler"],
-                    "cliente_id": fila["cliente_id"],
-                    "cliente_nombre_completo": f"{fila['cliente_nombre']} {fila['cliente_apellido']}" if fila['cliente_nombre'] else "N/A",
-                    "cliente_dni": fila["cliente_dni"],
-                    "vehiculo_id": fila["vehiculo_id"],
-                    "vehiculo_descripcion": f"{fila['vehiculo_marca']} {fila['vehiculo_modelo']} - {fila['vehiculo_patente']}" if fila['vehiculo_marca'] else "N/A",
-                    "empleado_id": fila["empleado_id"],
-                    "estado_alquiler_id": fila["estado_alquiler_id"],
-                    "estado_nombre": fila["estado_nombre"],
-                    "reserva_id": fila["reserva_id"],
-                    "fecha_inicio": fila["fecha_inicio"],
-                    "fecha_prevista": fila["fecha_prevista"],
-                    "fecha_entrega": fila["fecha_entrega"],
-                    "km_salida": fila["km_salida"],
-                    "km_entrada": fila["km_entrada"],
-                    "observaciones": fila["observaciones"],
-                    "creado_en": fila["creado_en"],
-                    "actualizado_en": fila["actualizado_en"]
-                }
-                alquileres.append(alquiler_dict)
-
-            return alquileres
+
+        alquileres = list(map(seleccion.mapear, filas))
+        ultima_clave = seleccion.clave_orden(filas[-1]) if filas else None
+        return alquileres, ultima_clave
+
+    def obtener_con_filtros(self, estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None,
+                            campos=None) -> list[dict]:
+        """
+        Obtiene alquileres con filtros opcionales de estado y rango de fechas.
+
+        Args:
+            estado_id: ID del estado de alquiler para filtrar
+            fecha_desde: Fecha de inicio del rango (formato: YYYY-MM-DD)
+            fecha_hasta: Fecha de fin del rango (formato: YYYY-MM-DD)
+            campos: Campos a devolver (lista o "a,b,c"); todos si no se indica
+
+        Returns:
+            Lista de diccionarios con información de alquileres filtrados
+        """
+        alquileres, _ = self._consulta_filtrada(estado_id, fecha_desde, fecha_hasta, campos)
+        return alquileres
+
+    def iterar_con_filtros(self, estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None,
+                           campos=None):
+        """
+        Igual que obtener_con_filtros pero de a una página por cursor (para respuestas en streaming).
+
+        Los filtros y campos se validan al llamarla, antes de empezar a escribir la respuesta.
+        Entre página y página la conexión vuelve al pool (ver recorrer_por_paginas).
+        """
+        self._armar_consulta(estado_id, fecha_desde, fecha_hasta, campos)
+        return recorrer_por_paginas(lambda despues_de, limite: self._consulta_filtrada(
+            estado_id, fecha_desde, fecha_hasta, campos, limite, despues_de
+        ))
+
+    def obtener_pagina(self, limite: int, cursor: str = None, estado_id: int = None, fecha_desde: str = None,
+                       fecha_hasta: str = None, campos=None) -> tuple[list[dict], str]:
+        """
+        Obtiene una página de alquileres usando paginación por cursor (keyset).
+
+        Args:
+            limite: Cantidad máxima de alquileres a devolver
+            cursor: Cursor devuelto por la página anterior (None para la primera)
+            estado_id, fecha_desde, fecha_hasta, campos: Igual que obtener_con_filtros
+
+        Returns:
+            Tupla (alquileres, cursor de la página siguiente o None si no hay más)
+        """
+        limite = validar_limite(limite)
+        despues_de = decodificar_cursor(cursor, 2) if cursor else None
+        alquileres, ultima_clave = self._consulta_filtrada(
+            estado_id, fecha_desde, fecha_hasta, campos, limite, despues_de
+        )
+        siguiente = codificar_cursor(*ultima_clave) if len(alquileres) == limite else None
+        return alquileres, siguiente
 
     def verificar_disponibilidad(self, vehiculo_id: int, fecha_inicio: str, fecha_prevista: str, excluir_alquiler_id: int = None) -> bool:
         """
         Verifica si un vehículo está disponible en un rango de fechas.
         Retorna True si está disponible, False si ya está alquilado.
+        Si el índice de disponibilidad está cargado se responde sin consultar la base,
+        salvo en los repositorios de una unidad de trabajo (consultar_indice=False).
         """
+        if self._consultar_indice and self._indice is not None and self._indice.cargado:
+            return self._indice.alquiler_disponible(vehiculo_id, fecha_inicio, fecha_prevista, excluir_alquiler_id)
+
         query = """
             SELECT COUNT(*) as count FROM alquileres
             WHERE vehiculo_id = ?
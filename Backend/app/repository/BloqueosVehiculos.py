@@ -0,0 +1,64 @@
+"""
+Locks por vehículo para las altas de alquileres y reservas y las modificaciones de alquileres.
+
+Crear un alquiler o una reserva es "verificar disponibilidad + INSERT", y las
+dos cosas tienen que pasar sin que otro pedido reserve el mismo vehículo en el
+medio. Entre procesos eso lo garantiza la transacción BEGIN IMMEDIATE de la
+unidad de trabajo: SQLite admite un solo escritor a la vez. Dentro del proceso,
+además, los pedidos sobre el mismo vehículo esperan su turno en un lock propio
+de ese vehículo antes de tomar una conexión del pool, así:
+
+- dos empleados que reservan el mismo auto no compiten por el lock de escritura
+  de la base ni ocupan conexiones mientras esperan;
+- los pedidos sobre autos distintos no se esperan entre sí (solo comparten el
+  lock de escritura de SQLite durante el INSERT, que dura milisegundos).
+
+Los locks están repartidos en una cantidad fija de franjas (según el
+vehiculo_id), así la memoria no crece con la flota.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+
+class BloqueosVehiculos:
+    """
+    Locks por vehículo repartidos en franjas.
+
+    Args:
+        franjas: Cantidad de locks; dos vehículos comparten lock solo si caen en la misma franja
+    """
+
+    def __init__(self, franjas: int = 64):
+        self.franjas = franjas
+        self._locks = [threading.Lock() for _ in range(franjas)]
+
+    def _franja(self, vehiculo_id) -> int:
+        return hash(str(vehiculo_id)) % self.franjas
+
+    def bloquear(self, vehiculo_id) -> threading.Lock:
+        """Devuelve el lock del vehículo, para usar con `with`."""
+        return self._locks[self._franja(vehiculo_id)]
+
+    @contextmanager
+    def bloquear_varios(self, *vehiculo_ids):
+        """
+        Toma los locks de varios vehículos (por ejemplo el anterior y el nuevo de un
+        alquiler que cambia de auto). Se toman siempre en orden de franja y una sola vez
+        por franja, así dos pedidos que bloquean los mismos autos no se traban entre sí.
+        """
+        franjas = sorted({self._franja(v) for v in vehiculo_ids if v is not None})
+        tomados = []
+        try:
+            for franja in franjas:
+                self._locks[franja].acquire()
+                tomados.append(franja)
+            yield
+        finally:
+            for franja in reversed(tomados):
+                self._locks[franja].release()
+
+
+bloqueos_vehiculos = BloqueosVehiculos(
+    franjas=int(os.environ.get("BLOQUEOS_VEHICULOS_FRANJAS", "64")),
+)
@@ -0,0 +1,88 @@
+"""
+Memo de montos calculados por /tarifas/cotizar.
+
+El monto de una cotización depende solo de la estrategia, sus parámetros, la
+tarifa base, los días y los km, así que se guarda con esa clave en un LRU
+acotado. Las consultas se repiten mucho (las mismas ventanas de 1, 3, 7 y 14
+días sobre la misma flota) y casi todas salen del memo.
+
+Como la tarifa base es parte de la clave, un cambio de tarifa_base_dia nunca
+devuelve un monto viejo; VehiculoRepository.actualizar igual descarta las
+entradas de la tarifa anterior para que no ocupen lugar en el LRU.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+
+class CacheCotizaciones:
+    """
+    LRU de montos por (estrategia, parámetros, tarifa_base, días, km).
+
+    Args:
+        tamanio_maximo: Cantidad máxima de montos antes de desalojar el menos usado
+    """
+
+    def __init__(self, tamanio_maximo: int = 4096):
+        self.tamanio_maximo = tamanio_maximo
+        self._lock = threading.Lock()
+        self._entradas: OrderedDict = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    @staticmethod
+    def clave(estrategia: str, parametros: dict, tarifa_base: float, dias: int, km_recorridos: float) -> tuple:
+        return (estrategia, tuple(sorted(parametros.items())), float(tarifa_base), dias, km_recorridos)
+
+    def obtener(self, clave: tuple, calcular) -> tuple:
+        """
+        Devuelve el monto memorizado para `clave` o lo calcula.
+
+        Args:
+            clave: Tupla armada con CacheCotizaciones.clave
+            calcular: Función sin argumentos que calcula el monto
+
+        Returns:
+            Tupla (monto, True si vino del memo)
+        """
+        with self._lock:
+            monto = self._entradas.get(clave)
+            if monto is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return monto, True
+            self.fallos += 1
+
+        monto = calcular()
+        with self._lock:
+            self._entradas[clave] = monto
+            while len(self._entradas) > self.tamanio_maximo:
+                self._entradas.popitem(last=False)
+        return monto, False
+
+    def invalidar_tarifa(self, tarifa_base: float):
+        """Descarta los montos calculados sobre una tarifa base."""
+        tarifa_base = float(tarifa_base)
+        with self._lock:
+            for clave in [c for c in self._entradas if c[2] == tarifa_base]:
+                del self._entradas[clave]
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "tamanio_maximo": self.tamanio_maximo,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / total, 4) if total else 0.0,
+            }
+
+
+cache_cotizaciones = CacheCotizaciones(
+    tamanio_maximo=int(os.environ.get("COTIZACIONES_CACHE_TAMANIO", "4096")),
+)
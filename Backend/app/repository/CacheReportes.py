@@ -0,0 +1,123 @@
+"""
+Cache de resultados de reportes con invalidación por escritura.
+
+Cada repositorio incrementa la versión de su tabla después de escribir en ella
+(versiones_tablas.incrementar). Una entrada del cache guarda las versiones de
+las tablas que leyó el reporte y deja de ser válida cuando alguna cambia, cuando
+vence su TTL o cuando la desaloja el LRU. Las versiones son por proceso: con
+varios procesos el TTL acota cuánto puede atrasarse un reporte.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from app.database.database import al_confirmar
+
+
+class VersionesTablas:
+    """Contadores de versión por tabla, incrementados en cada escritura."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versiones: dict[str, int] = {}
+
+    def incrementar(self, *tablas: str):
+        # Dentro de una unidad de trabajo, recién cuando los cambios son visibles para otros
+        al_confirmar(lambda: self._incrementar(tablas))
+
+    def _incrementar(self, tablas):
+        with self._lock:
+            for tabla in tablas:
+                self._versiones[tabla] = self._versiones.get(tabla, 0) + 1
+
+    def versiones(self, tablas) -> tuple:
+        with self._lock:
+            return tuple(self._versiones.get(tabla, 0) for tabla in tablas)
+
+
+class _Entrada:
+    __slots__ = ("datos", "as_of", "versiones", "vence_en")
+
+    def __init__(self, datos, as_of: str, versiones: tuple, vence_en: float):
+        self.datos = datos
+        self.as_of = as_of
+        self.versiones = versiones
+        self.vence_en = vence_en
+
+
+class CacheReportes:
+    """
+    Cache LRU con TTL para resultados de reportes.
+
+    Args:
+        versiones: Contadores de versión de las tablas
+        ttl: Segundos que vive una entrada
+        tamanio_maximo: Cantidad máxima de entradas antes de desalojar la menos usada
+    """
+
+    def __init__(self, versiones: VersionesTablas, ttl: float = 60, tamanio_maximo: int = 128):
+        self._versiones = versiones
+        self.ttl = ttl
+        self.tamanio_maximo = tamanio_maximo
+        self._lock = threading.Lock()
+        self._entradas: OrderedDict = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave: tuple, tablas, calcular) -> tuple:
+        """
+        Devuelve el resultado cacheado para `clave` o lo calcula.
+
+        Args:
+            clave: Endpoint y parámetros del reporte
+            tablas: Tablas que lee el reporte
+            calcular: Función sin argumentos que calcula el resultado
+
+        Returns:
+            Tupla (datos, as_of en ISO 8601 UTC, True si vino del cache)
+        """
+        versiones = self._versiones.versiones(tablas)
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada.versiones == versiones and entrada.vence_en > ahora:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada.datos, entrada.as_of, True
+            self.fallos += 1
+
+        # Se calcula fuera del lock; dos pedidos simultáneos pueden calcular lo mismo
+        datos = calcular()
+        as_of = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            self._entradas[clave] = _Entrada(datos, as_of, versiones, ahora + self.ttl)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.tamanio_maximo:
+                self._entradas.popitem(last=False)
+        return datos, as_of, False
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "tamanio_maximo": self.tamanio_maximo,
+                "ttl": self.ttl,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / total, 4) if total else 0.0,
+            }
+
+
+versiones_tablas = VersionesTablas()
+cache_reportes = CacheReportes(
+    versiones_tablas,
+    ttl=float(os.environ.get("REPORTES_CACHE_TTL", "60")),
+    tamanio_maximo=int(os.environ.get("REPORTES_CACHE_TAMANIO", "128")),
+)
@@ -1,11 +1,35 @@
 from app.database.database import get_connection
 from app.models.Cliente import Cliente
+from app.repository.CacheReportes import versiones_tablas
+from app.repository.MapeadorFilas import MapeadorFilas
+from app.repository.Paginacion import recorrer_por_paginas
+
+MAPEADOR_CLIENTE = MapeadorFilas(
+    Cliente,
+    {atributo: atributo for atributo in Cliente.__slots__},
+    conversiones={"habilitado": bool},
+)
 
 
 class ClienteRepository:
     def __init__(self, connection_factory=get_connection):
         self._connection_factory = connection_factory
 
+    @staticmethod
+    def _a_cliente(fila) -> Cliente:
+        return Cliente(
+            id_cliente=fila["id_cliente"],
+            dni=fila["dni"],
+            nombre=fila["nombre"],
+            apellido=fila["apellido"],
+            email=fila["email"],
+            telefono=fila["telefono"],
+            direccion=fila["direccion"],
+            licencia_num=fila["licencia_num"],
+            licencia_venc=fila["licencia_venc"],
+            habilitado=bool(fila["habilitado"]),
+        )
+
     def crear(self, cliente: Cliente) -> Cliente:
         query = """
             INSERT INTO clientes (
@@ -37,33 +61,24 @@ class ClienteRepository:
             cursor = conn.cursor()
             cursor.execute(query, valores)
             conn.commit()
+            versiones_tablas.incrementar("clientes")
             cliente.id_cliente = cursor.lastrowid
             return cliente
 
     def obtener_todos(self) -> list[Cliente]:
         query = "SELECT * FROM clientes"
         with self._connection_factory() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            filas = cursor.fetchall()
-            clientes: list[Cliente] = []
+            return MAPEADOR_CLIENTE.todas(conn.cursor(), query)
 
-            for fila in filas:
-                cliente = Cliente(
-                    id_cliente=fila["id_cliente"],
-                    dni=fila["dni"],
-                    nombre=fila["nombre"],
-                    apellido=fila["apellido"],
-                    email=fila["email"],
-                    telefono=fila["telefono"],
-                    direccion=fila["direccion"],
-                    licencia_num=fila["licencia_num"],
-                    licencia_venc=fila["licencia_venc"],
-                    habilitado=bool(fila["habilitado"]),
-                )
-                clientes.append(cliente)
+    def iterar_todos(self):
+        """Recorre todos los clientes de a una página por ID (para respuestas en streaming)."""
+        return recorrer_por_paginas(self._pagina_por_id, desde=0)
 
-            return clientes
+    def _pagina_por_id(self, despues_de: int, limite: int) -> tuple[list[Cliente], int]:
+        query = "SELECT * FROM clientes WHERE id_cliente > ? ORDER BY id_cliente LIMIT ?"
+        with self._connection_factory() as conn:
+            clientes = MAPEADOR_CLIENTE.todas(conn.cursor(), query, (despues_de, limite))
+        return clientes, clientes[-1].id_cliente if clientes else None
 
     def obtener_por_id(self, id_cliente: int) -> Cliente:
         query = "SELECT * FROM clientes WHERE id_cliente = ?"
@@ -75,18 +90,7 @@ class ClienteRepository:
             if not fila:
                 return None
 
-            return Cliente(
-                id_cliente=fila["id_cliente"],
-                dni=fila["dni"],
-                nombre=fila["nombre"],
-                apellido=fila["apellido"],
-                email=fila["email"],
-                telefono=fila["telefono"],
-                direccion=fila["direccion"],
-                licencia_num=fila["licencia_num"],
-                licencia_venc=fila["licencia_venc"],
-                habilitado=bool(fila["habilitado"]),
-            )
+            return self._a_cliente(fila)
 
     def actualizar(self, id_cliente: int, cliente: Cliente) -> Cliente:
         query = """
@@ -119,6 +123,7 @@ class ClienteRepository:
             cursor = conn.cursor()
             cursor.execute(query, valores)
             conn.commit()
+            versiones_tablas.incrementar("clientes")
             cliente.id_cliente = id_cliente
             return cliente
 
@@ -128,4 +133,5 @@ class ClienteRepository:
             cursor = conn.cursor()
             cursor.execute(query, (id_cliente,))
             conn.commit()
+            versiones_tablas.incrementar("clientes")
             return cursor.rowcount > 0
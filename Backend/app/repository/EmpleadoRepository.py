@@ -1,5 +1,6 @@
 from app.database.database import get_connection
 from app.models.Empleado import Empleado
+from app.repository.CacheReportes import versiones_tablas
 
 
 class EmpleadoRepository:
@@ -31,6 +32,7 @@ class EmpleadoRepository:
             cursor = conn.cursor()
             cursor.execute(query, valores)
             conn.commit()
+            versiones_tablas.incrementar("empleados")
             empleado.id_empleado = cursor.lastrowid
             return empleado
 
@@ -0,0 +1,92 @@
+"""
+Barrido del estado materializado de los vehículos (tabla vehiculo_estado_actual).
+
+Los triggers de la migración 2 recalculan el estado de un vehículo cada vez que
+cambian sus alquileres, reservas o mantenimientos. Pero el estado también cambia
+solo con el paso de los días (un alquiler que empieza hoy, una reserva que ya
+pasó), así que cada fila guarda para qué fecha se calculó y el barrido recalcula
+las que quedaron de un día anterior. Corre en un thread de fondo cada
+ESTADO_VEHICULOS_BARRIDO segundos y, además, la lectura lo fuerza la primera vez
+que ve un día nuevo.
+"""
+import logging
+import threading
+from datetime import datetime, timezone
+
+from app.database.database import get_connection
+from app.database.migrations import RECALCULAR_ESTADO
+
+_lock = threading.Lock()
+_ultimo_barrido = None
+_hilo = None
+_detener = threading.Event()
+
+logger = logging.getLogger(__name__)
+
+
+def _hoy() -> str:
+    # date('now') de SQLite es UTC
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def barrer_estados(connection_factory=get_connection) -> int:
+    """
+    Recalcula los estados calculados para un día anterior y los de vehículos sin fila.
+
+    Returns:
+        Cantidad de vehículos recalculados
+    """
+    global _ultimo_barrido
+    query = RECALCULAR_ESTADO + """
+        WHERE vehiculo_id IN (
+            SELECT vehiculo_id FROM vehiculo_estado_actual WHERE calculado_para < date('now')
+        )
+        OR NOT EXISTS (
+            SELECT 1 FROM vehiculo_estado_actual e WHERE e.vehiculo_id = vehiculo_estado_calculado.vehiculo_id
+        )
+    """
+    hoy = _hoy()
+    with connection_factory() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        conn.commit()
+        _ultimo_barrido = hoy
+        return cursor.rowcount
+
+
+def barrer_si_cambio_el_dia(connection_factory=get_connection):
+    """Ejecuta el barrido si este proceso todavía no lo hizo hoy."""
+    if _ultimo_barrido == _hoy():
+        return
+    with _lock:
+        if _ultimo_barrido != _hoy():
+            barrer_estados(connection_factory)
+
+
+def _ciclo_barrido(intervalo: float, connection_factory):
+    while not _detener.wait(intervalo):
+        # Cualquier error (de la base o del pool sin conexiones libres) se registra y el
+        # thread sigue: si terminara, ningún barrido volvería a correr en este proceso
+        try:
+            barrer_estados(connection_factory)
+        except Exception:
+            logger.exception("Error en el barrido de estados de vehículos")
+
+
+def iniciar_barrido(intervalo: float, connection_factory=get_connection) -> threading.Thread:
+    """Inicia (una sola vez por proceso) el thread que barre los estados cada `intervalo` segundos."""
+    global _hilo
+    with _lock:
+        if _hilo is None or not _hilo.is_alive():
+            _detener.clear()
+            _hilo = threading.Thread(
+                target=_ciclo_barrido, args=(intervalo, connection_factory),
+                name="barrido-estados-vehiculos", daemon=True
+            )
+            _hilo.start()
+        return _hilo
+
+
+def detener_barrido():
+    """Detiene el thread de barrido."""
+    _detener.set()
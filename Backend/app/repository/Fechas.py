@@ -0,0 +1,41 @@
+"""
+Formato canónico de las fechas guardadas en la base.
+
+Todas las columnas DATE se guardan como texto ISO 'YYYY-MM-DD' y una fecha
+ausente como NULL. Con un único formato las comparaciones de rango sobre la
+columna (fecha_inicio >= ?) ordenan bien y pueden usar índices, sin envolver la
+columna en date().
+
+La excepción es mantenimientos.fecha_realizada, que conserva '': un mantenimiento
+PROGRAMADO con fecha_realizada NULL deja el vehículo en mantenimiento y uno con ''
+no, como antes de normalizar las fechas.
+"""
+from datetime import date, datetime
+
+
+def normalizar_fecha(valor, vacia=None):
+    """
+    Lleva una fecha al formato canónico de la base.
+
+    Args:
+        valor: date, datetime, texto 'YYYY-MM-DD' (con o sin hora), '' o None
+        vacia: Valor que se guarda en lugar de '' (por defecto NULL)
+
+    Returns:
+        'YYYY-MM-DD', None si la fecha es None, o `vacia` si es ''
+
+    Raises:
+        ValueError: Si el valor no es una fecha válida
+    """
+    if valor is None:
+        return None
+    if valor == "":
+        return vacia
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    try:
+        return date.fromisoformat(str(valor).strip()[:10]).isoformat()
+    except ValueError:
+        raise ValueError(f"Fecha inválida: {valor!r} (se espera YYYY-MM-DD)")
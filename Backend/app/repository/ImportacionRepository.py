@@ -0,0 +1,177 @@
+"""
+Inserción por lotes para la importación masiva (ver app/services/ImportacionService.py).
+
+Cada lote se inserta con un único executemany dentro de su propia transacción
+BEGIN IMMEDIATE. Si el lote choca con una restricción (patente o email
+repetidos) se vuelve al punto anterior al executemany y se insertan las filas
+de a una con SAVEPOINT, así el lote guarda todas las filas válidas y se sabe
+exactamente cuáles fallaron.
+
+Los alquileres históricos no pasan por los triggers de fila de la migración 2 y 3
+(estado del vehículo e ingresos mensuales): recalcular un mes completo por cada
+fila insertada hace que importar 100k alquileres tarde minutos. Dentro de la
+transacción del lote esos triggers se quitan, se insertan las filas, se
+recalcula una sola vez cada vehículo afectado, se suman los alquileres nuevos
+al rollup y se vuelven a crear. Como todo pasa con el lock de escritura tomado, ninguna otra
+conexión escribe sin los triggers.
+"""
+import sqlite3
+
+from app.database.database import get_connection
+from app.database.migrations import RECALCULAR_ESTADO, recalcular_ingresos_sql
+from app.repository.CacheReportes import versiones_tablas
+from app.repository.IndiceDisponibilidad import indice_disponibilidad
+
+INSERTS = {
+    "vehiculos": """
+        INSERT INTO vehiculos (
+            patente, marca, modelo, anio, tarifa_base_dia, km_actual, habilitado,
+            seguro_venc, vtv_venc, km_service_cada, km_ultimo_service, fecha_ultimo_service, foto_url
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    "clientes": """
+        INSERT INTO clientes (
+            dni, nombre, apellido, email, telefono, direccion, licencia_num, licencia_venc, habilitado
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    "alquileres": """
+        INSERT INTO alquileres (
+            cliente_id, vehiculo_id, empleado_id, estado_alquiler_id, reserva_id,
+            fecha_inicio, fecha_prevista, fecha_entrega, km_salida, km_entrada,
+            observaciones, creado_en, actualizado_en
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), CURRENT_TIMESTAMP)
+    """,
+}
+
+# Triggers de fila que el lote de alquileres reemplaza por un recálculo por lote
+TRIGGERS_ALQUILERES = ("trg_alquileres_insert_estado_vehiculo", "trg_alquileres_insert_ingresos")
+
+# Parámetros por consulta al resolver referencias (SQLite anteriores a 3.32 admiten 999)
+MAXIMO_PARAMETROS = 500
+
+
+class ImportacionRepository:
+    def __init__(self, connection_factory=get_connection, indice=indice_disponibilidad):
+        self._connection_factory = connection_factory
+        self._indice = indice
+
+    def resolver(self, tabla: str, columna_id: str, columna: str, valores) -> dict:
+        """
+        Busca los IDs de los registros cuya `columna` tiene alguno de los valores.
+
+        Returns:
+            Diccionario valor -> ID con los valores que existen
+        """
+        valores = list(valores)
+        encontrados = {}
+        with self._connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            for i in range(0, len(valores), MAXIMO_PARAMETROS):
+                grupo = valores[i:i + MAXIMO_PARAMETROS]
+                marcadores = ", ".join("?" for _ in grupo)
+                cursor.execute(f"SELECT {columna}, {columna_id} FROM {tabla} WHERE {columna} IN ({marcadores})", grupo)
+                encontrados.update(cursor.fetchall())
+        return encontrados
+
+    def insertar_lote(self, tabla: str, lote: list[tuple]) -> list[tuple]:
+        """
+        Inserta un lote en una transacción.
+
+        Args:
+            tabla: "vehiculos", "clientes" o "alquileres"
+            lote: Lista de (línea del archivo, valores en el orden de INSERTS[tabla])
+
+        Returns:
+            Lista de (línea, mensaje) de las filas que la base rechazó
+        """
+        query = INSERTS[tabla]
+        rechazadas = []
+        activos = []
+
+        with self._connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            try:
+                if tabla == "alquileres":
+                    cursor.execute("SELECT COALESCE(MAX(id_alquiler), 0) FROM alquileres")
+                    ultimo_id = cursor.fetchone()[0]
+                    triggers = self._quitar_triggers(cursor, TRIGGERS_ALQUILERES)
+
+                self._insertar(cursor, query, lote, rechazadas)
+
+                if tabla == "alquileres":
+                    self._recalcular_derivados(cursor, ultimo_id)
+                    for sql in triggers:
+                        cursor.execute(sql)
+                    if self._indice is not None and self._indice.cargado:
+                        cursor.execute(
+                            "SELECT id_alquiler, vehiculo_id, estado_alquiler_id, fecha_inicio, fecha_prevista, "
+                            "fecha_entrega FROM alquileres WHERE id_alquiler > ? AND estado_alquiler_id IN (1, 2)",
+                            (ultimo_id,)
+                        )
+                        activos = cursor.fetchall()
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        versiones_tablas.incrementar(tabla)
+        for alquiler in activos:
+            self._indice.registrar_alquiler(*alquiler)
+        return rechazadas
+
+    @staticmethod
+    def _insertar(cursor, query: str, lote: list[tuple], rechazadas: list):
+        """executemany del lote; si alguna fila viola una restricción, inserta de a una."""
+        cursor.execute("SAVEPOINT lote")
+        try:
+            cursor.executemany(query, [valores for _, valores in lote])
+            cursor.execute("RELEASE lote")
+            return
+        except sqlite3.IntegrityError:
+            cursor.execute("ROLLBACK TO lote")
+            cursor.execute("RELEASE lote")
+
+        for linea, valores in lote:
+            cursor.execute("SAVEPOINT fila")
+            try:
+                cursor.execute(query, valores)
+            except sqlite3.IntegrityError as e:
+                cursor.execute("ROLLBACK TO fila")
+                rechazadas.append((linea, f"Rechazada por la base: {e}"))
+            cursor.execute("RELEASE fila")
+
+    @staticmethod
+    def _quitar_triggers(cursor, nombres) -> list[str]:
+        """Quita los triggers (dentro de la transacción) y devuelve su SQL para volver a crearlos."""
+        marcadores = ", ".join("?" for _ in nombres)
+        cursor.execute(f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({marcadores})",
+                       tuple(nombres))
+        triggers = cursor.fetchall()
+        for nombre, _ in triggers:
+            cursor.execute(f"DROP TRIGGER {nombre}")
+        return [sql for _, sql in triggers]
+
+    @staticmethod
+    def _recalcular_derivados(cursor, ultimo_id: int):
+        """
+        Actualiza el estado de los vehículos y los ingresos mensuales con los alquileres del lote.
+
+        Como el lote solo agrega filas, a cada (año, mes, vehículo) del rollup se le suman
+        el total y la cantidad de los alquileres nuevos, sin volver a leer el mes completo.
+        """
+        cursor.execute(f"{RECALCULAR_ESTADO} WHERE vehiculo_id IN "
+                       "(SELECT vehiculo_id FROM alquileres WHERE id_alquiler > ?)", (ultimo_id,))
+        cursor.execute(
+            recalcular_ingresos_sql("AND a.id_alquiler > ?")
+            + " ON CONFLICT (anio, mes, vehiculo_id) DO UPDATE SET "
+              "total_ingresos = total_ingresos + excluded.total_ingresos, "
+              "cantidad_alquileres = cantidad_alquileres + excluded.cantidad_alquileres",
+            (ultimo_id,)
+        )
@@ -1,5 +1,6 @@
 from app.database.database import get_connection
 from app.models.Incidente import Incidente
+from app.repository.CacheReportes import versiones_tablas
 
 
 class IncidenteRepository:
@@ -33,6 +34,7 @@ class IncidenteRepository:
             cursor = conn.cursor()
             cursor.execute(query, valores)
             conn.commit()
+            versiones_tablas.incrementar("incidentes")
             incidente.id_incidente = cursor.lastrowid
             return incidente
 
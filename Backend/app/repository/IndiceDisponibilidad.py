@@ -0,0 +1,403 @@
+"""
+Índice en memoria de los períodos ocupados de cada vehículo.
+
+Responde las mismas preguntas que AlquilerRepository.verificar_disponibilidad y
+ReservaRepository.verificar_disponibilidad sin ir a la base: por cada vehículo
+guarda los intervalos en un árbol de intervalos (treap por fecha de inicio con el
+máximo fin de cada subárbol), así un solapamiento se resuelve en O(log n).
+
+El índice se reconstruye desde la base al iniciar la app (cargar) y los
+repositorios lo mantienen al crear, actualizar o eliminar alquileres y reservas.
+Mientras no esté cargado, los repositorios siguen consultando la base.
+Es un índice por proceso: con varios workers no ve las altas de los otros, por eso
+las verificaciones dentro de una unidad de trabajo (las que deciden un alta) van
+siempre a la base y el índice solo responde consultas de lectura.
+"""
+import random
+import threading
+from datetime import date, timedelta
+
+from app.database.database import get_connection
+
+INFINITO = "9999-12-31"
+ESTADOS_ALQUILER_ACTIVOS = (1, 2)  # PENDIENTE o ACTIVO
+ESTADOS_RESERVA_ACTIVOS = (1, 2)   # PENDIENTE o CONFIRMADA
+
+
+def _fecha(valor) -> str:
+    """Normaliza una fecha (date, 'YYYY-MM-DD' o 'YYYY-MM-DD HH:MM:SS') a 'YYYY-MM-DD'."""
+    return str(valor)[:10]
+
+
+class _Nodo:
+    __slots__ = ("inicio", "fin", "clave", "prioridad", "max_fin", "izq", "der")
+
+    def __init__(self, inicio: str, fin: str, clave: int):
+        self.inicio = inicio
+        self.fin = fin
+        self.clave = clave
+        self.prioridad = random.random()
+        self.max_fin = fin
+        self.izq = None
+        self.der = None
+
+    def actualizar(self):
+        maximo = self.fin
+        if self.izq is not None and self.izq.max_fin > maximo:
+            maximo = self.izq.max_fin
+        if self.der is not None and self.der.max_fin > maximo:
+            maximo = self.der.max_fin
+        self.max_fin = maximo
+
+
+def _unir(a: _Nodo, b: _Nodo) -> _Nodo:
+    """Une dos treaps donde todas las claves de `a` son menores que las de `b`."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.prioridad > b.prioridad:
+        a.der = _unir(a.der, b)
+        a.actualizar()
+        return a
+    b.izq = _unir(a, b.izq)
+    b.actualizar()
+    return b
+
+
+def _partir(nodo: _Nodo, clave: tuple) -> tuple:
+    """Parte el treap en (claves < clave, claves >= clave)."""
+    if nodo is None:
+        return None, None
+    if (nodo.inicio, nodo.clave) < clave:
+        menores, mayores = _partir(nodo.der, clave)
+        nodo.der = menores
+        nodo.actualizar()
+        return nodo, mayores
+    menores, mayores = _partir(nodo.izq, clave)
+    nodo.izq = mayores
+    nodo.actualizar()
+    return menores, nodo
+
+
+def _sacar(nodo: _Nodo, clave: tuple) -> tuple:
+    """Quita el nodo con esa clave; devuelve (nueva raíz, nodo quitado o None)."""
+    if nodo is None:
+        return None, None
+    propia = (nodo.inicio, nodo.clave)
+    if propia == clave:
+        return _unir(nodo.izq, nodo.der), nodo
+    if clave < propia:
+        nodo.izq, quitado = _sacar(nodo.izq, clave)
+    else:
+        nodo.der, quitado = _sacar(nodo.der, clave)
+    nodo.actualizar()
+    return nodo, quitado
+
+
+class _Intervalos:
+    """
+    Intervalos [inicio, fin] de un vehículo en un árbol de intervalos.
+
+    Es un treap ordenado por (inicio, clave) donde cada nodo guarda el máximo fin
+    de su subárbol: agregar, quitar y se_solapa son O(log n) esperado, también con
+    intervalos abiertos (fin INFINITO) entre los guardados.
+    """
+
+    def __init__(self):
+        self._raiz = None
+        self._inicio_de: dict[int, str] = {}
+
+    def __len__(self):
+        return len(self._inicio_de)
+
+    def _insertar(self, nodo: _Nodo):
+        menores, mayores = _partir(self._raiz, (nodo.inicio, nodo.clave))
+        nodo.izq = nodo.der = None
+        nodo.actualizar()
+        self._raiz = _unir(_unir(menores, nodo), mayores)
+        self._inicio_de[nodo.clave] = nodo.inicio
+
+    def _sacar(self, clave: int) -> _Nodo | None:
+        inicio = self._inicio_de.pop(clave, None)
+        if inicio is None:
+            return None
+        self._raiz, quitado = _sacar(self._raiz, (inicio, clave))
+        return quitado
+
+    def agregar(self, inicio: str, fin: str, clave: int):
+        self._sacar(clave)
+        self._insertar(_Nodo(inicio, fin, clave))
+
+    def quitar(self, inicio: str, clave: int):
+        if self._inicio_de.get(clave) == inicio:
+            self._sacar(clave)
+
+    def _hay_solapamiento(self, desde: str, hasta: str) -> bool:
+        nodo = self._raiz
+        while nodo is not None and nodo.max_fin >= desde:
+            if nodo.inicio <= hasta and nodo.fin >= desde:
+                return True
+            izq = nodo.izq
+            if izq is not None and izq.max_fin >= desde:
+                # Si a la izquierda hay un fin >= desde pero ningún solapamiento, ese intervalo
+                # empieza después de `hasta` y los de la derecha (que empiezan más tarde) también
+                nodo = izq
+            elif nodo.inicio > hasta:
+                return False
+            else:
+                nodo = nodo.der
+        return False
+
+    def se_solapa(self, desde: str, hasta: str, excluir: int = None) -> bool:
+        """True si algún intervalo (salvo el de clave `excluir`) cumple inicio <= hasta y fin >= desde."""
+        excluido = self._sacar(excluir) if excluir is not None else None
+        try:
+            return self._hay_solapamiento(desde, hasta)
+        finally:
+            if excluido is not None:
+                self._insertar(excluido)
+
+    def desde(self, fecha: str):
+        """
+        Itera los intervalos que terminan en `fecha` o después, en orden de inicio.
+        Saltea los subárboles cuyo máximo fin es anterior a `fecha`.
+        """
+        pila = []
+        nodo = self._raiz
+        while pila or nodo is not None:
+            while nodo is not None and nodo.max_fin >= fecha:
+                pila.append(nodo)
+                nodo = nodo.izq
+            if not pila:
+                return
+            nodo = pila.pop()
+            if nodo.fin >= fecha:
+                yield nodo.inicio, nodo.fin, nodo.clave
+            nodo = nodo.der
+
+    def items(self):
+        return list(self.desde(""))
+
+
+class IndiceDisponibilidad:
+    """Índice de ocupación por vehículo para alquileres y reservas activas."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._cargado = False
+        self._limpiar()
+
+    def _limpiar(self):
+        # Un alquiler ocupa el vehículo con dos criterios distintos, igual que las consultas SQL:
+        # - al validar alquileres: hasta la fecha de entrega (abierto si no fue entregado)
+        # - al validar reservas: hasta la fecha prevista (abierto si fecha_entrega es NULL)
+        self._alquileres: dict[int, _Intervalos] = {}
+        self._alquileres_para_reservas: dict[int, _Intervalos] = {}
+        self._reservas: dict[int, _Intervalos] = {}
+        self._alquiler_por_id: dict[int, tuple] = {}
+        self._reserva_por_id: dict[int, tuple] = {}
+
+    @property
+    def cargado(self) -> bool:
+        return self._cargado
+
+    # ------------------------------------------------------------------ carga
+
+    def cargar(self, connection_factory=get_connection):
+        """Reconstruye el índice completo desde la base de datos."""
+        with connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id_alquiler, vehiculo_id, estado_alquiler_id, fecha_inicio, fecha_prevista, fecha_entrega "
+                "FROM alquileres WHERE estado_alquiler_id IN (1, 2)"
+            )
+            alquileres = cursor.fetchall()
+            cursor.execute(
+                "SELECT id_reserva, vehiculo_id, estado_reserva_id, fecha_alquiler "
+                "FROM reservas WHERE estado_reserva_id IN (1, 2) AND vehiculo_id IS NOT NULL"
+            )
+            reservas = cursor.fetchall()
+
+        with self._lock:
+            self._limpiar()
+            for fila in alquileres:
+                self._agregar_alquiler(*fila)
+            for fila in reservas:
+                self._agregar_reserva(*fila)
+            self._cargado = True
+
+    def descargar(self):
+        """Vacía el índice; los repositorios vuelven a consultar la base."""
+        with self._lock:
+            self._limpiar()
+            self._cargado = False
+
+    # ------------------------------------------------------------ mantenimiento
+
+    @staticmethod
+    def _intervalos_alquiler(fecha_inicio, fecha_prevista, fecha_entrega) -> tuple[str, str, str]:
+        inicio = _fecha(fecha_inicio)
+        fin = INFINITO if fecha_entrega is None else max(inicio, _fecha(fecha_entrega))
+        fin_para_reservas = INFINITO if fecha_entrega is None else _fecha(fecha_prevista)
+        return inicio, fin, fin_para_reservas
+
+    def _agregar_alquiler(self, id_alquiler, vehiculo_id, estado_id, fecha_inicio, fecha_prevista, fecha_entrega):
+        if estado_id not in ESTADOS_ALQUILER_ACTIVOS or vehiculo_id is None:
+            return
+        inicio, fin, fin_para_reservas = self._intervalos_alquiler(fecha_inicio, fecha_prevista, fecha_entrega)
+        self._alquileres.setdefault(vehiculo_id, _Intervalos()).agregar(inicio, fin, id_alquiler)
+        self._alquileres_para_reservas.setdefault(vehiculo_id, _Intervalos()).agregar(inicio, fin_para_reservas, id_alquiler)
+        self._alquiler_por_id[id_alquiler] = (vehiculo_id, inicio)
+
+    def _agregar_reserva(self, id_reserva, vehiculo_id, estado_id, fecha_alquiler):
+        if estado_id not in ESTADOS_RESERVA_ACTIVOS or vehiculo_id is None:
+            return
+        dia = _fecha(fecha_alquiler)
+        self._reservas.setdefault(vehiculo_id, _Intervalos()).agregar(dia, dia, id_reserva)
+        self._reserva_por_id[id_reserva] = (vehiculo_id, dia)
+
+    def registrar_alquiler(self, id_alquiler: int, vehiculo_id: int, estado_alquiler_id: int,
+                           fecha_inicio, fecha_prevista, fecha_entrega):
+        """Agrega o reemplaza un alquiler (si no está activo solo se quita)."""
+        if not self._cargado:
+            return
+        with self._lock:
+            self._quitar_alquiler(id_alquiler)
+            self._agregar_alquiler(id_alquiler, vehiculo_id, estado_alquiler_id,
+                                   fecha_inicio, fecha_prevista, fecha_entrega)
+
+    def _quitar_alquiler(self, id_alquiler: int):
+        previo = self._alquiler_por_id.pop(id_alquiler, None)
+        if previo:
+            vehiculo_id, inicio = previo
+            self._alquileres[vehiculo_id].quitar(inicio, id_alquiler)
+            self._alquileres_para_reservas[vehiculo_id].quitar(inicio, id_alquiler)
+
+    def quitar_alquiler(self, id_alquiler: int):
+        if not self._cargado:
+            return
+        with self._lock:
+            self._quitar_alquiler(id_alquiler)
+
+    def registrar_reserva(self, id_reserva: int, vehiculo_id: int, estado_reserva_id: int, fecha_alquiler):
+        """Agrega o reemplaza una reserva (si no está activa solo se quita)."""
+        if not self._cargado:
+            return
+        with self._lock:
+            self._quitar_reserva(id_reserva)
+            self._agregar_reserva(id_reserva, vehiculo_id, estado_reserva_id, fecha_alquiler)
+
+    def _quitar_reserva(self, id_reserva: int):
+        previo = self._reserva_por_id.pop(id_reserva, None)
+        if previo:
+            vehiculo_id, dia = previo
+            self._reservas[vehiculo_id].quitar(dia, id_reserva)
+
+    def quitar_reserva(self, id_reserva: int):
+        if not self._cargado:
+            return
+        with self._lock:
+            self._quitar_reserva(id_reserva)
+
+    # ---------------------------------------------------------------- consultas
+
+    def alquiler_disponible(self, vehiculo_id: int, fecha_inicio, fecha_prevista,
+                            excluir_alquiler_id: int = None) -> bool:
+        """Equivalente a AlquilerRepository.verificar_disponibilidad."""
+        with self._lock:
+            intervalos = self._alquileres.get(vehiculo_id)
+            if not intervalos:
+                return True
+            return not intervalos.se_solapa(_fecha(fecha_inicio), _fecha(fecha_prevista), excluir_alquiler_id)
+
+    def reserva_disponible(self, vehiculo_id: int, fecha_alquiler, excluir_reserva_id: int = None) -> bool:
+        """Equivalente a ReservaRepository.verificar_disponibilidad."""
+        dia = _fecha(fecha_alquiler)
+        with self._lock:
+            reservas = self._reservas.get(vehiculo_id)
+            if reservas and reservas.se_solapa(dia, dia, excluir_reserva_id):
+                return False
+            alquileres = self._alquileres_para_reservas.get(vehiculo_id)
+            return not (alquileres and alquileres.se_solapa(dia, dia))
+
+    def vehiculos_libres(self, vehiculo_ids, fecha_inicio, fecha_prevista) -> list[int]:
+        """
+        Filtra los vehículos sin alquileres que se solapen ni reservas dentro del rango.
+        """
+        desde, hasta = _fecha(fecha_inicio), _fecha(fecha_prevista)
+        libres = []
+        with self._lock:
+            for vehiculo_id in vehiculo_ids:
+                alquileres = self._alquileres.get(vehiculo_id)
+                if alquileres and alquileres.se_solapa(desde, hasta):
+                    continue
+                reservas = self._reservas.get(vehiculo_id)
+                if reservas and reservas.se_solapa(desde, hasta):
+                    continue
+                libres.append(vehiculo_id)
+        return libres
+
+    def proximo_hueco(self, vehiculo_id: int, desde, dias: int) -> str | None:
+        """
+        Devuelve la primera fecha de inicio >= `desde` en la que el vehículo queda
+        libre `dias` días seguidos, o None si tiene un alquiler sin fecha de entrega.
+        """
+        candidato = date.fromisoformat(_fecha(desde))
+        duracion = timedelta(days=max(dias, 1) - 1)
+        with self._lock:
+            ocupados = []
+            for indice in (self._alquileres, self._reservas):
+                intervalos = indice.get(vehiculo_id)
+                if intervalos:
+                    ocupados.extend(intervalos.desde(candidato.isoformat()))
+        ocupados.sort()
+
+        for inicio, fin, _ in ocupados:
+            if date.fromisoformat(inicio) > candidato + duracion:
+                break
+            if fin == INFINITO:
+                return None
+            candidato = max(candidato, date.fromisoformat(fin) + timedelta(days=1))
+        return candidato.isoformat()
+
+    # ------------------------------------------------------------- consistencia
+
+    def verificar_consistencia(self, connection_factory=get_connection) -> list[str]:
+        """
+        Compara el índice con un índice reconstruido desde la base.
+
+        Returns:
+            Lista de diferencias encontradas (vacía si el índice está al día)
+        """
+        referencia = IndiceDisponibilidad()
+        referencia.cargar(connection_factory)
+
+        diferencias = []
+        with self._lock:
+            pares = [
+                ("alquileres", self._alquileres, referencia._alquileres),
+                ("alquileres (reservas)", self._alquileres_para_reservas, referencia._alquileres_para_reservas),
+                ("reservas", self._reservas, referencia._reservas),
+            ]
+            for nombre, propio, esperado in pares:
+                for vehiculo_id in set(propio) | set(esperado):
+                    actuales = sorted(propio[vehiculo_id].items()) if vehiculo_id in propio else []
+                    correctos = sorted(esperado[vehiculo_id].items()) if vehiculo_id in esperado else []
+                    if actuales != correctos:
+                        diferencias.append(
+                            f"{nombre} del vehículo {vehiculo_id}: índice={actuales} base={correctos}"
+                        )
+        return diferencias
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "cargado": self._cargado,
+                "vehiculos": len(set(self._alquileres) | set(self._reservas)),
+                "alquileres": len(self._alquiler_por_id),
+                "reservas": len(self._reserva_por_id),
+            }
+
+
+indice_disponibilidad = IndiceDisponibilidad()
@@ -1,6 +1,10 @@
 from app.database.database import get_connection
 from app.models.Mantenimiento import Mantenimiento
 from app.models.Vehiculo import Vehiculo
+from app.repository.CacheReportes import versiones_tablas
+from app.repository.Fechas import normalizar_fecha
+from app.repository.Paginacion import recorrer_por_paginas
+from app.repository.Versionado import ConflictoDeVersion, version_actualizada
 
 
 class MantenimientoRepository:
@@ -8,6 +12,8 @@ class MantenimientoRepository:
         self._connection_factory = connection_factory
 
     def crear(self, mantenimiento: Mantenimiento) -> Mantenimiento:
+        mantenimiento.fecha_programada = normalizar_fecha(mantenimiento.fecha_programada)
+        mantenimiento.fecha_realizada = normalizar_fecha(mantenimiento.fecha_realizada, vacia="")
         query = """
             INSERT INTO mantenimientos (
                 vehiculo_id,
@@ -36,9 +42,79 @@ class MantenimientoRepository:
             cursor = conn.cursor()
             cursor.execute(query, valores)
             conn.commit()
+            versiones_tablas.incrementar("mantenimientos")
             mantenimiento.id_mantenimiento = cursor.lastrowid
+            mantenimiento.version = 1
             return mantenimiento
 
+    def actualizar(self, mantenimiento: Mantenimiento) -> Mantenimiento:
+        """
+        Actualiza un mantenimiento. Si mantenimiento.version no es None, solo si la fila sigue en esa versión.
+
+        Raises:
+            ConflictoDeVersion: Si el mantenimiento cambió o se eliminó desde esa versión
+        """
+        mantenimiento.fecha_programada = normalizar_fecha(mantenimiento.fecha_programada)
+        mantenimiento.fecha_realizada = normalizar_fecha(mantenimiento.fecha_realizada, vacia="")
+        query = """
+            UPDATE mantenimientos
+            SET vehiculo_id = ?, empleado_id = ?, estado_mantenimiento = ?,
+                fecha_programada = ?, fecha_realizada = ?, km = ?,
+                costo = ?, observacion = ?, version = version + 1
+            WHERE id_mantenimiento = ? AND (? IS NULL OR version = ?)
+        """
+        empleado = mantenimiento.empleado
+        valores = (
+            mantenimiento.vehiculo.id_vehiculo if mantenimiento.vehiculo else None,
+            empleado.id_empleado if hasattr(empleado, "id_empleado") else empleado,
+            mantenimiento.estado_mantenimiento,
+            mantenimiento.fecha_programada,
+            mantenimiento.fecha_realizada,
+            mantenimiento.km,
+            mantenimiento.costo,
+            mantenimiento.observacion,
+            mantenimiento.id_mantenimiento,
+            mantenimiento.version,
+            mantenimiento.version,
+        )
+
+        with self._connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, valores)
+            if cursor.rowcount == 0 and mantenimiento.version is not None:
+                raise ConflictoDeVersion("mantenimiento", mantenimiento.id_mantenimiento, mantenimiento.version,
+                                         self.obtener_por_id(mantenimiento.id_mantenimiento))
+            mantenimiento.version = version_actualizada(cursor, "mantenimientos", "id_mantenimiento",
+                                                        mantenimiento.id_mantenimiento, mantenimiento.version)
+            conn.commit()
+            versiones_tablas.incrementar("mantenimientos")
+            return mantenimiento
+
+    @staticmethod
+    def _a_mantenimiento(fila) -> Mantenimiento:
+        vehiculo_asociado = Vehiculo(
+            id_vehiculo=fila["id_vehiculo"],
+            patente=fila["patente"],
+            marca=fila["marca"],
+            modelo=fila["modelo"],
+            anio=None,
+            tarifa_base_dia=None,
+            km_actual=fila["km_actual"]
+        )
+
+        return Mantenimiento(
+            vehiculo=vehiculo_asociado,
+            empleado=None,   # idem con EmpleadoRepository
+            estado_mantenimiento=fila["estado_mantenimiento"],
+            fecha_programada=fila["fecha_programada"],
+            fecha_realizada=fila["fecha_realizada"],
+            km=fila["km"],
+            costo=fila["costo"],
+            observacion=fila["observacion"],
+            id_mantenimiento=fila["id_mantenimiento"],
+            version=fila["version"],
+        )
+
     def obtener_todos(self) -> list[Mantenimiento]:
         query = """ SELECT M.*, V.id_vehiculo, V.patente, V.marca ,V.modelo, V.km_actual FROM mantenimientos M 
         INNER JOIN vehiculos V ON M.vehiculo_id = V.id_vehiculo """
@@ -49,31 +125,45 @@ class MantenimientoRepository:
             mantenimientos: list[Mantenimiento] = []
 
             for fila in filas:
-                vehiculo_asociado = Vehiculo(
-                id_vehiculo=fila["id_vehiculo"],
-                patente=fila["patente"],
-                marca=fila["marca"],
-                modelo=fila["modelo"],
-                anio=None,
-                tarifa_base_dia=None,
-                km_actual=fila["km_actual"]
-            )
-
-                mantenimiento = Mantenimiento(
-                    vehiculo=vehiculo_asociado,
-                    empleado=None,   # idem con EmpleadoRepository
-                    estado_mantenimiento=fila["estado_mantenimiento"],
-                    fecha_programada=fila["fecha_programada"],
-                    fecha_realizada=fila["fecha_realizada"],
-                    km=fila["km"],
-                    costo=fila["costo"],
-                    observacion=fila["observacion"],
-                    id_mantenimiento=fila["id_mantenimiento"],
-                )
-                mantenimientos.append(mantenimiento)
+                mantenimientos.append(self._a_mantenimiento(fila))
 
             return mantenimientos
 
+    def iterar_todos(self):
+        """Recorre todos los mantenimientos de a una página por ID (para respuestas en streaming)."""
+        return recorrer_por_paginas(self._pagina_por_id, desde=0)
+
+    def _pagina_por_id(self, despues_de: int, limite: int) -> tuple[list[Mantenimiento], int]:
+        query = """ SELECT M.*, V.id_vehiculo, V.patente, V.marca ,V.modelo, V.km_actual FROM mantenimientos M
+        INNER JOIN vehiculos V ON M.vehiculo_id = V.id_vehiculo
+        WHERE M.id_mantenimiento > ? ORDER BY M.id_mantenimiento LIMIT ? """
+        with self._connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (despues_de, limite))
+            mantenimientos = [self._a_mantenimiento(fila) for fila in cursor.fetchall()]
+        return mantenimientos, mantenimientos[-1].id_mantenimiento if mantenimientos else None
+
+    def obtener_por_id(self, id_mantenimiento: int) -> Mantenimiento:
+        query = """ SELECT M.*, V.id_vehiculo, V.patente, V.marca ,V.modelo, V.km_actual FROM mantenimientos M
+        INNER JOIN vehiculos V ON M.vehiculo_id = V.id_vehiculo
+        WHERE M.id_mantenimiento = ? """
+        with self._connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (id_mantenimiento,))
+            fila = cursor.fetchone()
+
+            if not fila:
+                return None
+
+            return self._a_mantenimiento(fila)
+
+    def existe(self, id_mantenimiento: int) -> bool:
+        query = "SELECT 1 FROM mantenimientos WHERE id_mantenimiento = ?"
+        with self._connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (id_mantenimiento,))
+            return cursor.fetchone() is not None
+
     def vehiculo_en_mantenimiento(self, vehiculo_id: int) -> bool:
         """Verifica si un vehículo está actualmente en mantenimiento (PROGRAMADO o EN_PROGRESO)"""
         query = """
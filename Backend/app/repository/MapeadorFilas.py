@@ -0,0 +1,167 @@
+"""
+Mapeo compilado de filas de la base a instancias de los modelos.
+
+Hidratar un modelo con Clase(campo=fila["campo"], ...) resuelve cada columna
+por nombre en cada fila y pasa por __init__ con kwargs. Para los listados
+completos, MapeadorFilas genera una vez por consulta (según las columnas del
+cursor) una función que lee la fila por posición y asigna los __slots__ del
+modelo directamente:
+
+    def mapear(fila):
+        objeto = nuevo(Vehiculo)
+        objeto.id_vehiculo = fila[0]
+        objeto.patente = fila[1]
+        ...
+        objeto.habilitado = convertir_habilitado(fila[7])
+        return objeto
+
+Además el cursor devuelve tuplas en lugar de sqlite3.Row, que son más baratas
+de crear y se descartan apenas se mapean.
+
+ProyeccionListado hace lo mismo para los listados que devuelven diccionarios
+(alquileres, reservas): a partir de la especificación de columnas compila una
+vez por combinación de campos el SELECT con sus JOIN y la función que arma el
+diccionario por posición. Los campos calculados (nombre completo, descripción
+del vehículo) son expresiones SQL de la especificación.
+"""
+import threading
+
+from app.repository.Paginacion import validar_campos
+
+
+class MapeadorFilas:
+    """
+    Convierte filas de una consulta en instancias de un modelo sin pasar por __init__.
+
+    Args:
+        clase: Modelo a crear (con __slots__)
+        columnas: atributo del modelo -> columna de la consulta; los atributos que
+            no están acá (y no son fijos) quedan en None
+        conversiones: atributo -> función aplicada al valor de la columna
+        fijos: atributo -> valor constante
+    """
+
+    def __init__(self, clase: type, columnas: dict, conversiones: dict | None = None, fijos: dict | None = None):
+        self.clase = clase
+        self.columnas = dict(columnas)
+        self.conversiones = dict(conversiones or {})
+        self.fijos = dict(fijos or {})
+        self._compilados: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _compilar(self, nombres: tuple):
+        posiciones = {nombre: i for i, nombre in enumerate(nombres)}
+        entorno = {"nuevo": object.__new__, "clase": self.clase}
+        lineas = ["def mapear(fila):", "    objeto = nuevo(clase)"]
+        for atributo in self.clase.__slots__:
+            if atributo in self.columnas:
+                columna = self.columnas[atributo]
+                if columna not in posiciones:
+                    raise ValueError(f"La consulta no devuelve la columna '{columna}' "
+                                     f"para {self.clase.__name__}.{atributo}")
+                valor = f"fila[{posiciones[columna]}]"
+                if atributo in self.conversiones:
+                    entorno[f"convertir_{atributo}"] = self.conversiones[atributo]
+                    valor = f"convertir_{atributo}({valor})"
+            elif atributo in self.fijos:
+                entorno[f"fijo_{atributo}"] = self.fijos[atributo]
+                valor = f"fijo_{atributo}"
+            else:
+                valor = "None"
+            lineas.append(f"    objeto.{atributo} = {valor}")
+        lineas.append("    return objeto")
+        codigo = compile("\n".join(lineas), f"<mapeador {self.clase.__name__}>", "exec")
+        exec(codigo, entorno)
+        return entorno["mapear"]
+
+    def para(self, cursor):
+        """Devuelve la función de mapeo para las columnas del cursor (compilada una sola vez)."""
+        nombres = tuple(d[0] for d in cursor.description)
+        mapear = self._compilados.get(nombres)
+        if mapear is None:
+            with self._lock:
+                mapear = self._compilados.get(nombres)
+                if mapear is None:
+                    mapear = self._compilar(nombres)
+                    self._compilados[nombres] = mapear
+        return mapear
+
+    def mapear_fila(self, cursor, fila):
+        """Mapea una fila ya leída (sqlite3.Row o tupla) del cursor."""
+        return self.para(cursor)(fila)
+
+    def todas(self, cursor, query: str, params=()) -> list:
+        """Ejecuta la consulta y mapea todas las filas."""
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        return list(map(self.para(cursor), cursor.fetchall()))
+
+
+class SeleccionCompilada:
+    """SELECT de un listado para una combinación de campos, con su mapeo por posición."""
+    __slots__ = ("campos", "sql", "mapear", "clave_orden")
+
+    def __init__(self, campos: list[str], sql: str, mapear, clave_orden):
+        self.campos = campos
+        self.sql = sql
+        self.mapear = mapear
+        self.clave_orden = clave_orden
+
+
+class ProyeccionListado:
+    """
+    Especificación declarativa de un listado.
+
+    Args:
+        desde: Tabla principal con su alias (por ejemplo "alquileres a")
+        columnas: campo -> (expresión SQL, alias del JOIN que necesita o None)
+        joins: alias -> cláusula JOIN, en el orden en que se agregan
+        orden: Expresiones de la clave de orden; van al final del SELECT para armar el cursor de paginación
+    """
+
+    MAXIMO_COMPILADAS = 256
+
+    def __init__(self, desde: str, columnas: dict, joins: dict, orden: tuple):
+        self.desde = desde
+        self.columnas = columnas
+        self.joins = joins
+        self.orden = tuple(orden)
+        self._compiladas: dict[tuple, SeleccionCompilada] = {}
+        self._lock = threading.Lock()
+
+    def compilar(self, campos=None) -> SeleccionCompilada:
+        """
+        Devuelve el SELECT y el mapeo para los campos pedidos (compilados una sola vez).
+
+        Raises:
+            ValueError: Si algún campo no existe en la especificación
+        """
+        campos = validar_campos(campos, self.columnas)
+        clave = tuple(campos)
+        seleccion = self._compiladas.get(clave)
+        if seleccion is None:
+            with self._lock:
+                seleccion = self._compiladas.get(clave)
+                if seleccion is None:
+                    seleccion = self._compilar(campos)
+                    # fields viene del pedido: se cachean a lo sumo MAXIMO_COMPILADAS combinaciones
+                    if len(self._compiladas) < self.MAXIMO_COMPILADAS:
+                        self._compiladas[clave] = seleccion
+        return seleccion
+
+    def _compilar(self, campos: list[str]) -> SeleccionCompilada:
+        expresiones = [f"{self.columnas[campo][0]} AS {campo}" for campo in campos]
+        expresiones += [f"{expresion} AS _orden_{i}" for i, expresion in enumerate(self.orden)]
+        necesarios = {self.columnas[campo][1] for campo in campos} - {None}
+        sql = f"SELECT {', '.join(expresiones)} FROM {self.desde}"
+        for alias, join in self.joins.items():
+            if alias in necesarios:
+                sql += " " + join
+
+        cuerpo = ", ".join(f"{campo!r}: fila[{i}]" for i, campo in enumerate(campos))
+        posiciones = ", ".join(f"fila[{len(campos) + i}]" for i in range(len(self.orden)))
+        codigo = (f"def mapear(fila):\n    return {{{cuerpo}}}\n"
+                  f"def clave_orden(fila):\n    return ({posiciones},)\n")
+        entorno = {}
+        exec(compile(codigo, f"<proyeccion {self.desde}>", "exec"), entorno)
+        return SeleccionCompilada(campos, sql, entorno["mapear"], entorno["clave_orden"])
@@ -0,0 +1,425 @@
+"""
+Métricas de la aplicación en el formato de texto de Prometheus.
+
+Los tipos son los de Prometheus:
+- Contador: solo sube (pedidos atendidos, excepciones)
+- Medidor: sube y baja (pedidos en curso, conexiones del pool)
+- Histograma: cuenta observaciones por rango (latencia de los pedidos)
+
+Con un solo proceso los valores viven en memoria. Con varios workers (por ejemplo
+gunicorn -w 4) se define METRICAS_DIR: cada proceso escribe sus valores en archivos
+propios mapeados en memoria (registrar una observación es actualizar 8 bytes) y
+exponer() suma los archivos de todos los procesos, así /metrics da el total sin
+importar qué worker atiende el pedido. Los contadores e histogramas de procesos que
+terminaron se siguen sumando; los valores por proceso (medidores y lo que copian los
+recolectores) solo se suman para los procesos vivos. El directorio se vacía antes de
+iniciar el servidor.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+
+METRICAS_DIR = os.environ.get("METRICAS_DIR", "")
+# Cada cuánto copia un worker sus valores por proceso (pool, caches) a su archivo
+METRICAS_INTERVALO_MUESTRA = float(os.environ.get("METRICAS_INTERVALO_MUESTRA", "1"))
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _numero(valor: float) -> str:
+    if valor != valor or valor in (float("inf"), float("-inf")):
+        return {float("inf"): "+Inf", float("-inf"): "-Inf"}.get(valor, "NaN")
+    return str(int(valor)) if valor == int(valor) else repr(valor)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres, valores, extra: str = "") -> str:
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+# ---------------------------------------------------------------------------
+# Almacenes de valores
+# ---------------------------------------------------------------------------
+
+class _AlmacenMemoria:
+    """Valores de un solo proceso."""
+
+    multiproceso = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores: dict[str, float] = {}
+
+    def sumar(self, clave: str, valor: float, por_proceso: bool = False):
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0.0) + valor
+
+    def fijar(self, clave: str, valor: float, por_proceso: bool = False):
+        with self._lock:
+            self._valores[clave] = valor
+
+    def leer(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._valores)
+
+
+def _alinear(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _entradas(buffer, usado: int):
+    """Recorre las entradas de un archivo de valores: (clave, valor, posición del valor)."""
+    posicion = 8
+    while posicion < usado:
+        largo = struct.unpack_from("I", buffer, posicion)[0]
+        clave = bytes(buffer[posicion + 4:posicion + 4 + largo]).decode("utf-8")
+        posicion_valor = posicion + _alinear(4 + largo)
+        yield clave, struct.unpack_from("d", buffer, posicion_valor)[0], posicion_valor
+        posicion = posicion_valor + 8
+
+
+class _ArchivoValores:
+    """
+    Archivo de pares clave -> double mapeado en memoria.
+
+    Formato: 8 bytes de encabezado con los bytes usados y luego las entradas, cada una
+    con el largo de la clave (4 bytes), la clave en UTF-8 y el valor alineado a 8 bytes.
+    El encabezado se actualiza después de escribir la entrada, así quien lee el archivo
+    desde otro proceso nunca ve una entrada a medio escribir.
+    """
+
+    TAMANIO_INICIAL = 1 << 16
+
+    def __init__(self, ruta: str):
+        open(ruta, "ab").close()
+        self._archivo = open(ruta, "r+b")
+        self._tamanio = os.fstat(self._archivo.fileno()).st_size
+        if self._tamanio < self.TAMANIO_INICIAL:
+            self._archivo.truncate(self.TAMANIO_INICIAL)
+            self._tamanio = self.TAMANIO_INICIAL
+        self._mmap = mmap.mmap(self._archivo.fileno(), self._tamanio)
+        self._usado = struct.unpack_from("I", self._mmap, 0)[0] or 8
+        self._posiciones = {clave: posicion for clave, _, posicion in _entradas(self._mmap, self._usado)}
+
+    def _posicion(self, clave: str) -> int:
+        posicion = self._posiciones.get(clave)
+        if posicion is not None:
+            return posicion
+        codificada = clave.encode("utf-8")
+        largo_entrada = _alinear(4 + len(codificada)) + 8
+        if self._usado + largo_entrada > self._tamanio:
+            self._agrandar(self._usado + largo_entrada)
+        struct.pack_into(f"I{len(codificada)}s", self._mmap, self._usado, len(codificada), codificada)
+        posicion = self._usado + _alinear(4 + len(codificada))
+        struct.pack_into("d", self._mmap, posicion, 0.0)
+        self._usado += largo_entrada
+        struct.pack_into("I", self._mmap, 0, self._usado)
+        self._posiciones[clave] = posicion
+        return posicion
+
+    def _agrandar(self, minimo: int):
+        tamanio = self._tamanio
+        while tamanio < minimo:
+            tamanio *= 2
+        self._mmap.close()
+        self._archivo.truncate(tamanio)
+        self._tamanio = tamanio
+        self._mmap = mmap.mmap(self._archivo.fileno(), tamanio)
+
+    def sumar(self, clave: str, valor: float):
+        posicion = self._posicion(clave)
+        struct.pack_into("d", self._mmap, posicion, struct.unpack_from("d", self._mmap, posicion)[0] + valor)
+
+    def fijar(self, clave: str, valor: float):
+        struct.pack_into("d", self._mmap, self._posicion(clave), valor)
+
+
+def _leer_archivo(ruta: str):
+    with open(ruta, "rb") as archivo:
+        contenido = archivo.read()
+    if len(contenido) < 8:
+        return
+    for clave, valor, _ in _entradas(contenido, struct.unpack_from("I", contenido, 0)[0]):
+        yield clave, valor
+
+
+def _proceso_vivo(pid: int) -> bool:
+    if os.name == "nt":
+        # En Windows os.kill(pid, 0) termina el proceso en lugar de consultarlo
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _AlmacenArchivos:
+    """
+    Valores de varios procesos, un par de archivos por proceso en `directorio`:
+    acumulado_<pid>.db (contadores e histogramas) y proceso_<pid>.db (valores por proceso).
+    """
+
+    multiproceso = True
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._archivos: dict[bool, _ArchivoValores] = {}
+
+    def _archivo(self, por_proceso: bool) -> _ArchivoValores:
+        pid = os.getpid()
+        if pid != self._pid:
+            # Primer uso o worker recién creado con fork: cada proceso escribe sus propios archivos
+            self._pid = pid
+            self._archivos = {}
+        archivo = self._archivos.get(por_proceso)
+        if archivo is None:
+            prefijo = "proceso" if por_proceso else "acumulado"
+            archivo = _ArchivoValores(os.path.join(self.directorio, f"{prefijo}_{pid}.db"))
+            self._archivos[por_proceso] = archivo
+        return archivo
+
+    def sumar(self, clave: str, valor: float, por_proceso: bool = False):
+        with self._lock:
+            self._archivo(por_proceso).sumar(clave, valor)
+
+    def fijar(self, clave: str, valor: float, por_proceso: bool = False):
+        with self._lock:
+            self._archivo(por_proceso).fijar(clave, valor)
+
+    def leer(self) -> dict[str, float]:
+        totales: dict[str, float] = {}
+        for nombre in sorted(os.listdir(self.directorio)):
+            prefijo, _, resto = nombre.partition("_")
+            if not nombre.endswith(".db") or prefijo not in ("acumulado", "proceso"):
+                continue
+            if prefijo == "proceso" and not _proceso_vivo(int(resto[:-3])):
+                continue
+            for clave, valor in _leer_archivo(os.path.join(self.directorio, nombre)):
+                totales[clave] = totales.get(clave, 0.0) + valor
+        return totales
+
+
+# ---------------------------------------------------------------------------
+# Métricas
+# ---------------------------------------------------------------------------
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, almacen, nombre: str, ayuda: str, etiquetas: tuple = (), por_proceso: bool = False):
+        self._almacen = almacen
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.por_proceso = por_proceso
+        self._claves: dict[tuple, str] = {}
+
+    def _clave(self, valores: tuple) -> str:
+        clave = self._claves.get(valores)
+        if clave is None:
+            if len(valores) != len(self.etiquetas):
+                raise ValueError(f"{self.nombre} espera las etiquetas {self.etiquetas}")
+            clave = self._claves[valores] = json.dumps([self.nombre, "", [str(v) for v in valores], None])
+        return clave
+
+    def lineas(self, muestras: dict) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        for (_, valores, _), valor in sorted(muestras.get(self.nombre, {}).items()):
+            lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(valor)}")
+        return lineas
+
+
+class Contador(_Metrica):
+    """Valor que solo sube."""
+
+    tipo = "counter"
+
+    def incrementar(self, *valores, cantidad: float = 1.0):
+        self._almacen.sumar(self._clave(valores), cantidad, self.por_proceso)
+
+    def fijar(self, *valores, valor: float):
+        """Copia un contador que lleva otro objeto (por ejemplo los aciertos de un cache); solo para recolectores."""
+        self._almacen.fijar(self._clave(valores), valor, self.por_proceso)
+
+
+class Medidor(_Metrica):
+    """Valor que sube y baja. Con varios procesos se suman los de los procesos vivos."""
+
+    tipo = "gauge"
+
+    def __init__(self, almacen, nombre, ayuda, etiquetas=(), por_proceso=True):
+        super().__init__(almacen, nombre, ayuda, etiquetas, por_proceso)
+
+    def incrementar(self, *valores, cantidad: float = 1.0):
+        self._almacen.sumar(self._clave(valores), cantidad, self.por_proceso)
+
+    def decrementar(self, *valores, cantidad: float = 1.0):
+        self._almacen.sumar(self._clave(valores), -cantidad, self.por_proceso)
+
+    def fijar(self, *valores, valor: float):
+        self._almacen.fijar(self._clave(valores), valor, self.por_proceso)
+
+
+class Histograma(_Metrica):
+    """Cantidad de observaciones por bucket, más su suma y su cantidad."""
+
+    tipo = "histogram"
+
+    def __init__(self, almacen, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(almacen, nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        self._claves_histograma: dict[tuple, tuple] = {}
+
+    def _claves_de(self, valores: tuple) -> tuple:
+        claves = self._claves_histograma.get(valores)
+        if claves is None:
+            if len(valores) != len(self.etiquetas):
+                raise ValueError(f"{self.nombre} espera las etiquetas {self.etiquetas}")
+            texto = [str(v) for v in valores]
+            # Se guarda la cantidad de cada bucket (el índice; len(buckets) es +Inf) y se acumula al exponer
+            claves = self._claves_histograma[valores] = (
+                [json.dumps([self.nombre, "_bucket", texto, i]) for i in range(len(self.buckets) + 1)],
+                json.dumps([self.nombre, "_sum", texto, None]),
+                json.dumps([self.nombre, "_count", texto, None]),
+            )
+        return claves
+
+    def observar(self, valor: float, *valores):
+        buckets, suma, cantidad = self._claves_de(valores)
+        self._almacen.sumar(buckets[bisect_left(self.buckets, valor)], 1.0)
+        self._almacen.sumar(suma, valor)
+        self._almacen.sumar(cantidad, 1.0)
+
+    def lineas(self, muestras: dict) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        series: dict[tuple, dict] = {}
+        for (sufijo, valores, indice), valor in muestras.get(self.nombre, {}).items():
+            serie = series.setdefault(valores, {"_bucket": {}, "_sum": 0.0, "_count": 0.0})
+            if sufijo == "_bucket":
+                serie["_bucket"][indice] = valor
+            else:
+                serie[sufijo] = valor
+        limites = [_numero(b) for b in self.buckets] + ["+Inf"]
+        for valores, serie in sorted(series.items()):
+            acumulado = 0.0
+            for indice, limite in enumerate(limites):
+                acumulado += serie["_bucket"].get(indice, 0.0)
+                etiquetas = _etiquetas(self.etiquetas, valores, f'le="{limite}"')
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {_numero(acumulado)}")
+            etiquetas = _etiquetas(self.etiquetas, valores)
+            lineas.append(f"{self.nombre}_sum{etiquetas} {_numero(serie['_sum'])}")
+            lineas.append(f"{self.nombre}_count{etiquetas} {_numero(serie['_count'])}")
+        return lineas
+
+
+class Proporcion(_Metrica):
+    """
+    Medidor calculado al exponer: aciertos / (aciertos + fallos) con los totales de
+    todos los procesos (promediar las proporciones de cada worker daría otro número).
+    """
+
+    tipo = "gauge"
+
+    def __init__(self, almacen, nombre, ayuda, aciertos: _Metrica, fallos: _Metrica):
+        super().__init__(almacen, nombre, ayuda, aciertos.etiquetas)
+        self._aciertos = aciertos
+        self._fallos = fallos
+
+    def lineas(self, muestras: dict) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        fallos = {valores: valor for (_, valores, _), valor in muestras.get(self._fallos.nombre, {}).items()}
+        for (_, valores, _), aciertos in sorted(muestras.get(self._aciertos.nombre, {}).items()):
+            total = aciertos + fallos.get(valores, 0.0)
+            proporcion = aciertos / total if total else 0.0
+            lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(round(proporcion, 4))}")
+        return lineas
+
+
+class RegistroMetricas:
+    """
+    Métricas declaradas y recolectores que copian valores que llevan otros objetos
+    (pool de conexiones, caches) justo antes de exponerlos.
+
+    Args:
+        directorio: Carpeta compartida entre procesos; vacío para guardar los valores en memoria
+    """
+
+    def __init__(self, directorio: str = METRICAS_DIR):
+        self._almacen = _AlmacenArchivos(directorio) if directorio else _AlmacenMemoria()
+        self._lock = threading.Lock()
+        self._metricas: dict[str, _Metrica] = {}
+        self._recolectores: list = []
+        self._ultima_muestra = 0.0
+
+    @property
+    def multiproceso(self) -> bool:
+        return self._almacen.multiproceso
+
+    def _declarar(self, clase, nombre: str, *args, **kwargs):
+        # Declarar de nuevo una métrica (create_app llamado más de una vez) devuelve la existente
+        with self._lock:
+            metrica = self._metricas.get(nombre)
+            if metrica is None:
+                metrica = self._metricas[nombre] = clase(self._almacen, nombre, *args, **kwargs)
+            elif not isinstance(metrica, clase):
+                raise ValueError(f"La métrica {nombre} ya existe con otro tipo")
+            return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: tuple = (), por_proceso: bool = False) -> Contador:
+        return self._declarar(Contador, nombre, ayuda, etiquetas, por_proceso)
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: tuple = ()) -> Medidor:
+        return self._declarar(Medidor, nombre, ayuda, etiquetas)
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: tuple = (), buckets=BUCKETS_LATENCIA) -> Histograma:
+        return self._declarar(Histograma, nombre, ayuda, etiquetas, buckets)
+
+    def proporcion(self, nombre: str, ayuda: str, aciertos: _Metrica, fallos: _Metrica) -> Proporcion:
+        return self._declarar(Proporcion, nombre, ayuda, aciertos, fallos)
+
+    def registrar_recolector(self, recolector):
+        """`recolector()` se llama antes de exponer (y, con varios procesos, periódicamente en cada worker)."""
+        with self._lock:
+            if recolector not in self._recolectores:
+                self._recolectores.append(recolector)
+
+    def recolectar(self):
+        self._ultima_muestra = time.monotonic()
+        for recolector in list(self._recolectores):
+            recolector()
+
+    def muestrear(self):
+        """Con varios procesos, copia los valores por proceso a lo sumo cada METRICAS_INTERVALO_MUESTRA segundos."""
+        if self.multiproceso and time.monotonic() - self._ultima_muestra >= METRICAS_INTERVALO_MUESTRA:
+            self.recolectar()
+
+    def exponer(self) -> str:
+        """Todas las métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+        self.recolectar()
+        muestras: dict[str, dict] = {}
+        for clave, valor in self._almacen.leer().items():
+            nombre, sufijo, valores, indice = json.loads(clave)
+            muestras.setdefault(nombre, {})[(sufijo, tuple(valores), indice)] = valor
+        lineas = []
+        for metrica in list(self._metricas.values()):
+            lineas.extend(metrica.lineas(muestras))
+        return "\n".join(lineas) + "\n"
+
+
+metricas = RegistroMetricas()
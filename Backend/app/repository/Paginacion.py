@@ -0,0 +1,84 @@
+"""
+Utilidades para paginación por cursor (keyset) y proyección de campos.
+
+El cursor es opaco para el cliente: codifica los valores de la clave de orden
+de la última fila devuelta, así la página siguiente se pide con una condición
+de rango sobre un índice en lugar de OFFSET.
+"""
+import base64
+import binascii
+import json
+
+LIMITE_MAXIMO = 1000
+
+# Filas que lee cada consulta al recorrer un listado completo (respuestas en streaming)
+FILAS_POR_LECTURA = 500
+
+
+def codificar_cursor(*valores) -> str:
+    """Codifica los valores de la clave de orden en un cursor opaco."""
+    crudo = json.dumps(list(valores), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, cantidad: int) -> tuple:
+    """
+    Decodifica un cursor generado por codificar_cursor.
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise ValueError("Cursor de paginación inválido")
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise ValueError("Cursor de paginación inválido")
+    return tuple(valores)
+
+
+def recorrer_por_paginas(leer_pagina, desde=None, tamanio: int = FILAS_POR_LECTURA):
+    """
+    Recorre un listado completo de a una página por la clave de orden (keyset).
+
+    Cada página es una consulta con LIMIT que devuelve la conexión al pool antes de
+    entregar sus filas: quien consume despacio (una respuesta en streaming hacia un
+    cliente lento) no retiene una conexión ni una lectura abierta sobre la base.
+
+    Args:
+        leer_pagina: Función (despues_de, limite) -> (elementos, clave de orden del último)
+        desde: Clave desde la que empieza la primera página (None: desde el principio)
+        tamanio: Filas por página
+    """
+    despues_de = desde
+    while True:
+        elementos, despues_de = leer_pagina(despues_de, tamanio)
+        yield from elementos
+        if len(elementos) < tamanio:
+            return
+
+
+def validar_limite(limite: int) -> int:
+    """Valida el tamaño de página pedido."""
+    if limite < 1 or limite > LIMITE_MAXIMO:
+        raise ValueError(f"El parámetro limit debe estar entre 1 y {LIMITE_MAXIMO}")
+    return limite
+
+
+def validar_campos(campos, disponibles) -> list[str]:
+    """
+    Valida la lista de campos pedidos (fields=a,b,c) contra los disponibles.
+
+    Returns:
+        Lista de campos en el orden pedido, o todos los disponibles si no se pidió ninguno
+    """
+    if not campos:
+        return list(disponibles)
+    if isinstance(campos, str):
+        campos = [c.strip() for c in campos.split(",") if c.strip()]
+    desconocidos = [c for c in campos if c not in disponibles]
+    if desconocidos:
+        raise ValueError(f"Campos no válidos: {', '.join(desconocidos)}. "
+                         f"Opciones: {', '.join(disponibles)}")
+    return list(dict.fromkeys(campos))
@@ -1,5 +1,20 @@
 from app.database.database import get_connection
 from app.models.Pago import Pago
+from app.repository.CacheReportes import versiones_tablas
+from app.repository.MapeadorFilas import MapeadorFilas
+
+# alquiler y empleado quedan en None: se cargan con sus repositorios
+MAPEADOR_PAGO = MapeadorFilas(
+    Pago,
+    {
+        "id_pago": "id_pago",
+        "metodo": "metodo",
+        "fecha": "fecha",
+        "monto": "monto",
+        "descripcion": "descripcion",
+        "actualizado_en": "actualizado_en",
+    },
+)
 
 
 class PagoRepository:
@@ -13,7 +28,7 @@ class PagoRepository:
                 alquiler_id,
                 empleado_id,
                 metodo,
-                fecha_pago,
+                fecha,
                 monto,
                 descripcion,
                 actualizado_en
@@ -34,6 +49,7 @@ class PagoRepository:
             cursor = conn.cursor()
             cursor.execute(query, valores)
             conn.commit()
+            versiones_tablas.incrementar("pagos")
             pago.id_pago = cursor.lastrowid  # guardar el ID generado
             return pago
 
@@ -41,22 +57,4 @@ class PagoRepository:
     def obtener_todos(self) -> list[Pago]:
         query = "SELECT * FROM pagos"
         with self._connection_factory() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            filas = cursor.fetchall()
-            pagos: list[Pago] = []
-
-            for fila in filas:
-                pago = Pago(
-                    id_pago=fila["id_pago"],
-                    alquiler=None,   # luego podés cargar el alquiler con otro repo
-                    empleado=None,   # idem empleado
-                    metodo=fila["metodo"],
-                    fecha=fila["fecha_pago"],
-                    monto=fila["monto"],
-                    descripcion=fila["descripcion"],
-                    actualizado_en=fila["actualizado_en"],
-                )
-                pagos.append(pago)
-
-            return pagos
+            return MAPEADOR_PAGO.todas(conn.cursor(), query)
@@ -1,13 +1,86 @@
-from app.database.database import get_connection
+from app.database.database import al_confirmar, get_connection
 from app.models.Reserva import Reserva
+from app.repository.IndiceDisponibilidad import indice_disponibilidad
+from app.repository.Paginacion import codificar_cursor, decodificar_cursor, recorrer_por_paginas, validar_limite
+from app.repository.MapeadorFilas import ProyeccionListado, SeleccionCompilada
+from app.repository.CacheReportes import versiones_tablas
+from app.repository.Fechas import normalizar_fecha
+from app.repository.Versionado import ConflictoDeVersion, version_actualizada
+
+# Campos disponibles en los listados: campo -> (expresión SQL, alias del JOIN que necesita)
+COLUMNAS_RESERVA = {
+    "id_reserva": ("r.id_reserva", None),
+    "cliente_id": ("r.cliente_id", None),
+    "cliente_nombre_completo": (
+        "CASE WHEN c.nombre IS NOT NULL AND c.nombre != '' THEN c.nombre || ' ' || c.apellido ELSE 'N/A' END", "c"),
+    "cliente_dni": ("c.dni", "c"),
+    "vehiculo_id": ("r.vehiculo_id", None),
+    "vehiculo_descripcion": (
+        "CASE WHEN v.marca IS NOT NULL AND v.marca != '' "
+        "THEN v.marca || ' ' || v.modelo || ' - ' || v.patente ELSE 'N/A' END", "v"),
+    "empleado_id": ("r.empleado_id", None),
+    "estado_reserva_id": ("r.estado_reserva_id", None),
+    "estado_nombre": ("er.codigo", "er"),
+    "fecha_reserva": ("r.fecha_reserva", None),
+    "fecha_alquiler": ("r.fecha_alquiler", None),
+    "senia_monto": ("r.senia_monto", None),
+    "actualizado_en": ("r.actualizado_en", None),
+    "version": ("r.version", None),
+}
+
+JOINS_RESERVA = {
+    "c": "LEFT JOIN clientes c ON r.cliente_id = c.id_cliente",
+    "v": "LEFT JOIN vehiculos v ON r.vehiculo_id = v.id_vehiculo",
+    "er": "LEFT JOIN estados_reserva er ON r.estado_reserva_id = er.id_estado_reserva",
+}
+
+PROYECCION_RESERVA = ProyeccionListado(
+    "reservas r", COLUMNAS_RESERVA, JOINS_RESERVA, orden=("r.fecha_reserva", "r.id_reserva")
+)
 
 
 class ReservaRepository:
-    def __init__(self, connection_factory=get_connection):
+    def __init__(self, connection_factory=get_connection, indice=indice_disponibilidad, consultar_indice: bool = True):
         self._connection_factory = connection_factory
+        self._indice = indice
+        # Dentro de una transacción de escritura la verificación va siempre a la base (ver UnidadDeTrabajo)
+        self._consultar_indice = consultar_indice
+
+    def actualizar_indice(self, reserva: Reserva):
+        """Refleja en el índice de disponibilidad una reserva creada o modificada."""
+        if self._indice is not None:
+            datos = (reserva.id_reserva, reserva.vehiculo_id, reserva.estado_reserva_id, reserva.fecha_alquiler)
+            al_confirmar(lambda: self._indice.registrar_reserva(*datos))
+
+    def quitar_del_indice(self, id_reserva: int):
+        """Quita del índice de disponibilidad una reserva eliminada."""
+        if self._indice is not None:
+            al_confirmar(lambda: self._indice.quitar_reserva(id_reserva))
+
+    @staticmethod
+    def _a_reserva(fila) -> Reserva:
+        return Reserva(
+            cliente=fila["cliente_id"],
+            vehiculo=fila["vehiculo_id"],
+            empleado=fila["empleado_id"],
+            estado_reserva=fila["estado_reserva_id"],
+            fecha_reserva=fila["fecha_reserva"],
+            fecha_alquiler=fila["fecha_alquiler"],
+            senia_monto=fila["senia_monto"],
+            actualizado_en=fila["actualizado_en"],
+            id_reserva=fila["id_reserva"],
+            version=fila["version"],
+        )
+
+    @staticmethod
+    def normalizar_fechas(reserva: Reserva):
+        """Lleva las fechas de la reserva al formato canónico de la base (ver Fechas)."""
+        reserva.fecha_reserva = normalizar_fecha(reserva.fecha_reserva)
+        reserva.fecha_alquiler = normalizar_fecha(reserva.fecha_alquiler)
 
     # CREATE
     def crear(self, reserva: Reserva) -> Reserva:
+        self.normalizar_fechas(reserva)
         query = """
             INSERT INTO reservas (
                 cliente_id,
@@ -37,82 +110,92 @@ class ReservaRepository:
             cursor = conn.cursor()
             cursor.execute(query, valores)
             conn.commit()
+            versiones_tablas.incrementar("reservas")
             reserva.id_reserva = cursor.lastrowid  # guardar el ID generado
+            reserva.version = 1
+            self.actualizar_indice(reserva)
+            return reserva
+
+    # UPDATE
+    def actualizar(self, reserva: Reserva) -> Reserva:
+        """
+        Actualiza una reserva. Si reserva.version no es None, solo si la fila sigue en esa versión.
+
+        Raises:
+            ConflictoDeVersion: Si la reserva cambió o se eliminó desde esa versión
+        """
+        self.normalizar_fechas(reserva)
+        query = """
+            UPDATE reservas
+            SET cliente_id = ?, vehiculo_id = ?, empleado_id = ?,
+                estado_reserva_id = ?, fecha_reserva = ?, fecha_alquiler = ?,
+                senia_monto = ?, actualizado_en = ?, version = version + 1
+            WHERE id_reserva = ? AND (? IS NULL OR version = ?)
+        """
+        valores = (
+            reserva.cliente_id,
+            reserva.vehiculo_id,
+            reserva.empleado_id,
+            reserva.estado_reserva_id,
+            reserva.fecha_reserva,
+            reserva.fecha_alquiler,
+            reserva.senia_monto,
+            reserva.actualizado_en,
+            reserva.id_reserva,
+            reserva.version,
+            reserva.version,
+        )
+
+        with self._connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, valores)
+            if cursor.rowcount == 0 and reserva.version is not None:
+                raise ConflictoDeVersion("reserva", reserva.id_reserva, reserva.version,
+                                         self.obtener_por_id(reserva.id_reserva))
+            reserva.version = version_actualizada(cursor, "reservas", "id_reserva", reserva.id_reserva,
+                                                  reserva.version)
+            conn.commit()
+            versiones_tablas.incrementar("reservas")
+            self.actualizar_indice(reserva)
             return reserva
 
     # READ: obtener todos
     def obtener_todos(self) -> list[dict]:
         """Obtiene todas las reservas con información completa de cliente y vehículo"""
-        query = """
-            SELECT
-                r.*,
-                c.nombre as cliente_nombre,
-                c.apellido as cliente_apellido,
-                c.dni as cliente_dni,
-                v.patente as vehiculo_patente,
-                v.marca as vehiculo_marca,
-                v.modelo as vehiculo_modelo,
-                er.codigo as estado_nombre
-            FROM reservas r
-            LEFT JOIN clientes c ON r.cliente_id = c.id_cliente
-            LEFT JOIN vehiculos v ON r.vehiculo_id = v.id_vehiculo
-            LEFT JOIN estados_reserva er ON r.estado_reserva_id = er.id_estado_reserva
-            ORDER BY r.fecha_reserva DESC
-        """
+        return self.obtener_con_filtros()
+
+    def obtener_por_id(self, id_reserva: int) -> Reserva:
+        query = "SELECT * FROM reservas WHERE id_reserva = ?"
         with self._connection_factory() as conn:
             cursor = conn.cursor()
-            cursor.execute(query)
-            filas = cursor.fetchall()
-            reservas = []
-
-            for fila in filas:
-                reserva_dict = {
-                    "id_reserva": fila["id_reserva"],
-                    "cliente_id": fila["cliente_id"],
-                    "cliente_nombre_completo": f"{fila['cliente_nombre']} {fila['cliente_apellido']}" if fila['cliente_nombre'] else "N/A",
-                    "cliente_dni": fila["cliente_dni"],
-                    "vehiculo_id": fila["vehiculo_id"],
-                    "vehiculo_descripcion": f"{fila['vehiculo_marca']} {fila['vehiculo_modelo']} - {fila['vehiculo_patente']}" if fila['vehiculo_marca'] else "N/A",
-                    "empleado_id": fila["empleado_id"],
-                    "estado_reserva_id": fila["estado_reserva_id"],
-                    "estado_nombre": fila["estado_nombre"],
-                    "fecha_reserva": fila["fecha_reserva"],
-                    "fecha_alquiler": fila["fecha_alquiler"],
-                    "senia_monto": fila["senia_monto"],
-                    "actualizado_en": fila["actualizado_en"]
-                }
-                reservas.append(reserva_dict)
-
-            return reservas
-
-    def obtener_con_filtros(self, estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None) -> list[dict]:
+            cursor.execute(query, (id_reserva,))
+            fila = cursor.fetchone()
+
+            if not fila:
+                return None
+
+            return self._a_reserva(fila)
+
+    def existe(self, id_reserva: int) -> bool:
+        query = "SELECT 1 FROM reservas WHERE id_reserva = ?"
+        with self._connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (id_reserva,))
+            return cursor.fetchone() is not None
+
+    def _armar_consulta(self, estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None,
+                        campos=None, limite: int = None, despues_de: tuple = None) -> tuple[str, list, SeleccionCompilada]:
         """
-        Obtiene reservas con filtros opcionales de estado y rango de fechas.
+        Arma la consulta de reservas con filtros, proyección y paginación por cursor.
 
-        Args:
-            estado_id: ID del estado de reserva para filtrar
-            fecha_desde: Fecha de inicio del rango (formato: YYYY-MM-DD)
-            fecha_hasta: Fecha de fin del rango (formato: YYYY-MM-DD)
+        Solo se seleccionan las columnas pedidas y solo se hacen los JOIN que esas
+        columnas necesitan. El orden es (fecha_reserva, id_reserva) descendente.
 
         Returns:
-            Lista de diccionarios con información de reservas filtradas
-        """
-        query = """
-            SELECT
-                r.*,
-                c.nombre as cliente_nombre,
-                c.apellido as cliente_apellido,
-                c.dni as cliente_dni,
-                v.patente as vehiculo_patente,
-                v.marca as vehiculo_marca,
-                v.modelo as vehiculo_modelo,
-                er.codigo as estado_nombre
-            FROM reservas r
-            LEFT JOIN clientes c ON r.cliente_id = c.id_cliente
-            LEFT JOIN vehiculos v ON r.vehiculo_id = v.id_vehiculo
-            LEFT JOIN estados_reserva er ON r.estado_reserva_id = er.id_estado_reserva
-            WHERE 1=1
+            Tupla (query, parámetros, selección compilada con su mapeo)
         """
+        seleccion = PROYECCION_RESERVA.compilar(campos)
+        query = seleccion.sql + " WHERE 1=1"
 
         params = []
 
@@ -121,46 +204,106 @@ class ReservaRepository:
             params.append(estado_id)
 
         if fecha_desde is not None:
-            query += " AND date(r.fecha_alquiler) >= date(?)"
+            query += " AND r.fecha_alquiler >= date(?)"
             params.append(fecha_desde)
 
         if fecha_hasta is not None:
-            query += " AND date(r.fecha_alquiler) <= date(?)"
+            query += " AND r.fecha_alquiler <= date(?)"
             params.append(fecha_hasta)
 
-        query += " ORDER BY r.fecha_reserva DESC"
+        if despues_de is not None:
+            query += " AND (r.fecha_reserva, r.id_reserva) < (?, ?)"
+            params.extend(despues_de)
+
+        query += " ORDER BY r.fecha_reserva DESC, r.id_reserva DESC"
+
+        if limite is not None:
+            query += " LIMIT ?"
+            params.append(limite)
+
+        return query, params, seleccion
+
+    def _consulta_filtrada(self, estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None,
+                           campos=None, limite: int = None, despues_de: tuple = None) -> tuple[list[dict], tuple]:
+        """
+        Ejecuta la consulta armada por _armar_consulta.
+
+        Returns:
+            Tupla (reservas, clave de orden de la última fila o None)
+        """
+        query, params, seleccion = self._armar_consulta(estado_id, fecha_desde, fecha_hasta, campos, limite, despues_de)
 
         with self._connection_factory() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = None
             cursor.execute(query, params)
             filas = cursor.fetchall()
-            reservas = []
-
-            for fila in filas:
-                reserva_dict = {
-                    "id_reserva": fila["id_reserva"],
-                    "cliente_id": fila["cliente_id"],
-                    "cliente_nombre_completo": f"{fila['cliente_nombre']} {fila['cliente_apellido']}" if fila['cliente_nombre'] else "N/A",
-                    "cliente_dni": fila["cliente_dni"],
-                    "vehiculo_id": fila["vehiculo_id"],
-                    "vehiculo_descripcion": f"{fila['vehiculo_marca']} {fila['vehiculo_modelo']} - {fila['vehiculo_patente']}" if fila['vehiculo_marca'] else "N/A",
-                    "empleado_id": fila["empleado_id"],
-                    "estado_reserva_id": fila["estado_reserva_id"],
-                    "estado_nombre": fila["estado_nombre"],
-                    "fecha_reserva": fila["fecha_reserva"],
-                    "fecha_alquiler": fila["fecha_alquiler"],
-                    "senia_monto": fila["senia_monto"],
-                    "actualizado_en": fila["actualizado_en"]
-                }
-                reservas.append(reserva_dict)
-
-            return reservas
+
+        reservas = list(map(seleccion.mapear, filas))
+        ultima_clave = seleccion.clave_orden(filas[-1]) if filas else None
+        return reservas, ultima_clave
+
+    def obtener_con_filtros(self, estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None,
+                            campos=None) -> list[dict]:
+        """
+        Obtiene reservas con filtros opcionales de estado y rango de fechas.
+
+        Args:
+            estado_id: ID del estado de reserva para filtrar
+            fecha_desde: Fecha de inicio del rango (formato: YYYY-MM-DD)
+            fecha_hasta: Fecha de fin del rango (formato: YYYY-MM-DD)
+            campos: Campos a devolver (lista o "a,b,c"); todos si no se indica
+
+        Returns:
+            Lista de diccionarios con información de reservas filtradas
+        """
+        reservas, _ = self._consulta_filtrada(estado_id, fecha_desde, fecha_hasta, campos)
+        return reservas
+
+    def iterar_con_filtros(self, estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None,
+                           campos=None):
+        """
+        Igual que obtener_con_filtros pero de a una página por cursor (para respuestas en streaming).
+
+        Los filtros y campos se validan al llamarla, antes de empezar a escribir la respuesta.
+        Entre página y página la conexión vuelve al pool (ver recorrer_por_paginas).
+        """
+        self._armar_consulta(estado_id, fecha_desde, fecha_hasta, campos)
+        return recorrer_por_paginas(lambda despues_de, limite: self._consulta_filtrada(
+            estado_id, fecha_desde, fecha_hasta, campos, limite, despues_de
+        ))
+
+    def obtener_pagina(self, limite: int, cursor: str = None, estado_id: int = None, fecha_desde: str = None,
+                       fecha_hasta: str = None, campos=None) -> tuple[list[dict], str]:
+        """
+        Obtiene una página de reservas usando paginación por cursor (keyset).
+
+        Args:
+            limite: Cantidad máxima de reservas a devolver
+            cursor: Cursor devuelto por la página anterior (None para la primera)
+            estado_id, fecha_desde, fecha_hasta, campos: Igual que obtener_con_filtros
+
+        Returns:
+            Tupla (reservas, cursor de la página siguiente o None si no hay más)
+        """
+        limite = validar_limite(limite)
+        despues_de = decodificar_cursor(cursor, 2) if cursor else None
+        reservas, ultima_clave = self._consulta_filtrada(
+            estado_id, fecha_desde, fecha_hasta, campos, limite, despues_de
+        )
+        siguiente = codificar_cursor(*ultima_clave) if len(reservas) == limite else None
+        return reservas, siguiente
 
     def verificar_disponibilidad(self, vehiculo_id: int, fecha_alquiler: str, excluir_reserva_id: int = None) -> bool:
         """
         Verifica si un vehículo está disponible para una fecha de alquiler específica.
         Retorna True si está disponible, False si ya está reservado o alquilado.
+        Si el índice de disponibilidad está cargado se responde sin consultar la base,
+        salvo en los repositorios de una unidad de trabajo (consultar_indice=False).
         """
+        if self._consultar_indice and self._indice is not None and self._indice.cargado:
+            return self._indice.reserva_disponible(vehiculo_id, fecha_alquiler, excluir_reserva_id)
+
         query = """
             SELECT COUNT(*) as count FROM (
                 -- Verificar reservas existentes para la misma fecha
@@ -176,8 +319,8 @@ class ReservaRepository:
                 SELECT 1 FROM alquileres
                 WHERE vehiculo_id = ?
                 AND estado_alquiler_id IN (1, 2)  -- PENDIENTE (1) o ACTIVO (2)
-                AND date(fecha_inicio) <= date(?)
-                AND (fecha_entrega IS NULL OR date(fecha_prevista) >= date(?))
+                AND fecha_inicio <= date(?)
+                AND (fecha_entrega IS NULL OR fecha_prevista >= date(?))
             ) AS conflictos
         """
 
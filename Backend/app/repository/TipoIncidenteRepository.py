@@ -1,5 +1,6 @@
 from app.database.database import get_connection
 from app.models.TipoIncidente import TipoIncidente
+from app.repository.CacheReportes import versiones_tablas
 
 class TipoIncidenteRepository:
     def __init__(self, connection_factory=get_connection):
@@ -18,6 +19,7 @@ class TipoIncidenteRepository:
             cursor = conn.cursor()
             cursor.execute(query, valores)
             conn.commit()
+            versiones_tablas.incrementar("tipos_incidente")
             tipo_incidente.id_tipo_incidente = cursor.lastrowid
             return tipo_incidente
 
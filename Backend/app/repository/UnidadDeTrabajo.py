@@ -0,0 +1,191 @@
+"""
+Unidad de trabajo con mapa de identidad para los services.
+
+Un service que valida varias entidades y después escribe (crear un alquiler,
+crear una reserva) usa una sola conexión y una sola transacción para todo:
+
+    with UnidadDeTrabajo() as uow:
+        cliente = uow.obtener(Cliente, data["cliente_id"])
+        vehiculo = uow.obtener(Vehiculo, data["vehiculo_id"])
+        ...
+        uow.alquileres.crear(alquiler)
+
+- Los repositorios de la unidad comparten la conexión; sus commit() no hacen
+  nada y la unidad confirma todo junto al salir (o hace rollback si hubo una
+  excepción), así validar e insertar es atómico.
+- El mapa de identidad carga cada entidad a lo sumo una vez por unidad: pedir
+  dos veces el mismo cliente devuelve el mismo objeto sin volver a la base.
+- Las acciones registradas con al_confirmar() (versiones del cache de
+  reportes, índice de disponibilidad) se ejecutan recién después del commit.
+- Si ya hay una unidad abierta en el thread, una unidad anidada se suma a ella
+  y la que confirma es la de afuera.
+- Con inmediata=True la transacción arranca con BEGIN IMMEDIATE: toma el lock
+  de escritura de la base antes de la primera lectura, así ningún otro proceso
+  puede escribir entre la verificación y el INSERT (ver BloqueosVehiculos).
+- Los repositorios de la unidad verifican disponibilidad siempre en SQL, dentro
+  de la transacción: el índice de disponibilidad es por proceso y no ve las
+  altas de otros workers. Igual lo mantienen al confirmar.
+"""
+import threading
+from contextlib import contextmanager
+
+from app.database.database import acciones_al_confirmar, get_connection
+from app.models.Alquiler import Alquiler
+from app.models.Cliente import Cliente
+from app.models.Mantenimiento import Mantenimiento
+from app.models.Reserva import Reserva
+from app.models.Vehiculo import Vehiculo
+from app.repository.Alquiler import AlquilerRepository
+from app.repository.ClienteRepository import ClienteRepository
+from app.repository.MantenimientoRepository import MantenimientoRepository
+from app.repository.ReservaRepository import ReservaRepository
+from app.repository.VehiculoRepository import VehiculoRepository
+
+# Repositorio que carga cada modelo por ID para el mapa de identidad
+REPOSITORIO_DE = {
+    Alquiler: AlquilerRepository,
+    Cliente: ClienteRepository,
+    Mantenimiento: MantenimientoRepository,
+    Reserva: ReservaRepository,
+    Vehiculo: VehiculoRepository,
+}
+
+# Repositorios que verifican disponibilidad: en la unidad la verificación es la que
+# decide el alta, así que va a la base (el índice de otro proceso puede estar atrasado)
+OPCIONES_DE = {
+    AlquilerRepository: {"consultar_indice": False},
+    ReservaRepository: {"consultar_indice": False},
+}
+
+_local = threading.local()
+
+
+class _ConexionDeLaUnidad:
+    """Conexión compartida por los repositorios de una unidad: el commit lo hace la unidad."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        pass
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+
+class UnidadDeTrabajo:
+    """
+    Conexión, transacción y mapa de identidad compartidos durante un service.
+
+    Args:
+        connection_factory: Fábrica de conexiones (por defecto el pool)
+        inmediata: Tomar el lock de escritura de la base al empezar (BEGIN IMMEDIATE)
+    """
+
+    def __init__(self, connection_factory=get_connection, inmediata: bool = False):
+        self._connection_factory = connection_factory
+        self.inmediata = inmediata
+        self._externa = None
+        self._conn = None
+        self._repositorios = {}
+        self._identidades = {}
+
+    @staticmethod
+    def actual():
+        """Devuelve la unidad abierta en el thread, o None."""
+        return getattr(_local, "unidad", None)
+
+    def __enter__(self):
+        externa = self.actual()
+        if externa is not None:
+            self._externa = externa
+            self._conn = externa._conn
+            self._repositorios = externa._repositorios
+            self._identidades = externa._identidades
+            return self
+
+        self._contexto = self._connection_factory()
+        conn = self._contexto.__enter__()
+        try:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE" if self.inmediata else "BEGIN")
+            self._contexto_acciones = acciones_al_confirmar()
+            self._pendientes = self._contexto_acciones.__enter__()
+        except Exception:
+            self._contexto.__exit__(None, None, None)
+            raise
+        self._conn = _ConexionDeLaUnidad(conn)
+        _local.unidad = self
+        return self
+
+    def __exit__(self, tipo, error, traza):
+        if self._externa is not None:
+            return False
+
+        _local.unidad = None
+        conn = self._conn._conn
+        confirmada = False
+        try:
+            if tipo is None:
+                conn.commit()
+                confirmada = True
+            else:
+                conn.rollback()
+        finally:
+            self._contexto_acciones.__exit__(None, None, None)
+            self._contexto.__exit__(tipo, error, traza)
+
+        if confirmada:
+            for accion in self._pendientes:
+                accion()
+        return False
+
+    @contextmanager
+    def _factory(self):
+        yield self._conn
+
+    def repositorio(self, clase_repositorio):
+        """Instancia (una vez por unidad) un repositorio que usa la conexión de la unidad."""
+        repositorio = self._repositorios.get(clase_repositorio)
+        if repositorio is None:
+            repositorio = clase_repositorio(self._factory, **OPCIONES_DE.get(clase_repositorio, {}))
+            self._repositorios[clase_repositorio] = repositorio
+        return repositorio
+
+    @property
+    def alquileres(self) -> AlquilerRepository:
+        return self.repositorio(AlquilerRepository)
+
+    @property
+    def clientes(self) -> ClienteRepository:
+        return self.repositorio(ClienteRepository)
+
+    @property
+    def mantenimientos(self) -> MantenimientoRepository:
+        return self.repositorio(MantenimientoRepository)
+
+    @property
+    def reservas(self) -> ReservaRepository:
+        return self.repositorio(ReservaRepository)
+
+    @property
+    def vehiculos(self) -> VehiculoRepository:
+        return self.repositorio(VehiculoRepository)
+
+    def obtener(self, clase, id_entidad):
+        """
+        Devuelve la entidad con ese ID, cargándola a lo sumo una vez por unidad.
+
+        Args:
+            clase: Modelo (Cliente, Vehiculo, Alquiler, Reserva o Mantenimiento)
+            id_entidad: ID de la entidad
+
+        Returns:
+            La entidad (siempre el mismo objeto dentro de la unidad) o None si no existe
+        """
+        clave = (clase, id_entidad)
+        if clave in self._identidades:
+            return self._identidades[clave]
+        entidad = self.repositorio(REPOSITORIO_DE[clase]).obtener_por_id(id_entidad)
+        self._identidades[clave] = entidad
+        return entidad
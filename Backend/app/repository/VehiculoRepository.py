@@ -1,11 +1,44 @@
-from app.database.database import get_connection
+from app.database.database import al_confirmar, get_connection
 from app.models.Vehiculo import Vehiculo
+from app.repository.EstadoVehiculos import barrer_si_cambio_el_dia
+from app.repository.CacheReportes import versiones_tablas
+from app.repository.CacheCotizaciones import cache_cotizaciones
+from app.repository.MapeadorFilas import MapeadorFilas
+from app.repository.Paginacion import recorrer_por_paginas
+from app.repository.Versionado import ConflictoDeVersion, version_actualizada
+
+# Listados completos: mapeo compilado por posición (ver MapeadorFilas)
+MAPEADOR_VEHICULO = MapeadorFilas(
+    Vehiculo,
+    {atributo: atributo for atributo in Vehiculo.__slots__},
+    conversiones={"habilitado": bool},
+)
 
 
 class VehiculoRepository:
     def __init__(self, connection_factory=get_connection):
         self._connection_factory = connection_factory
 
+    @staticmethod
+    def _a_vehiculo(fila) -> Vehiculo:
+        return Vehiculo(
+            id_vehiculo=fila["id_vehiculo"],
+            patente=fila["patente"],
+            marca=fila["marca"],
+            modelo=fila["modelo"],
+            anio=fila["anio"],
+            tarifa_base_dia=fila["tarifa_base_dia"],
+            km_actual=fila["km_actual"],
+            habilitado=bool(fila["habilitado"]),
+            seguro_venc=fila["seguro_venc"],
+            vtv_venc=fila["vtv_venc"],
+            km_service_cada=fila["km_service_cada"],
+            km_ultimo_service=fila["km_ultimo_service"],
+            fecha_ultimo_service=fila["fecha_ultimo_service"],
+            foto_url=fila["foto_url"],
+            version=fila["version"],
+        )
+
     def crear(self, vehiculo: Vehiculo) -> Vehiculo:
         query = """
             INSERT INTO vehiculos (
@@ -45,35 +78,25 @@ class VehiculoRepository:
             cursor = conn.cursor()
             cursor.execute(query, valores)
             conn.commit()
+            versiones_tablas.incrementar("vehiculos")
             vehiculo.id_vehiculo = cursor.lastrowid  # guardar el ID generado
+            vehiculo.version = 1
             return vehiculo
 
     def obtener_todos(self) -> list[Vehiculo]:
         query = "SELECT * FROM vehiculos"
         with self._connection_factory() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            filas = cursor.fetchall()
-            vehiculos: list[Vehiculo] = []
-            for fila in filas:
-                vehiculo = Vehiculo(
-                    id_vehiculo=fila["id_vehiculo"],
-                    patente=fila["patente"],
-                    marca=fila["marca"],
-                    modelo=fila["modelo"],
-                    anio=fila["anio"],
-                    tarifa_base_dia=fila["tarifa_base_dia"],
-                    km_actual=fila["km_actual"],
-                    habilitado=bool(fila["habilitado"]),
-                    seguro_venc=fila["seguro_venc"],
-                    vtv_venc=fila["vtv_venc"],
-                    km_service_cada=fila["km_service_cada"],
-                    km_ultimo_service=fila["km_ultimo_service"],
-                    fecha_ultimo_service=fila["fecha_ultimo_service"],
-                    foto_url=fila["foto_url"],
-                )
-                vehiculos.append(vehiculo)
-            return vehiculos
+            return MAPEADOR_VEHICULO.todas(conn.cursor(), query)
+
+    def iterar_todos(self):
+        """Recorre todos los vehículos de a una página por ID (para respuestas en streaming)."""
+        return recorrer_por_paginas(self._pagina_por_id, desde=0)
+
+    def _pagina_por_id(self, despues_de: int, limite: int) -> tuple[list[Vehiculo], int]:
+        query = "SELECT * FROM vehiculos WHERE id_vehiculo > ? ORDER BY id_vehiculo LIMIT ?"
+        with self._connection_factory() as conn:
+            vehiculos = MAPEADOR_VEHICULO.todas(conn.cursor(), query, (despues_de, limite))
+        return vehiculos, vehiculos[-1].id_vehiculo if vehiculos else None
 
     def obtener_por_id(self, id_vehiculo: int) -> Vehiculo:
         query = "SELECT * FROM vehiculos WHERE id_vehiculo = ?"
@@ -85,24 +108,62 @@ class VehiculoRepository:
             if not fila:
                 return None
 
-            return Vehiculo(
-                id_vehiculo=fila["id_vehiculo"],
-                patente=fila["patente"],
-                marca=fila["marca"],
-                modelo=fila["modelo"],
-                anio=fila["anio"],
-                tarifa_base_dia=fila["tarifa_base_dia"],
-                km_actual=fila["km_actual"],
-                habilitado=bool(fila["habilitado"]),
-                seguro_venc=fila["seguro_venc"],
-                vtv_venc=fila["vtv_venc"],
-                km_service_cada=fila["km_service_cada"],
-                km_ultimo_service=fila["km_ultimo_service"],
-                fecha_ultimo_service=fila["fecha_ultimo_service"],
-                foto_url=fila["foto_url"],
+            return self._a_vehiculo(fila)
+
+    def obtener_por_ids(self, ids: list[int]) -> list[Vehiculo]:
+        """Obtiene en una sola consulta los vehículos con los IDs dados (los inexistentes se omiten)."""
+        if not ids:
+            return []
+        marcadores = ", ".join("?" for _ in ids)
+        query = f"SELECT * FROM vehiculos WHERE id_vehiculo IN ({marcadores}) ORDER BY id_vehiculo"
+        with self._connection_factory() as conn:
+            return MAPEADOR_VEHICULO.todas(conn.cursor(), query, tuple(ids))
+
+    def obtener_disponibles(self, fecha_inicio: str, fecha_prevista: str) -> list[Vehiculo]:
+        """
+        Obtiene en una sola consulta los vehículos habilitados y libres en un rango de fechas.
+
+        Un vehículo queda excluido si está en mantenimiento, si tiene un alquiler
+        PENDIENTE/ACTIVO que se solapa con el rango o una reserva PENDIENTE/CONFIRMADA
+        para un día dentro del rango.
+        """
+        query = """
+            SELECT v.* FROM vehiculos v
+            WHERE v.habilitado = 1
+            AND NOT EXISTS (
+                SELECT 1 FROM mantenimientos m
+                WHERE m.vehiculo_id = v.id_vehiculo
+                AND m.estado_mantenimiento IN ('PROGRAMADO', 'EN_PROGRESO')
+                AND (m.fecha_realizada IS NULL OR m.fecha_realizada >= date('now'))
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM alquileres a
+                WHERE a.vehiculo_id = v.id_vehiculo
+                AND a.estado_alquiler_id IN (1, 2)  -- PENDIENTE o ACTIVO
+                AND (
+                    (a.fecha_inicio <= ? AND (a.fecha_entrega IS NULL OR a.fecha_entrega >= ?))
+                    OR (a.fecha_inicio >= ? AND a.fecha_inicio <= ?)
+                )
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM reservas r
+                WHERE r.vehiculo_id = v.id_vehiculo
+                AND r.estado_reserva_id IN (1, 2)  -- PENDIENTE o CONFIRMADA
+                AND r.fecha_alquiler >= ? AND r.fecha_alquiler <= ?
             )
+        """
+        params = (fecha_prevista, fecha_inicio, fecha_inicio, fecha_prevista, fecha_inicio, fecha_prevista)
+
+        with self._connection_factory() as conn:
+            return MAPEADOR_VEHICULO.todas(conn.cursor(), query, params)
 
     def actualizar(self, vehiculo: Vehiculo) -> Vehiculo:
+        """
+        Actualiza un vehículo. Si vehiculo.version no es None, solo si la fila sigue en esa versión.
+
+        Raises:
+            ConflictoDeVersion: Si el vehículo cambió o se eliminó desde esa versión
+        """
         query = """
             UPDATE vehiculos
             SET patente = ?,
@@ -117,8 +178,9 @@ class VehiculoRepository:
                 km_service_cada = ?,
                 km_ultimo_service = ?,
                 fecha_ultimo_service = ?,
-                foto_url = ?
-            WHERE id_vehiculo = ?
+                foto_url = ?,
+                version = version + 1
+            WHERE id_vehiculo = ? AND (? IS NULL OR version = ?)
         """
         valores = (
             vehiculo.patente,
@@ -135,42 +197,40 @@ class VehiculoRepository:
             vehiculo.fecha_ultimo_service,
             vehiculo.foto_url,
             vehiculo.id_vehiculo,
+            vehiculo.version,
+            vehiculo.version,
         )
 
         with self._connection_factory() as conn:
             cursor = conn.cursor()
+            cursor.execute("SELECT tarifa_base_dia FROM vehiculos WHERE id_vehiculo = ?",
+                           (vehiculo.id_vehiculo,))
+            anterior = cursor.fetchone()
             cursor.execute(query, valores)
+            if cursor.rowcount == 0 and vehiculo.version is not None:
+                raise ConflictoDeVersion("vehículo", vehiculo.id_vehiculo, vehiculo.version,
+                                         self.obtener_por_id(vehiculo.id_vehiculo))
+            vehiculo.version = version_actualizada(cursor, "vehiculos", "id_vehiculo", vehiculo.id_vehiculo,
+                                                   vehiculo.version)
             conn.commit()
+            versiones_tablas.incrementar("vehiculos")
+            if anterior is not None and anterior["tarifa_base_dia"] != vehiculo.tarifa_base_dia:
+                tarifa_anterior = anterior["tarifa_base_dia"]
+                al_confirmar(lambda: cache_cotizaciones.invalidar_tarifa(tarifa_anterior))
             return vehiculo
 
     def obtener_todos_con_estado(self) -> list[dict]:
-        """Obtiene todos los vehículos con su estado actual (disponible/alquilado/reservado/mantenimiento)"""
+        """
+        Obtiene todos los vehículos con su estado actual (disponible/alquilado/reservado/mantenimiento).
+
+        El estado se lee de vehiculo_estado_actual, que mantienen los triggers de la
+        migración 2 y el barrido de EstadoVehiculos.
+        """
+        barrer_si_cambio_el_dia(self._connection_factory)
         query = """
-            SELECT
-                v.*,
-                CASE
-                    WHEN EXISTS (
-                        SELECT 1 FROM mantenimientos m
-                        WHERE m.vehiculo_id = v.id_vehiculo
-                        AND m.estado_mantenimiento IN ('PROGRAMADO', 'EN_PROGRESO')
-                        AND (m.fecha_realizada IS NULL OR date(m.fecha_realizada) >= date('now'))
-                    ) THEN 'mantenimiento'
-                    WHEN EXISTS (
-                        SELECT 1 FROM alquileres a
-                        WHERE a.vehiculo_id = v.id_vehiculo
-                        AND a.estado_alquiler_id IN (1, 2)
-                        AND date(a.fecha_inicio) <= date('now')
-                        AND (date(a.fecha_prevista) >= date('now') OR a.fecha_entrega IS NULL)
-                    ) THEN 'alquilado'
-                    WHEN EXISTS (
-                        SELECT 1 FROM reservas r
-                        WHERE r.vehiculo_id = v.id_vehiculo
-                        AND r.estado_reserva_id IN (1, 2)
-                        AND date(r.fecha_alquiler) >= date('now')
-                    ) THEN 'reservado'
-                    ELSE 'disponible'
-                END as estado_actual
+            SELECT v.*, e.estado_actual
             FROM vehiculos v
+            JOIN vehiculo_estado_actual e ON e.vehiculo_id = v.id_vehiculo
         """
         with self._connection_factory() as conn:
             cursor = conn.cursor()
@@ -193,6 +253,7 @@ class VehiculoRepository:
                     "km_ultimo_service": fila["km_ultimo_service"],
                     "fecha_ultimo_service": fila["fecha_ultimo_service"],
                     "foto_url": fila["foto_url"],
+                    "version": fila["version"],
                     "estado_actual": fila["estado_actual"]
                 }
                 vehiculos_con_estado.append(vehiculo_dict)
@@ -0,0 +1,72 @@
+"""
+Control de concurrencia optimista para alquileres, reservas, vehículos y mantenimientos.
+
+Cada una de esas tablas tiene una columna version (migración 5) que arranca en 1
+y sube en cada UPDATE. El cliente devuelve en el PUT la versión que leyó y el
+UPDATE solo se aplica si la fila sigue en esa versión:
+
+    UPDATE alquileres SET ..., version = version + 1
+    WHERE id_alquiler = ? AND (? IS NULL OR version = ?)
+
+Si otro usuario la modificó en el medio no se actualiza ninguna fila y el
+repositorio lanza ConflictoDeVersion con la fila actual; la ruta responde 409
+con esa fila para que el cliente decida. No se toma ningún lock: dos ediciones
+de registros distintos (o de un mismo registro sin conflicto) no se esperan.
+
+Un PUT sin version sobrescribe como antes (para clientes que todavía no la envían).
+"""
+
+
+class ConflictoDeVersion(Exception):
+    """
+    El registro cambió (o se eliminó) desde que el cliente lo leyó.
+
+    Args:
+        entidad: Nombre de la entidad para el mensaje ("alquiler", "reserva", ...)
+        id_registro: ID del registro
+        version: Versión que envió el cliente
+        actual: Registro actual (modelo con to_dict) o None si ya no existe
+    """
+
+    def __init__(self, entidad: str, id_registro, version: int, actual=None):
+        if actual is None:
+            mensaje = f"Conflicto de versión en {entidad} {id_registro}: el registro fue eliminado"
+        else:
+            mensaje = (f"Conflicto de versión en {entidad} {id_registro}: el registro fue modificado "
+                       f"por otro usuario (versión enviada {version}, versión actual {actual.version})")
+        super().__init__(mensaje)
+        self.actual = actual
+
+    def to_dict(self) -> dict:
+        """Cuerpo de la respuesta 409: el error y el registro actual."""
+        return {"error": str(self), "actual": self.actual.to_dict() if self.actual is not None else None}
+
+
+def leer_version(data: dict) -> int | None:
+    """
+    Devuelve la versión enviada en el cuerpo del pedido, o None si no vino.
+
+    Raises:
+        ValueError: Si la versión no es un entero
+    """
+    version = data.get("version")
+    if version is None or version == "":
+        return None
+    try:
+        return int(version)
+    except (TypeError, ValueError):
+        raise ValueError("version debe ser un número entero")
+
+
+def version_actualizada(cursor, tabla: str, columna_id: str, id_registro, version: int | None) -> int | None:
+    """
+    Devuelve la versión de la fila después de un UPDATE versionado.
+
+    Con versión enviada es version + 1; sin ella se lee de la base (en la misma
+    transacción del UPDATE).
+    """
+    if version is not None:
+        return version + 1
+    cursor.execute(f"SELECT version FROM {tabla} WHERE {columna_id} = ?", (id_registro,))
+    fila = cursor.fetchone()
+    return fila[0] if fila else None
@@ -1,7 +1,11 @@
 from flask import Blueprint, jsonify, request
+from app.repository.Versionado import ConflictoDeVersion
+from app.routes.Streaming import quiere_streaming, respuesta_streaming
 from app.services.AlquilerService import (
     obtener_todos_alquileres_service,
     obtener_alquileres_con_filtros_service,
+    iterar_alquileres_service,
+    obtener_alquileres_paginados_service,
     obtener_alquiler_por_id_service,
     crear_alquiler_service,
     actualizar_alquiler_service,
@@ -19,30 +23,67 @@ def get_alquileres():
         estado_id (int): ID del estado de alquiler
         fecha_desde (str): Fecha de inicio del rango (YYYY-MM-DD)
         fecha_hasta (str): Fecha de fin del rango (YYYY-MM-DD)
+        limit (int): Tamaño de página; activa la paginación por cursor
+        cursor (str): Cursor de la página siguiente (header X-Next-Cursor de la respuesta anterior)
+        fields (str): Campos a devolver separados por coma
+        stream (int): 1 para recibir el listado completo en streaming (también con Accept: application/x-ndjson)
 
     Examples:
         GET /alquileres/
         GET /alquileres/?estado_id=1
         GET /alquileres/?fecha_desde=2025-01-01&fecha_hasta=2025-12-31
         GET /alquileres/?estado_id=2&fecha_desde=2025-01-01&fecha_hasta=2025-12-31
+        GET /alquileres/?limit=50&fields=id_alquiler,cliente_nombre_completo,estado_nombre
+        GET /alquileres/?limit=50&cursor=<X-Next-Cursor>
+        GET /alquileres/?stream=1&estado_id=1
     """
     try:
         estado_id = request.args.get('estado_id', type=int)
         fecha_desde = request.args.get('fecha_desde', type=str)
         fecha_hasta = request.args.get('fecha_hasta', type=str)
+        limite = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor', type=str)
+        campos = request.args.get('fields', type=str)
+
+        # Si se pide una página, paginar por cursor
+        if limite is not None or cursor is not None:
+            alquileres, siguiente = obtener_alquileres_paginados_service(
+                limite if limite is not None else 100,
+                cursor=cursor,
+                estado_id=estado_id,
+                fecha_desde=fecha_desde,
+                fecha_hasta=fecha_hasta,
+                campos=campos
+            )
+            respuesta = jsonify(alquileres)
+            if siguiente:
+                respuesta.headers["X-Next-Cursor"] = siguiente
+            return respuesta, 200
+
+        # Listado completo en streaming: se recorre el cursor sin armar la lista en memoria
+        if quiere_streaming():
+            return respuesta_streaming(iterar_alquileres_service(
+                estado_id=estado_id,
+                fecha_desde=fecha_desde,
+                fecha_hasta=fecha_hasta,
+                campos=campos
+            ))
 
         # Si hay filtros, usar la función con filtros
-        if estado_id is not None or fecha_desde is not None or fecha_hasta is not None:
+        if estado_id is not None or fecha_desde is not None or fecha_hasta is not None or campos is not None:
             alquileres = obtener_alquileres_con_filtros_service(
                 estado_id=estado_id,
                 fecha_desde=fecha_desde,
-                fecha_hasta=fecha_hasta
+                fecha_hasta=fecha_hasta,
+                campos=campos
             )
         else:
             # Si no hay filtros, obtener todos
             alquileres = obtener_todos_alquileres_service()
 
         return jsonify(alquileres), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -76,6 +117,8 @@ def put_alquiler(id_alquiler):
         data = request.get_json()
         alquiler_actualizado = actualizar_alquiler_service(id_alquiler, data)
         return jsonify(alquiler_actualizado.to_dict()), 200
+    except ConflictoDeVersion as e:
+        return jsonify(e.to_dict()), 409
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
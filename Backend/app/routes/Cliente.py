@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, request
+from app.routes.Streaming import quiere_streaming, respuesta_streaming
 from app.services.ClienteService import (
     obtener_todos_clientes_service,
+    iterar_clientes_service,
     obtener_cliente_por_id_service,
     crear_cliente_service,
     actualizar_cliente_service,
@@ -13,6 +15,8 @@ clientes_bp = Blueprint("clientes_bp", __name__, url_prefix="/clientes")
 @clientes_bp.route("/", methods=["GET"])
 def get_clientes():
     try:
+        if quiere_streaming():
+            return respuesta_streaming(iterar_clientes_service(), lambda c: c.to_dict())
         clientes = obtener_todos_clientes_service()
         return jsonify([c.to_dict() for c in clientes]), 200
     except Exception as e:
@@ -0,0 +1,39 @@
+import io
+
+from flask import Blueprint, jsonify, request
+from app.routes.Streaming import NDJSON
+from app.services.ImportacionService import TAMANIO_LOTE, importar_service
+
+importacion_bp = Blueprint("importacion_bp", __name__, url_prefix="/importar")
+
+
+def _formato() -> str:
+    """Formato pedido con ?formato= o, si no, deducido del Content-Type."""
+    formato = request.args.get("formato")
+    if formato:
+        return formato
+    if NDJSON in (request.content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+# POST /importar/<entidad>?formato=csv|ndjson&lote=5000
+# Cuerpo: el archivo tal cual (Content-Type text/csv o application/x-ndjson)
+# o un formulario multipart con el campo "archivo".
+@importacion_bp.route("/<entidad>", methods=["POST"])
+def post_importar(entidad):
+    try:
+        if "archivo" in request.files:
+            binario = request.files["archivo"].stream
+        else:
+            binario = request.stream
+        # utf-8-sig: los CSV exportados desde planillas suelen traer BOM
+        archivo = io.TextIOWrapper(binario, encoding="utf-8-sig", newline="")
+        reporte = importar_service(entidad, archivo, _formato(), request.args.get("lote", TAMANIO_LOTE, type=int))
+        return jsonify(reporte), 200
+    except UnicodeDecodeError:
+        return jsonify({"error": "El archivo debe estar en UTF-8"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
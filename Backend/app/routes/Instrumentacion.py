@@ -0,0 +1,64 @@
+"""
+Medición de las consultas SQL de cada pedido (ver app/database/instrumentacion.py).
+
+Cada respuesta lleva un header Server-Timing con el total de SQL (tiempo, cantidad
+de consultas y filas) y el tiempo total del pedido, que las DevTools del navegador
+muestran en la pestaña Timing. Las sentencias que superan SQL_LENTA_MS se escriben
+en el log "app.sql" junto con su EXPLAIN QUERY PLAN, y también las que se repiten
+más de SQL_REPETICIONES_ALERTA veces en un mismo pedido (posible N+1).
+
+En las respuestas en streaming el header solo incluye lo ejecutado antes de empezar
+a enviar el cuerpo.
+"""
+import logging
+import time
+
+from flask import g, request
+
+from app.database.instrumentacion import activar_registro, desactivar_registro, normalizar_sql
+
+logger = logging.getLogger("app.sql")
+
+
+def _server_timing(registro, segundos_pedido: float) -> str:
+    return (
+        f'sql;desc="{registro.consultas} consultas, {registro.filas} filas";dur={registro.segundos * 1000:.2f}, '
+        f"app;dur={segundos_pedido * 1000:.2f}"
+    )
+
+
+def _registrar_en_log(registro):
+    pedido = f"{request.method} {request.full_path.rstrip('?')}"
+    for consulta in registro.lentas:
+        logger.warning(
+            "Consulta lenta (%.1f ms, %d filas) en %s: %s\n  plan: %s",
+            consulta.segundos * 1000, consulta.filas, pedido, normalizar_sql(consulta.sql),
+            "\n        ".join(consulta.plan or []),
+        )
+    for sentencia in registro.repetidas():
+        logger.warning(
+            "Sentencia ejecutada %d veces (%.1f ms en total) en %s, posible N+1: %s",
+            sentencia["ejecuciones"], sentencia["ms"], pedido, sentencia["sql"],
+        )
+
+
+def registrar_instrumentacion(app):
+    """Registra los hooks que miden las consultas SQL de cada pedido."""
+
+    @app.before_request
+    def _iniciar_medicion():
+        g.inicio_pedido = time.perf_counter()
+        g.registro_sql = activar_registro()
+
+    @app.after_request
+    def _informar_medicion(respuesta):
+        registro = g.get("registro_sql")
+        if registro is not None:
+            respuesta.headers["Server-Timing"] = _server_timing(registro, time.perf_counter() - g.inicio_pedido)
+            if registro.lentas or registro.consultas > registro.repeticiones_alerta:
+                _registrar_en_log(registro)
+        return respuesta
+
+    @app.teardown_request
+    def _terminar_medicion(_error=None):
+        desactivar_registro()
@@ -1,6 +1,9 @@
 from flask import Blueprint, jsonify, request
+from app.repository.Versionado import ConflictoDeVersion
+from app.routes.Streaming import quiere_streaming, respuesta_streaming
 from app.services.MantenimientoService import (
     obtener_todos_mantenimientos_service,
+    iterar_mantenimientos_service,
     obtener_mantenimiento_por_id_service,
     crear_mantenimiento_service,
     actualizar_mantenimiento_service,
@@ -12,6 +15,8 @@ mantenimientos_bp = Blueprint("mantenimientos_bp", __name__, url_prefix="/manten
 @mantenimientos_bp.route("/", methods=["GET"])
 def get_mantenimientos():
     try:
+        if quiere_streaming():
+            return respuesta_streaming(iterar_mantenimientos_service(), lambda m: m.to_dict())
         mantenimientos = obtener_todos_mantenimientos_service()
         return jsonify([m.to_dict() for m in mantenimientos]), 200
     except Exception as e:
@@ -47,6 +52,8 @@ def put_mantenimiento(id_mantenimiento):
         data = request.get_json()
         mantenimiento_actualizado = actualizar_mantenimiento_service(id_mantenimiento, data)
         return jsonify(mantenimiento_actualizado.to_dict()), 200
+    except ConflictoDeVersion as e:
+        return jsonify(e.to_dict()), 409
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
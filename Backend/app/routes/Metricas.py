@@ -0,0 +1,103 @@
+"""
+GET /metrics: métricas de la app en el formato de texto de Prometheus (ver app/repository/Metricas.py).
+
+- http_request_duration_seconds: histograma de latencia por blueprint, ruta y método
+- http_requests_total: pedidos atendidos por blueprint, ruta, método y código de estado
+- http_requests_in_flight: pedidos en curso por blueprint
+- http_request_exceptions_total: pedidos que terminaron con una excepción sin manejar
+- db_pool_*: tamaño y conexiones abiertas, libres y en uso del pool
+- cache_*: aciertos, fallos, entradas y proporción de aciertos de los caches
+"""
+import time
+
+from flask import Blueprint, Response, g, request
+
+from app.database.database import obtener_pool
+from app.repository.CacheCotizaciones import cache_cotizaciones
+from app.repository.CacheReportes import cache_reportes
+from app.repository.Metricas import metricas
+
+metricas_bp = Blueprint("metricas_bp", __name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+CACHES = {"reportes": cache_reportes, "cotizaciones": cache_cotizaciones}
+
+duracion_pedidos = metricas.histograma(
+    "http_request_duration_seconds", "Duración de los pedidos HTTP en segundos", ("blueprint", "route", "method"))
+pedidos = metricas.contador(
+    "http_requests_total", "Pedidos HTTP atendidos", ("blueprint", "route", "method", "status"))
+pedidos_en_curso = metricas.medidor(
+    "http_requests_in_flight", "Pedidos HTTP en curso", ("blueprint",))
+excepciones = metricas.contador(
+    "http_request_exceptions_total", "Pedidos HTTP que terminaron con una excepción sin manejar",
+    ("blueprint", "route", "method", "exception"))
+
+pool_tamanio = metricas.medidor("db_pool_size", "Conexiones máximas del pool")
+pool_conexiones = metricas.medidor("db_pool_connections", "Conexiones del pool por estado", ("state",))
+
+cache_aciertos = metricas.contador("cache_hits_total", "Aciertos del cache", ("cache",), por_proceso=True)
+cache_fallos = metricas.contador("cache_misses_total", "Fallos del cache", ("cache",), por_proceso=True)
+cache_entradas = metricas.medidor("cache_entries", "Entradas guardadas en el cache", ("cache",))
+cache_proporcion = metricas.proporcion(
+    "cache_hit_ratio", "Aciertos sobre consultas al cache", cache_aciertos, cache_fallos)
+
+
+def _recolectar_pool():
+    estadisticas = obtener_pool().estadisticas()
+    pool_tamanio.fijar(valor=estadisticas["tamanio"])
+    for estado in ("abiertas", "libres", "en_uso"):
+        pool_conexiones.fijar(estado, valor=estadisticas[estado])
+
+
+def _recolectar_caches():
+    for nombre, cache in CACHES.items():
+        estadisticas = cache.estadisticas()
+        cache_aciertos.fijar(nombre, valor=estadisticas["aciertos"])
+        cache_fallos.fijar(nombre, valor=estadisticas["fallos"])
+        cache_entradas.fijar(nombre, valor=estadisticas["entradas"])
+
+
+def _etiquetas_pedido() -> tuple:
+    # La regla de la ruta (/vehiculos/<int:id>) y no la URL, para no crear una serie por ID
+    ruta = request.url_rule.rule if request.url_rule is not None else "sin_ruta"
+    return request.blueprint or "app", ruta, request.method
+
+
+def registrar_metricas(app):
+    """Registra los hooks que miden cada pedido y el endpoint /metrics."""
+    metricas.registrar_recolector(_recolectar_pool)
+    metricas.registrar_recolector(_recolectar_caches)
+
+    @app.before_request
+    def _iniciar_pedido():
+        g.metricas_inicio = time.perf_counter()
+        g.metricas_etiquetas = _etiquetas_pedido()
+        pedidos_en_curso.incrementar(g.metricas_etiquetas[0])
+
+    @app.after_request
+    def _estado_pedido(respuesta):
+        g.metricas_estado = respuesta.status_code
+        return respuesta
+
+    @app.teardown_request
+    def _terminar_pedido(error=None):
+        # En teardown (y no en after_request) para incluir el envío de las respuestas en streaming
+        inicio = g.pop("metricas_inicio", None)
+        if inicio is None:
+            return
+        blueprint, ruta, metodo = g.metricas_etiquetas
+        duracion_pedidos.observar(time.perf_counter() - inicio, blueprint, ruta, metodo)
+        estado = g.get("metricas_estado", 500)
+        pedidos.incrementar(blueprint, ruta, metodo, str(estado))
+        if error is not None:
+            excepciones.incrementar(blueprint, ruta, metodo, type(error).__name__)
+        pedidos_en_curso.decrementar(blueprint)
+        metricas.muestrear()
+
+    app.register_blueprint(metricas_bp)
+
+
+@metricas_bp.route("/metrics", methods=["GET"])
+def get_metricas():
+    """Métricas en el formato de texto de Prometheus"""
+    return Response(metricas.exponer(), content_type=CONTENT_TYPE)
@@ -1,132 +1,165 @@
 from flask import Blueprint, jsonify, request
 from app.database.database import get_connection
+from app.repository.CacheReportes import cache_reportes
 
 reportes_bp = Blueprint("reportes_bp", __name__, url_prefix="/reportes")
 
+
+def _respuesta_cacheada(clave: tuple, tablas: tuple, calcular):
+    """
+    Responde un reporte desde el cache de reportes (ver CacheReportes).
+
+    El momento en que se calculó el resultado va en el header X-Report-As-Of
+    y si vino del cache en X-Cache (HIT/MISS), así el cuerpo no cambia de forma.
+    """
+    datos, as_of, acierto = cache_reportes.obtener(clave, tablas, calcular)
+    respuesta = jsonify(datos)
+    respuesta.headers["X-Report-As-Of"] = as_of
+    respuesta.headers["X-Cache"] = "HIT" if acierto else "MISS"
+    return respuesta, 200
+
+
+@reportes_bp.route("/cache", methods=["GET"])
+def get_estadisticas_cache():
+    """Aciertos, fallos y ocupación del cache de reportes"""
+    return jsonify(cache_reportes.estadisticas()), 200
+
+
+def _calcular_vehiculos_mas_alquilados() -> list:
+    query = """
+        SELECT
+            v.id_vehiculo,
+            v.patente,
+            v.marca,
+            v.modelo,
+            COUNT(a.id_alquiler) as cantidad_alquileres,
+            SUM(JULIANDAY(COALESCE(a.fecha_entrega, a.fecha_prevista)) - JULIANDAY(a.fecha_inicio)) as dias_alquilados
+        FROM vehiculos v
+        LEFT JOIN alquileres a ON v.id_vehiculo = a.vehiculo_id
+        GROUP BY v.id_vehiculo, v.patente, v.marca, v.modelo
+        ORDER BY cantidad_alquileres DESC
+        LIMIT 10
+    """
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        resultados = cursor.fetchall()
+
+        datos = []
+        for fila in resultados:
+            datos.append({
+                "id_vehiculo": fila["id_vehiculo"],
+                "patente": fila["patente"],
+                "marca": fila["marca"],
+                "modelo": fila["modelo"],
+                "cantidad_alquileres": fila["cantidad_alquileres"],
+                "dias_alquilados": round(fila["dias_alquilados"] if fila["dias_alquilados"] else 0, 2)
+            })
+
+        return datos
+
+
 @reportes_bp.route("/vehiculos-mas-alquilados", methods=["GET"])
 def get_vehiculos_mas_alquilados():
     """Reporte de vehículos más alquilados"""
     try:
-        query = """
-            SELECT
-                v.id_vehiculo,
-                v.patente,
-                v.marca,
-                v.modelo,
-                COUNT(a.id_alquiler) as cantidad_alquileres,
-                SUM(JULIANDAY(COALESCE(a.fecha_entrega, a.fecha_prevista)) - JULIANDAY(a.fecha_inicio)) as dias_alquilados
-            FROM vehiculos v
-            LEFT JOIN alquileres a ON v.id_vehiculo = a.vehiculo_id
-            GROUP BY v.id_vehiculo, v.patente, v.marca, v.modelo
-            ORDER BY cantidad_alquileres DESC
-            LIMIT 10
-        """
+        return _respuesta_cacheada(("vehiculos-mas-alquilados",), ("vehiculos", "alquileres"),
+                                   _calcular_vehiculos_mas_alquilados)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            resultados = cursor.fetchall()
 
-            datos = []
-            for fila in resultados:
-                datos.append({
-                    "id_vehiculo": fila["id_vehiculo"],
-                    "patente": fila["patente"],
-                    "marca": fila["marca"],
-                    "modelo": fila["modelo"],
-                    "cantidad_alquileres": fila["cantidad_alquileres"],
-                    "dias_alquilados": round(fila["dias_alquilados"] if fila["dias_alquilados"] else 0, 2)
-                })
+def _calcular_ingresos_mensuales(anio: str) -> list:
+    # Lee el rollup por (año, mes, vehículo) que mantienen los triggers de la migración 3
+    query = """
+        SELECT
+            mes,
+            anio,
+            SUM(total_ingresos) as total_ingresos,
+            SUM(cantidad_alquileres) as cantidad_alquileres
+        FROM ingresos_mensuales_rollup
+        WHERE anio = ?
+        GROUP BY anio, mes
+        ORDER BY anio, mes
+    """
 
-            return jsonify(datos), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, (anio,))
+        resultados = cursor.fetchall()
+
+        meses = {
+            "01": "Enero", "02": "Febrero", "03": "Marzo", "04": "Abril",
+            "05": "Mayo", "06": "Junio", "07": "Julio", "08": "Agosto",
+            "09": "Septiembre", "10": "Octubre", "11": "Noviembre", "12": "Diciembre"
+        }
+
+        datos = []
+        for fila in resultados:
+            datos.append({
+                "mes": fila["mes"],
+                "mes_nombre": meses.get(fila["mes"], fila["mes"]),
+                "anio": fila["anio"],
+                "total_ingresos": float(fila["total_ingresos"]),
+                "cantidad_pagos": fila["cantidad_alquileres"]
+            })
+
+        return datos
 
 
 @reportes_bp.route("/ingresos-mensuales", methods=["GET"])
 def get_ingresos_mensuales():
-    """Reporte de ingresos mensuales (calculado desde alquileres)"""
+    """Reporte de ingresos mensuales (desde ingresos_mensuales_rollup)"""
     try:
         anio = request.args.get("anio", "2024")
+        return _respuesta_cacheada(("ingresos-mensuales", anio), ("alquileres", "vehiculos"),
+                                   lambda: _calcular_ingresos_mensuales(anio))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        query = """
-            SELECT
-                strftime('%m', a.fecha_entrega) as mes,
-                strftime('%Y', a.fecha_entrega) as anio,
-                SUM((JULIANDAY(a.fecha_entrega) - JULIANDAY(a.fecha_inicio)) * v.tarifa_base_dia) as total_ingresos,
-                COUNT(a.id_alquiler) as cantidad_alquileres
-            FROM alquileres a
-            JOIN vehiculos v ON a.vehiculo_id = v.id_vehiculo
-            WHERE a.fecha_entrega IS NOT NULL
-              AND a.fecha_entrega < DATE('now')
-              AND strftime('%Y', a.fecha_entrega) = ?
-            GROUP BY mes, anio
-            ORDER BY anio, mes
-        """
 
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (anio,))
-            resultados = cursor.fetchall()
+def _calcular_clientes_top() -> list:
+    query = """
+        SELECT
+            c.id_cliente,
+            c.nombre,
+            c.apellido,
+            c.email,
+            COUNT(a.id_alquiler) as cantidad_alquileres,
+            SUM(JULIANDAY(COALESCE(a.fecha_entrega, a.fecha_prevista)) - JULIANDAY(a.fecha_inicio)) as dias_totales
+        FROM clientes c
+        LEFT JOIN alquileres a ON c.id_cliente = a.cliente_id
+        GROUP BY c.id_cliente, c.nombre, c.apellido, c.email
+        HAVING COUNT(a.id_alquiler) > 0
+        ORDER BY cantidad_alquileres DESC
+        LIMIT 10
+    """
 
-            meses = {
-                "01": "Enero", "02": "Febrero", "03": "Marzo", "04": "Abril",
-                "05": "Mayo", "06": "Junio", "07": "Julio", "08": "Agosto",
-                "09": "Septiembre", "10": "Octubre", "11": "Noviembre", "12": "Diciembre"
-            }
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        resultados = cursor.fetchall()
 
-            datos = []
-            for fila in resultados:
-                datos.append({
-                    "mes": fila["mes"],
-                    "mes_nombre": meses.get(fila["mes"], fila["mes"]),
-                    "anio": fila["anio"],
-                    "total_ingresos": float(fila["total_ingresos"]),
-                    "cantidad_pagos": fila["cantidad_alquileres"]
-                })
+        datos = []
+        for fila in resultados:
+            datos.append({
+                "id_cliente": fila["id_cliente"],
+                "nombre": fila["nombre"],
+                "apellido": fila["apellido"],
+                "email": fila["email"],
+                "cantidad_alquileres": fila["cantidad_alquileres"],
+                "dias_totales": round(fila["dias_totales"] if fila["dias_totales"] else 0, 2)
+            })
 
-            return jsonify(datos), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return datos
 
 
 @reportes_bp.route("/clientes-top", methods=["GET"])
 def get_clientes_top():
     """Reporte de mejores clientes"""
     try:
-        query = """
-            SELECT
-                c.id_cliente,
-                c.nombre,
-                c.apellido,
-                c.email,
-                COUNT(a.id_alquiler) as cantidad_alquileres,
-                SUM(JULIANDAY(COALESCE(a.fecha_entrega, a.fecha_prevista)) - JULIANDAY(a.fecha_inicio)) as dias_totales
-            FROM clientes c
-            LEFT JOIN alquileres a ON c.id_cliente = a.cliente_id
-            GROUP BY c.id_cliente, c.nombre, c.apellido, c.email
-            HAVING COUNT(a.id_alquiler) > 0
-            ORDER BY cantidad_alquileres DESC
-            LIMIT 10
-        """
-
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            resultados = cursor.fetchall()
-
-            datos = []
-            for fila in resultados:
-                datos.append({
-                    "id_cliente": fila["id_cliente"],
-                    "nombre": fila["nombre"],
-                    "apellido": fila["apellido"],
-                    "email": fila["email"],
-                    "cantidad_alquileres": fila["cantidad_alquileres"],
-                    "dias_totales": round(fila["dias_totales"] if fila["dias_totales"] else 0, 2)
-                })
-
-            return jsonify(datos), 200
+        return _respuesta_cacheada(("clientes-top",), ("clientes", "alquileres"), _calcular_clientes_top)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -176,62 +209,60 @@ def get_mantenimientos_proximos():
         return jsonify({"error": str(e)}), 500
 
 
+def _calcular_estadisticas_generales() -> dict:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # Total de vehículos
+        cursor.execute("SELECT COUNT(*) as total FROM vehiculos WHERE habilitado = 1")
+        total_vehiculos = cursor.fetchone()["total"]
+
+        # Total de clientes
+        cursor.execute("SELECT COUNT(*) as total FROM clientes WHERE habilitado = 1")
+        total_clientes = cursor.fetchone()["total"]
+
+        # Alquileres activos
+        cursor.execute("""
+            SELECT COUNT(*) as total FROM alquileres
+            WHERE estado_alquiler_id IN (
+                SELECT id_estado_alquiler FROM estados_alquiler WHERE codigo IN ('ACTIVO', 'PENDIENTE')
+            )
+        """)
+        alquileres_activos = cursor.fetchone()["total"]
+
+        # Reservas pendientes
+        cursor.execute("""
+            SELECT COUNT(*) as total FROM reservas
+            WHERE estado_reserva_id IN (
+                SELECT id_estado_reserva FROM estados_reserva WHERE codigo = 'PENDIENTE'
+            )
+        """)
+        reservas_pendientes = cursor.fetchone()["total"]
+
+        # Ingresos del mes actual (desde ingresos_mensuales_rollup)
+        cursor.execute("""
+            SELECT COALESCE(SUM(total_ingresos), 0) as total
+            FROM ingresos_mensuales_rollup
+            WHERE anio = strftime('%Y', 'now') AND mes = strftime('%m', 'now')
+        """)
+        ingresos_mes_actual = cursor.fetchone()["total"]
+
+        datos = {
+            "total_vehiculos": total_vehiculos,
+            "total_clientes": total_clientes,
+            "alquileres_activos": alquileres_activos,
+            "reservas_pendientes": reservas_pendientes,
+            "ingresos_mes_actual": float(ingresos_mes_actual)
+        }
+
+        return datos
+
+
 @reportes_bp.route("/estadisticas-generales", methods=["GET"])
 def get_estadisticas_generales():
     """Estadísticas generales del sistema"""
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Total de vehículos
-            cursor.execute("SELECT COUNT(*) as total FROM vehiculos WHERE habilitado = 1")
-            total_vehiculos = cursor.fetchone()["total"]
-
-            # Total de clientes
-            cursor.execute("SELECT COUNT(*) as total FROM clientes WHERE habilitado = 1")
-            total_clientes = cursor.fetchone()["total"]
-
-            # Alquileres activos
-            cursor.execute("""
-                SELECT COUNT(*) as total FROM alquileres
-                WHERE estado_alquiler_id IN (
-                    SELECT id_estado_alquiler FROM estados_alquiler WHERE codigo IN ('ACTIVO', 'PENDIENTE')
-                )
-            """)
-            alquileres_activos = cursor.fetchone()["total"]
-
-            # Reservas pendientes
-            cursor.execute("""
-                SELECT COUNT(*) as total FROM reservas
-                WHERE estado_reserva_id IN (
-                    SELECT id_estado_reserva FROM estados_reserva WHERE codigo = 'PENDIENTE'
-                )
-            """)
-            reservas_pendientes = cursor.fetchone()["total"]
-
-            # Ingresos del mes actual (calculado desde alquileres)
-            cursor.execute("""
-                SELECT COALESCE(
-                    SUM(
-                        (JULIANDAY(a.fecha_entrega) - JULIANDAY(a.fecha_inicio)) * v.tarifa_base_dia
-                    ), 0
-                ) as total
-                FROM alquileres a
-                JOIN vehiculos v ON a.vehiculo_id = v.id_vehiculo
-                WHERE a.fecha_entrega IS NOT NULL
-                  AND a.fecha_entrega < DATE('now')
-                  AND strftime('%Y-%m', a.fecha_entrega) = strftime('%Y-%m', 'now')
-            """)
-            ingresos_mes_actual = cursor.fetchone()["total"]
-
-            datos = {
-                "total_vehiculos": total_vehiculos,
-                "total_clientes": total_clientes,
-                "alquileres_activos": alquileres_activos,
-                "reservas_pendientes": reservas_pendientes,
-                "ingresos_mes_actual": float(ingresos_mes_actual)
-            }
-
-            return jsonify(datos), 200
+        return _respuesta_cacheada(("estadisticas-generales",), ("vehiculos", "clientes", "alquileres", "reservas"),
+                                   _calcular_estadisticas_generales)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,109 @@
+"""
+Respuestas en streaming para los listados grandes.
+
+En lugar de armar la lista completa y pasarla a jsonify, se recorre el cursor
+de la base y se escriben los elementos a medida que llegan, así la memoria del
+worker no depende del tamaño de la tabla. Se activa con:
+
+- Accept: application/x-ndjson  -> un objeto JSON por línea (NDJSON)
+- ?stream=1                      -> un arreglo JSON escrito por partes
+
+Los repositorios leen de a una página por cursor y devuelven la conexión al pool
+entre página y página (Paginacion.recorrer_por_paginas), así un cliente lento no
+retiene una conexión mientras lee. Igual cada respuesta ocupa un thread del
+worker hasta el último byte: a lo sumo STREAMING_MAXIMO se atienden a la vez y
+las que exceden reciben 503 con Retry-After.
+"""
+import os
+import threading
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+NDJSON = "application/x-ndjson"
+ELEMENTOS_POR_BLOQUE = 200
+STREAMING_MAXIMO = int(os.environ.get("STREAMING_MAXIMO", "4"))
+STREAMING_REINTENTO = 5
+
+_cupos = threading.BoundedSemaphore(STREAMING_MAXIMO)
+
+
+class _Cupo:
+    """Lugar tomado por una respuesta en streaming; se devuelve una sola vez."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tomado = True
+
+    def liberar(self):
+        with self._lock:
+            if not self._tomado:
+                return
+            self._tomado = False
+        _cupos.release()
+
+
+def quiere_streaming() -> bool:
+    """Indica si el cliente pidió la respuesta en streaming."""
+    return NDJSON in request.headers.get("Accept", "") or request.args.get("stream") == "1"
+
+
+def _ndjson(elementos, serializar):
+    dumps = current_app.json.dumps
+    bloque = []
+    for elemento in elementos:
+        bloque.append(dumps(serializar(elemento)) + "\n")
+        if len(bloque) >= ELEMENTOS_POR_BLOQUE:
+            yield "".join(bloque)
+            bloque = []
+    if bloque:
+        yield "".join(bloque)
+
+
+def _arreglo_json(elementos, serializar):
+    dumps = current_app.json.dumps
+    bloque = ["["]
+    separador = ""
+    for elemento in elementos:
+        bloque.append(separador + dumps(serializar(elemento)))
+        separador = ","
+        if len(bloque) >= ELEMENTOS_POR_BLOQUE:
+            yield "".join(bloque)
+            bloque = []
+    bloque.append("]")
+    yield "".join(bloque)
+
+
+def _liberando(partes, cupo: _Cupo):
+    try:
+        yield from partes
+    finally:
+        cupo.liberar()
+
+
+def respuesta_streaming(elementos, serializar=lambda elemento: elemento) -> Response:
+    """
+    Arma una respuesta que escribe los elementos a medida que se generan.
+
+    Args:
+        elementos: Iterable (idealmente un generador que lee la base de a páginas)
+        serializar: Función que convierte cada elemento en algo serializable a JSON
+
+    Returns:
+        Response en NDJSON o arreglo JSON según lo que pidió el cliente, o 503 si ya
+        hay STREAMING_MAXIMO respuestas en streaming en curso
+    """
+    if not _cupos.acquire(blocking=False):
+        respuesta = jsonify({"error": "Hay demasiados listados en streaming en curso, reintente en unos segundos"})
+        respuesta.status_code = 503
+        respuesta.headers["Retry-After"] = str(STREAMING_REINTENTO)
+        return respuesta
+
+    cupo = _Cupo()
+    if NDJSON in request.headers.get("Accept", ""):
+        partes, mimetype = _ndjson(elementos, serializar), NDJSON
+    else:
+        partes, mimetype = _arreglo_json(elementos, serializar), "application/json"
+    respuesta = Response(stream_with_context(_liberando(partes, cupo)), mimetype=mimetype)
+    # Si la respuesta se cierra sin haberse recorrido (cliente que cortó antes), igual se libera
+    respuesta.call_on_close(cupo.liberar)
+    return respuesta
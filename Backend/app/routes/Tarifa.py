@@ -0,0 +1,50 @@
+from flask import Blueprint, jsonify, request
+from app.models.factories.TarifaFactory import TarifaFactory
+from app.repository.CacheCotizaciones import cache_cotizaciones
+from app.services.TarifaService import cotizar_service
+
+tarifas_bp = Blueprint("tarifas_bp", __name__, url_prefix="/tarifas")
+
+
+# GET /tarifas/
+@tarifas_bp.route("/", methods=["GET"])
+def get_tipos_tarifa():
+    """Estrategias de tarifa disponibles"""
+    return jsonify(TarifaFactory.tipos_disponibles()), 200
+
+
+# GET /tarifas/cotizar?vehiculo_id=1&vehiculo_id=2&estrategia=semanal&fecha_inicio=...&fecha_fin=...&km=...&costo_por_km=...
+@tarifas_bp.route("/cotizar", methods=["GET"])
+def get_cotizacion():
+    try:
+        # Acepta vehiculo_id repetido o una lista separada por comas (vehiculos=1,2,3)
+        ids = request.args.getlist("vehiculo_id", type=int)
+        vehiculos = request.args.get("vehiculos", type=str)
+        if vehiculos:
+            ids += [int(v) for v in vehiculos.split(",") if v.strip()]
+
+        parametros = {}
+        costo_por_km = request.args.get("costo_por_km", type=float)
+        if costo_por_km is not None:
+            parametros["costo_por_km"] = costo_por_km
+
+        cotizacion = cotizar_service(
+            ids,
+            request.args.get("estrategia", "simple"),
+            request.args.get("fecha_inicio"),
+            request.args.get("fecha_fin"),
+            request.args.get("km", 0, type=float),
+            parametros,
+        )
+        return jsonify(cotizacion), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# GET /tarifas/cache
+@tarifas_bp.route("/cache", methods=["GET"])
+def get_estadisticas_cache():
+    """Aciertos, fallos y ocupación del memo de cotizaciones"""
+    return jsonify(cache_cotizaciones.estadisticas()), 200
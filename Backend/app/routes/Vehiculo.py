@@ -1,8 +1,11 @@
 from flask import Blueprint, jsonify, request, send_from_directory
 from werkzeug.utils import secure_filename
 import os
+from app.repository.Versionado import ConflictoDeVersion
+from app.routes.Streaming import quiere_streaming, respuesta_streaming
 from app.services.VehiculoService import (
     obtener_todos_vehiculos_service,
+    iterar_vehiculos_service,
     crear_vehiculo_service,
     obtener_vehiculos_disponibles_service,
     actualizar_vehiculo_service,
@@ -48,6 +51,8 @@ def get_vehiculos_con_estado():
 @vehiculos_bp.route("/", methods=["GET"])
 def get_vehiculos():
     try:
+        if quiere_streaming():
+            return respuesta_streaming(iterar_vehiculos_service(), lambda v: v.to_dict())
         vehiculos = obtener_todos_vehiculos_service()
         return jsonify([v.to_dict() for v in vehiculos]), 200
     except Exception as e:
@@ -74,6 +79,8 @@ def put_vehiculo(id_vehiculo):
         data = request.get_json()
         vehiculo_actualizado = actualizar_vehiculo_service(id_vehiculo, data)
         return jsonify(vehiculo_actualizado.to_dict()), 200
+    except ConflictoDeVersion as e:
+        return jsonify(e.to_dict()), 409
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
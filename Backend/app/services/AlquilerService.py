@@ -1,8 +1,10 @@
 from app.models.Alquiler import Alquiler
+from app.models.Cliente import Cliente
+from app.models.Vehiculo import Vehiculo
 from app.repository.Alquiler import AlquilerRepository
-from app.repository.ClienteRepository import ClienteRepository
-from app.repository.VehiculoRepository import VehiculoRepository
-from app.repository.MantenimientoRepository import MantenimientoRepository
+from app.repository.BloqueosVehiculos import bloqueos_vehiculos
+from app.repository.UnidadDeTrabajo import UnidadDeTrabajo
+from app.repository.Versionado import leer_version
 from datetime import datetime
 
 def crear_alquiler_service(data: dict):
@@ -13,57 +15,55 @@ def crear_alquiler_service(data: dict):
         if campo not in data:
             raise ValueError(f"Falta el campo obligatorio: {campo}")
 
-    # Verificar que el cliente existe y está habilitado
-    cliente_repo = ClienteRepository()
-    cliente = cliente_repo.obtener_por_id(data["cliente_id"])
-    if not cliente:
-        raise ValueError("El cliente especificado no existe")
-    if not cliente.habilitado:
-        raise ValueError("El cliente no está habilitado para realizar alquileres")
-
-    # Verificar que el vehículo existe y está habilitado
-    vehiculo_repo = VehiculoRepository()
-    vehiculo = vehiculo_repo.obtener_por_id(data["vehiculo_id"])
-    if not vehiculo:
-        raise ValueError("El vehículo especificado no existe")
-    if not vehiculo.habilitado:
-        raise ValueError("El vehículo no está habilitado para alquileres")
-
-    # Verificar que el vehículo no esté en mantenimiento
-    mantenimiento_repo = MantenimientoRepository()
-    en_mantenimiento = mantenimiento_repo.vehiculo_en_mantenimiento(data["vehiculo_id"])
-    if en_mantenimiento:
-        raise ValueError("El vehículo está actualmente en mantenimiento y no puede ser alquilado")
-
-    repo = AlquilerRepository()
-
-    # Verificar disponibilidad del vehículo
-    disponible = repo.verificar_disponibilidad(
-        vehiculo_id=data["vehiculo_id"],
-        fecha_inicio=data["fecha_inicio"],
-        fecha_prevista=data["fecha_prevista"]
-    )
-
-    if not disponible:
-        raise ValueError("El vehículo no está disponible en el período seleccionado")
-
-    alquiler = Alquiler(
-        cliente=data.get("cliente_id"),
-        vehiculo=data.get("vehiculo_id"),
-        empleado=data.get("empleado_id", 1),  # Default empleado
-        estado_alquiler=data.get("estado_alquiler", 1),  # Default PENDIENTE
-        reserva=data.get("reserva_id"),
-        fecha_inicio=data["fecha_inicio"],
-        fecha_prevista=data["fecha_prevista"],
-        fecha_entrega=data.get("fecha_entrega"),
-        km_salida=data["km_salida"],
-        km_entrada=data.get("km_entrada"),
-        observaciones=data.get("observaciones"),
-        creado_en=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        actualizado_en=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    )
-
-    return repo.crear(alquiler)
+    # Validar y crear en una sola transacción de escritura (BEGIN IMMEDIATE), con el
+    # lock del vehículo tomado: dos pedidos simultáneos no pueden reservar el mismo auto
+    with bloqueos_vehiculos.bloquear(data["vehiculo_id"]), UnidadDeTrabajo(inmediata=True) as uow:
+        # Verificar que el cliente existe y está habilitado
+        cliente = uow.obtener(Cliente, data["cliente_id"])
+        if not cliente:
+            raise ValueError("El cliente especificado no existe")
+        if not cliente.habilitado:
+            raise ValueError("El cliente no está habilitado para realizar alquileres")
+
+        # Verificar que el vehículo existe y está habilitado
+        vehiculo = uow.obtener(Vehiculo, data["vehiculo_id"])
+        if not vehiculo:
+            raise ValueError("El vehículo especificado no existe")
+        if not vehiculo.habilitado:
+            raise ValueError("El vehículo no está habilitado para alquileres")
+
+        # Verificar que el vehículo no esté en mantenimiento
+        en_mantenimiento = uow.mantenimientos.vehiculo_en_mantenimiento(data["vehiculo_id"])
+        if en_mantenimiento:
+            raise ValueError("El vehículo está actualmente en mantenimiento y no puede ser alquilado")
+
+        # Verificar disponibilidad del vehículo
+        disponible = uow.alquileres.verificar_disponibilidad(
+            vehiculo_id=data["vehiculo_id"],
+            fecha_inicio=data["fecha_inicio"],
+            fecha_prevista=data["fecha_prevista"]
+        )
+
+        if not disponible:
+            raise ValueError("El vehículo no está disponible en el período seleccionado")
+
+        alquiler = Alquiler(
+            cliente=data.get("cliente_id"),
+            vehiculo=data.get("vehiculo_id"),
+            empleado=data.get("empleado_id", 1),  # Default empleado
+            estado_alquiler=data.get("estado_alquiler", 1),  # Default PENDIENTE
+            reserva=data.get("reserva_id"),
+            fecha_inicio=data["fecha_inicio"],
+            fecha_prevista=data["fecha_prevista"],
+            fecha_entrega=data.get("fecha_entrega"),
+            km_salida=data["km_salida"],
+            km_entrada=data.get("km_entrada"),
+            observaciones=data.get("observaciones"),
+            creado_en=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            actualizado_en=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        )
+
+        return uow.alquileres.crear(alquiler)
 
 
 def obtener_todos_alquileres_service():
@@ -72,7 +72,7 @@ def obtener_todos_alquileres_service():
     return repo.obtener_todos()
 
 
-def obtener_alquileres_con_filtros_service(estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None):
+def obtener_alquileres_con_filtros_service(estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None, campos=None):
     """
     Devuelve alquileres filtrados por estado y/o rango de fechas.
 
@@ -80,12 +80,32 @@ def obtener_alquileres_con_filtros_service(estado_id: int = None, fecha_desde: s
         estado_id: ID del estado de alquiler
         fecha_desde: Fecha de inicio del rango (YYYY-MM-DD)
         fecha_hasta: Fecha de fin del rango (YYYY-MM-DD)
+        campos: Campos a devolver (lista o "a,b,c"); todos si no se indica
 
     Returns:
         Lista de alquileres filtrados
     """
     repo = AlquilerRepository()
-    return repo.obtener_con_filtros(estado_id=estado_id, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
+    return repo.obtener_con_filtros(estado_id=estado_id, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, campos=campos)
+
+
+def iterar_alquileres_service(estado_id: int = None, fecha_desde: str = None, fecha_hasta: str = None, campos=None):
+    """Recorre los alquileres filtrados sin cargarlos en memoria (para streaming)."""
+    repo = AlquilerRepository()
+    return repo.iterar_con_filtros(estado_id=estado_id, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, campos=campos)
+
+
+def obtener_alquileres_paginados_service(limite: int, cursor: str = None, estado_id: int = None,
+                                         fecha_desde: str = None, fecha_hasta: str = None, campos=None):
+    """
+    Devuelve una página de alquileres con paginación por cursor.
+
+    Returns:
+        Tupla (alquileres, cursor de la página siguiente o None)
+    """
+    repo = AlquilerRepository()
+    return repo.obtener_pagina(limite, cursor=cursor, estado_id=estado_id, fecha_desde=fecha_desde,
+                               fecha_hasta=fecha_hasta, campos=campos)
 
 
 def obtener_alquiler_por_id_service(id_alquiler: int):
@@ -96,36 +116,42 @@ def obtener_alquiler_por_id_service(id_alquiler: int):
 
 def actualizar_alquiler_service(id_alquiler: int, data: dict):
     """Actualiza un alquiler existente."""
-    repo = AlquilerRepository()
-
-    # Verificar disponibilidad del vehículo (excluyendo el alquiler actual)
-    disponible = repo.verificar_disponibilidad(
-        vehiculo_id=data["vehiculo_id"],
-        fecha_inicio=data["fecha_inicio"],
-        fecha_prevista=data["fecha_prevista"],
-        excluir_alquiler_id=id_alquiler
-    )
-
-    if not disponible:
-        raise ValueError("El vehículo no está disponible en el período seleccionado")
-
-    alquiler = Alquiler(
-        cliente=data.get("cliente_id"),
-        vehiculo=data.get("vehiculo_id"),
-        empleado=data.get("empleado_id", 1),
-        estado_alquiler=data.get("estado_alquiler", 1),
-        reserva=data.get("reserva_id"),
-        fecha_inicio=data["fecha_inicio"],
-        fecha_prevista=data["fecha_prevista"],
-        fecha_entrega=data.get("fecha_entrega"),
-        km_salida=data["km_salida"],
-        km_entrada=data.get("km_entrada"),
-        observaciones=data.get("observaciones"),
-        creado_en=data.get("creado_en"),
-        actualizado_en=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    )
-
-    return repo.actualizar(id_alquiler, alquiler)
+    # Un cambio de fechas o de vehículo es una nueva ocupación: se valida y se guarda como
+    # el alta, con BEGIN IMMEDIATE y los locks del vehículo anterior y del nuevo tomados
+    actual = AlquilerRepository().obtener_por_id(id_alquiler)
+    vehiculo_anterior = actual.vehiculo if actual else None
+
+    with bloqueos_vehiculos.bloquear_varios(vehiculo_anterior, data["vehiculo_id"]), \
+            UnidadDeTrabajo(inmediata=True) as uow:
+        # Verificar disponibilidad del vehículo (excluyendo el alquiler actual), dentro de la transacción
+        disponible = uow.alquileres.verificar_disponibilidad(
+            vehiculo_id=data["vehiculo_id"],
+            fecha_inicio=data["fecha_inicio"],
+            fecha_prevista=data["fecha_prevista"],
+            excluir_alquiler_id=id_alquiler
+        )
+
+        if not disponible:
+            raise ValueError("El vehículo no está disponible en el período seleccionado")
+
+        alquiler = Alquiler(
+            cliente=data.get("cliente_id"),
+            vehiculo=data.get("vehiculo_id"),
+            empleado=data.get("empleado_id", 1),
+            estado_alquiler=data.get("estado_alquiler", 1),
+            reserva=data.get("reserva_id"),
+            fecha_inicio=data["fecha_inicio"],
+            fecha_prevista=data["fecha_prevista"],
+            fecha_entrega=data.get("fecha_entrega"),
+            km_salida=data["km_salida"],
+            km_entrada=data.get("km_entrada"),
+            observaciones=data.get("observaciones"),
+            creado_en=data.get("creado_en"),
+            actualizado_en=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            version=leer_version(data)
+        )
+
+        return uow.alquileres.actualizar(id_alquiler, alquiler)
 
 
 def eliminar_alquiler_service(id_alquiler: int):
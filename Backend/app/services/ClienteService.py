@@ -36,6 +36,12 @@ def obtener_todos_clientes_service():
     return repo.obtener_todos()
 
 
+def iterar_clientes_service():
+    """Recorre todos los clientes sin cargarlos en memoria (para streaming)."""
+    repo = ClienteRepository()
+    return repo.iterar_todos()
+
+
 def obtener_cliente_por_id_service(id_cliente: int):
     """Obtiene un cliente por su ID."""
     repo = ClienteRepository()
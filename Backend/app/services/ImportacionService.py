@@ -0,0 +1,322 @@
+"""
+Importación masiva de vehículos, clientes y alquileres históricos desde CSV o NDJSON.
+
+El archivo se recorre una sola vez, fila por fila: cada fila se valida con las
+mismas reglas que el alta individual y las válidas se juntan en lotes que se
+insertan con executemany, una transacción por lote (ImportacionRepository).
+Nunca se tiene el archivo completo en memoria y una fila inválida no frena a
+las demás: se reporta con su número de línea.
+
+Los alquileres pueden referir al cliente por cliente_id, cliente_email o
+cliente_dni y al vehículo por vehiculo_id o patente; las referencias se
+resuelven por lote con una consulta IN. Como son históricos no se verifica
+disponibilidad ni mantenimiento.
+"""
+import csv
+import json
+import time
+
+from app.database.database import get_connection
+from app.repository.Fechas import normalizar_fecha
+from app.repository.ImportacionRepository import ImportacionRepository
+
+FORMATOS = ("csv", "ndjson")
+TAMANIO_LOTE = 5000
+# Errores que se devuelven en el reporte; del resto solo se informa la cantidad
+MAXIMO_ERRORES = 1000
+
+
+class ReporteImportacion:
+    """Cuenta filas leídas, insertadas y rechazadas, y guarda los primeros errores."""
+
+    def __init__(self, entidad: str):
+        self.entidad = entidad
+        self.filas = 0
+        self.insertadas = 0
+        self.errores = []
+        self.errores_omitidos = 0
+        self._inicio = time.perf_counter()
+
+    def rechazar(self, linea: int, mensaje: str):
+        if len(self.errores) < MAXIMO_ERRORES:
+            self.errores.append({"linea": linea, "error": mensaje})
+        else:
+            self.errores_omitidos += 1
+
+    @property
+    def rechazadas(self) -> int:
+        return len(self.errores) + self.errores_omitidos
+
+    def to_dict(self) -> dict:
+        return {
+            "entidad": self.entidad,
+            "filas": self.filas,
+            "insertadas": self.insertadas,
+            "rechazadas": self.rechazadas,
+            "errores": self.errores,
+            "errores_omitidos": self.errores_omitidos,
+            "segundos": round(time.perf_counter() - self._inicio, 3),
+        }
+
+
+def leer_filas(archivo, formato: str):
+    """
+    Recorre un archivo de texto y devuelve (línea, fila) de a uno.
+
+    En CSV la primera línea es el encabezado y una celda vacía es None. En NDJSON
+    cada línea no vacía es un objeto JSON. Si una línea no se puede leer, en lugar
+    de la fila se devuelve el ValueError.
+    """
+    if formato == "csv":
+        lector = csv.DictReader(archivo)
+        for fila in lector:
+            if None in fila:
+                yield lector.line_num, ValueError("La fila tiene más columnas que el encabezado")
+                continue
+            yield lector.line_num, {
+                campo.strip(): (valor.strip() or None) if isinstance(valor, str) else valor
+                for campo, valor in fila.items()
+            }
+    elif formato == "ndjson":
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except json.JSONDecodeError as e:
+                yield numero, ValueError(f"JSON inválido: {e.msg}")
+                continue
+            if not isinstance(fila, dict):
+                yield numero, ValueError("Cada línea debe ser un objeto JSON")
+                continue
+            yield numero, fila
+    else:
+        raise ValueError(f"Formato no soportado: {formato}. Formatos válidos: {', '.join(FORMATOS)}")
+
+
+def _obligatorio(data: dict, campo: str):
+    valor = data.get(campo)
+    if valor is None or valor == "":
+        raise ValueError(f"Falta el campo obligatorio: {campo}")
+    return valor
+
+
+def _entero(data: dict, campo: str, default=None, obligatorio: bool = False):
+    valor = _obligatorio(data, campo) if obligatorio else data.get(campo)
+    if valor is None or valor == "":
+        return default
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"{campo} debe ser un número entero")
+
+
+def _numero(data: dict, campo: str):
+    try:
+        return float(_obligatorio(data, campo))
+    except (TypeError, ValueError):
+        raise ValueError(f"{campo} debe ser un número")
+
+
+def _booleano(data: dict, campo: str) -> int:
+    valor = data.get(campo)
+    if valor is None or valor == "":
+        return 1
+    if isinstance(valor, str):
+        if valor.strip().lower() in ("1", "true", "si", "sí"):
+            return 1
+        if valor.strip().lower() in ("0", "false", "no"):
+            return 0
+        raise ValueError(f"{campo} debe ser verdadero o falso")
+    return 1 if valor else 0
+
+
+class _ImportadorVehiculos:
+    tabla = "vehiculos"
+
+    def __init__(self, repo: ImportacionRepository):
+        self.repo = repo
+
+    def validar(self, data: dict) -> tuple:
+        return (
+            str(_obligatorio(data, "patente")),
+            str(_obligatorio(data, "marca")),
+            str(_obligatorio(data, "modelo")),
+            _entero(data, "anio", obligatorio=True),
+            _numero(data, "tarifa_base_dia"),
+            _entero(data, "km_actual", 0),
+            _booleano(data, "habilitado"),
+            normalizar_fecha(data.get("seguro_venc")),
+            normalizar_fecha(data.get("vtv_venc")),
+            _entero(data, "km_service_cada", obligatorio=True),
+            _entero(data, "km_ultimo_service", 0),
+            normalizar_fecha(data.get("fecha_ultimo_service")),
+            data.get("foto_url"),
+        )
+
+    def guardar(self, lote: list, reporte: ReporteImportacion):
+        rechazadas = self.repo.insertar_lote(self.tabla, lote)
+        for linea, mensaje in rechazadas:
+            reporte.rechazar(linea, mensaje)
+        reporte.insertadas += len(lote) - len(rechazadas)
+
+
+class _ImportadorClientes(_ImportadorVehiculos):
+    tabla = "clientes"
+
+    def validar(self, data: dict) -> tuple:
+        return (
+            data.get("dni"),
+            str(_obligatorio(data, "nombre")),
+            str(_obligatorio(data, "apellido")),
+            str(_obligatorio(data, "email")),
+            str(_obligatorio(data, "telefono")),
+            data.get("direccion"),
+            str(_obligatorio(data, "licencia_num")),
+            normalizar_fecha(_obligatorio(data, "licencia_venc")),
+            _booleano(data, "habilitado"),
+        )
+
+
+class _ImportadorAlquileres(_ImportadorVehiculos):
+    """
+    Alquileres históricos. validar() deja las referencias como (columna, valor);
+    guardar() las resuelve para todo el lote antes de insertar.
+    """
+    tabla = "alquileres"
+    # Referencias aceptadas: campo del archivo -> (tabla, columna de ID, columna)
+    CLIENTE = {"cliente_id": ("clientes", "id_cliente", "id_cliente"),
+               "cliente_email": ("clientes", "id_cliente", "email"),
+               "cliente_dni": ("clientes", "id_cliente", "dni")}
+    VEHICULO = {"vehiculo_id": ("vehiculos", "id_vehiculo", "id_vehiculo"),
+                "patente": ("vehiculos", "id_vehiculo", "patente")}
+
+    def __init__(self, repo: ImportacionRepository):
+        super().__init__(repo)
+        # Referencias ya resueltas en lotes anteriores: (tabla, columna, valor) -> ID
+        self._ids = {}
+
+    @staticmethod
+    def _referencia(data: dict, campos: dict, nombre: str) -> tuple:
+        for campo in campos:
+            valor = data.get(campo)
+            if valor is not None and valor != "":
+                if campos[campo][2].startswith("id_"):
+                    valor = _entero(data, campo)
+                return campo, valor
+        raise ValueError(f"Falta el {nombre}: {' o '.join(campos)}")
+
+    def validar(self, data: dict) -> list:
+        fecha_inicio = normalizar_fecha(_obligatorio(data, "fecha_inicio"))
+        fecha_prevista = normalizar_fecha(_obligatorio(data, "fecha_prevista"))
+        fecha_entrega = normalizar_fecha(data.get("fecha_entrega"))
+        if fecha_prevista < fecha_inicio:
+            raise ValueError("fecha_prevista no puede ser anterior a fecha_inicio")
+        if fecha_entrega is not None and fecha_entrega < fecha_inicio:
+            raise ValueError("fecha_entrega no puede ser anterior a fecha_inicio")
+
+        # Sin estado: FINALIZADO si ya se entregó, PENDIENTE si no
+        estado = _entero(data, "estado_alquiler_id", 3 if fecha_entrega else 1)
+        if estado not in (1, 2, 3, 4):
+            raise ValueError("estado_alquiler_id debe ser 1, 2, 3 o 4")
+        km_salida = _entero(data, "km_salida", obligatorio=True)
+        km_entrada = _entero(data, "km_entrada")
+        if km_entrada is not None and km_entrada < km_salida:
+            raise ValueError("km_entrada no puede ser menor que km_salida")
+
+        creado_en = data.get("creado_en")
+        return [
+            self._referencia(data, self.CLIENTE, "cliente"),
+            self._referencia(data, self.VEHICULO, "vehículo"),
+            _entero(data, "empleado_id", 1),
+            estado,
+            _entero(data, "reserva_id"),
+            fecha_inicio,
+            fecha_prevista,
+            fecha_entrega,
+            km_salida,
+            km_entrada,
+            data.get("observaciones"),
+            str(creado_en) if creado_en not in (None, "") else None,
+        ]
+
+    def _resolver(self, lote: list, posicion: int, campos: dict):
+        """Busca en la base las referencias del lote que todavía no se conocen."""
+        pendientes = {}
+        for _, valores in lote:
+            campo, valor = valores[posicion]
+            clave = campos[campo] + (valor,)
+            if clave not in self._ids:
+                pendientes.setdefault(campos[campo], set()).add(valor)
+        for (tabla, columna_id, columna), valores in pendientes.items():
+            encontrados = self.repo.resolver(tabla, columna_id, columna, valores)
+            for valor in valores:
+                self._ids[(tabla, columna_id, columna, valor)] = encontrados.get(valor)
+
+    def guardar(self, lote: list, reporte: ReporteImportacion):
+        self._resolver(lote, 0, self.CLIENTE)
+        self._resolver(lote, 1, self.VEHICULO)
+
+        resueltas = []
+        for linea, valores in lote:
+            (campo_cliente, cliente), (campo_vehiculo, vehiculo) = valores[0], valores[1]
+            cliente_id = self._ids[self.CLIENTE[campo_cliente] + (cliente,)]
+            vehiculo_id = self._ids[self.VEHICULO[campo_vehiculo] + (vehiculo,)]
+            if cliente_id is None:
+                reporte.rechazar(linea, f"No existe el cliente con {campo_cliente} = {cliente}")
+            elif vehiculo_id is None:
+                reporte.rechazar(linea, f"No existe el vehículo con {campo_vehiculo} = {vehiculo}")
+            else:
+                resueltas.append((linea, (cliente_id, vehiculo_id, *valores[2:])))
+        if resueltas:
+            super().guardar(resueltas, reporte)
+
+
+IMPORTADORES = {
+    "vehiculos": _ImportadorVehiculos,
+    "clientes": _ImportadorClientes,
+    "alquileres": _ImportadorAlquileres,
+}
+
+
+def importar_service(entidad: str, archivo, formato: str = "csv", tamanio_lote: int = TAMANIO_LOTE,
+                     connection_factory=get_connection) -> dict:
+    """
+    Importa vehículos, clientes o alquileres desde un archivo de texto.
+
+    Args:
+        entidad: "vehiculos", "clientes" o "alquileres"
+        archivo: Archivo de texto abierto (o cualquier iterable de líneas)
+        formato: "csv" o "ndjson"
+        tamanio_lote: Filas válidas por transacción
+
+    Returns:
+        Reporte con filas leídas, insertadas, rechazadas y el error de cada fila rechazada
+
+    Raises:
+        ValueError: Si la entidad, el formato o el tamaño de lote no son válidos
+    """
+    if entidad not in IMPORTADORES:
+        raise ValueError(f"Entidad no soportada: {entidad}. Entidades válidas: {', '.join(IMPORTADORES)}")
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}. Formatos válidos: {', '.join(FORMATOS)}")
+    if tamanio_lote < 1:
+        raise ValueError("El tamaño de lote debe ser mayor que 0")
+
+    importador = IMPORTADORES[entidad](ImportacionRepository(connection_factory))
+    reporte = ReporteImportacion(entidad)
+    lote = []
+    for linea, fila in leer_filas(archivo, formato):
+        reporte.filas += 1
+        try:
+            if isinstance(fila, ValueError):
+                raise fila
+            lote.append((linea, importador.validar(fila)))
+        except ValueError as e:
+            reporte.rechazar(linea, str(e))
+        if len(lote) >= tamanio_lote:
+            importador.guardar(lote, reporte)
+            lote = []
+    if lote:
+        importador.guardar(lote, reporte)
+    return reporte.to_dict()
@@ -1,7 +1,11 @@
 from app.models.Mantenimiento import Mantenimiento
+from app.models.Vehiculo import Vehiculo
 from app.repository.MantenimientoRepository import MantenimientoRepository
 from app.repository.VehiculoRepository import VehiculoRepository
 from app.repository.EmpleadoRepository import EmpleadoRepository
+from app.repository.CacheReportes import versiones_tablas
+from app.repository.UnidadDeTrabajo import UnidadDeTrabajo
+from app.repository.Versionado import leer_version
 from datetime import datetime
 
 def crear_mantenimiento_service(data: dict):
@@ -39,62 +43,53 @@ def obtener_todos_mantenimientos_service():
     return repo.obtener_todos()
 
 
+def iterar_mantenimientos_service():
+    """Recorre todos los mantenimientos sin cargarlos en memoria (para streaming)."""
+    repo = MantenimientoRepository()
+    return repo.iterar_todos()
+
+
 def obtener_mantenimiento_por_id_service(id_mantenimiento: int):
     """Obtiene un mantenimiento por su ID."""
     repo = MantenimientoRepository()
-    mantenimientos = repo.obtener_todos()
-    for mantenimiento in mantenimientos:
-        if mantenimiento.id_mantenimiento == id_mantenimiento:
-            return mantenimiento
-    return None
+    return repo.obtener_por_id(id_mantenimiento)
 
 
 def actualizar_mantenimiento_service(id_mantenimiento: int, data: dict):
     """Actualiza un mantenimiento existente."""
-    # Verificar que existe
-    mantenimiento_existente = obtener_mantenimiento_por_id_service(id_mantenimiento)
-    if not mantenimiento_existente:
-        raise ValueError("El mantenimiento no existe")
-
-    # Obtener el vehículo
-    vehiculo_repo = VehiculoRepository()
-    vehiculo = vehiculo_repo.obtener_por_id(data.get("vehiculo_id"))
-    if not vehiculo:
-        raise ValueError("El vehículo especificado no existe")
-    
-    if data.get("estado_mantenimiento") == "COMPLETADO" and data.get("fecha_realizada"):
-        fecha_realizada = datetime.strptime(data.get("fecha_realizada"), "%Y-%m-%d").date()
-        vehiculo.fecha_ultimo_service = fecha_realizada
-        vehiculo.km_ultimo_service = data.get("km", vehiculo.km_actual)
-        vehiculo_repo.actualizar(vehiculo)
-
-    # Actualizar en la base de datos
-    query = """
-        UPDATE mantenimientos
-        SET vehiculo_id = ?, empleado_id = ?, estado_mantenimiento = ?,
-            fecha_programada = ?, fecha_realizada = ?, km = ?,
-            costo = ?, observacion = ?
-        WHERE id_mantenimiento = ?
-    """
-
-    from app.database.database import get_connection
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, (
-            data.get("vehiculo_id"),
-            data.get("empleado_id"),
-            data.get("estado_mantenimiento", "PROGRAMADO"),
-            data.get("fecha_programada"),
-            data.get("fecha_realizada"),
-            data.get("km"),
-            data.get("costo", 0),
-            data.get("observacion"),
-            id_mantenimiento
-        ))
-        conn.commit()
-
-    # Retornar el mantenimiento actualizado
-    return obtener_mantenimiento_por_id_service(id_mantenimiento)
+    # El mantenimiento y el service del vehículo se actualizan juntos o ninguno
+    with UnidadDeTrabajo() as uow:
+        # Verificar que existe
+        if not uow.mantenimientos.existe(id_mantenimiento):
+            raise ValueError("El mantenimiento no existe")
+
+        # Obtener el vehículo
+        vehiculo = uow.obtener(Vehiculo, data.get("vehiculo_id"))
+        if not vehiculo:
+            raise ValueError("El vehículo especificado no existe")
+
+        if data.get("estado_mantenimiento") == "COMPLETADO" and data.get("fecha_realizada"):
+            fecha_realizada = datetime.strptime(data.get("fecha_realizada"), "%Y-%m-%d").date()
+            vehiculo.fecha_ultimo_service = fecha_realizada
+            vehiculo.km_ultimo_service = data.get("km", vehiculo.km_actual)
+            uow.vehiculos.actualizar(vehiculo)
+
+        mantenimiento = Mantenimiento(
+            vehiculo=vehiculo,
+            empleado=data.get("empleado_id"),
+            estado_mantenimiento=data.get("estado_mantenimiento", "PROGRAMADO"),
+            fecha_programada=data.get("fecha_programada"),
+            fecha_realizada=data.get("fecha_realizada"),
+            km=data.get("km"),
+            costo=data.get("costo", 0),
+            observacion=data.get("observacion"),
+            id_mantenimiento=id_mantenimiento,
+            version=leer_version(data)
+        )
+        uow.mantenimientos.actualizar(mantenimiento)
+
+        # Retornar el mantenimiento actualizado
+        return uow.mantenimientos.obtener_por_id(id_mantenimiento)
 
 
 def eliminar_mantenimiento_service(id_mantenimiento: int):
@@ -102,8 +97,7 @@ def eliminar_mantenimiento_service(id_mantenimiento: int):
     from app.database.database import get_connection
 
     # Verificar que existe
-    mantenimiento = obtener_mantenimiento_por_id_service(id_mantenimiento)
-    if not mantenimiento:
+    if not MantenimientoRepository().existe(id_mantenimiento):
         return False
 
     query = "DELETE FROM mantenimientos WHERE id_mantenimiento = ?"
@@ -111,5 +105,6 @@ def eliminar_mantenimiento_service(id_mantenimiento: int):
         cursor = conn.cursor()
         cursor.execute(query, (id_mantenimiento,))
         conn.commit()
+        versiones_tablas.incrementar("mantenimientos")
 
     return True
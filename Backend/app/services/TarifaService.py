@@ -0,0 +1,82 @@
+from datetime import date
+
+from app.models.factories.TarifaFactory import TarifaFactory
+from app.models.strategies.TarifaStrategy import dias_de_alquiler
+from app.repository.CacheCotizaciones import cache_cotizaciones
+from app.repository.Fechas import normalizar_fecha
+from app.repository.VehiculoRepository import VehiculoRepository
+
+# Reglas de negocio para cotizar alquileres con las estrategias de tarifa
+
+
+def _a_date(valor, nombre: str) -> date:
+    fecha = normalizar_fecha(valor)
+    if fecha is None:
+        raise ValueError(f"Falta el parámetro obligatorio: {nombre}")
+    return date.fromisoformat(fecha)
+
+
+def cotizar_service(ids_vehiculos: list[int], tipo_tarifa: str, fecha_inicio, fecha_fin,
+                    km_recorridos: float = 0, parametros: dict | None = None) -> dict:
+    """
+    Cotiza uno o varios vehículos para un rango de fechas con una estrategia de tarifa.
+
+    Los montos se memorizan en cache_cotizaciones por (estrategia, parámetros,
+    tarifa_base, días, km).
+
+    Args:
+        ids_vehiculos: IDs de los vehículos a cotizar
+        tipo_tarifa: Estrategia ('simple', 'semanal', 'kilometraje', 'premium')
+        fecha_inicio: Fecha de inicio del alquiler
+        fecha_fin: Fecha de fin del alquiler
+        km_recorridos: Kilómetros estimados (para las estrategias que los usan)
+        parametros: Parámetros de la estrategia (por ejemplo costo_por_km)
+
+    Returns:
+        Diccionario con el período, la estrategia y el monto por vehículo
+
+    Raises:
+        ValueError: Si faltan datos, son inválidos o algún vehículo no existe
+    """
+    if not ids_vehiculos:
+        raise ValueError("Se requiere al menos un vehiculo_id")
+    parametros = parametros or {}
+    tipo_tarifa = (tipo_tarifa or "simple").lower()
+    estrategia = TarifaFactory.crear_estrategia(tipo_tarifa, **parametros)
+
+    inicio = _a_date(fecha_inicio, "fecha_inicio")
+    fin = _a_date(fecha_fin, "fecha_fin")
+    if fin < inicio:
+        raise ValueError("fecha_fin no puede ser anterior a fecha_inicio")
+    if km_recorridos < 0:
+        raise ValueError("km_recorridos no puede ser negativo")
+    dias = dias_de_alquiler(inicio, fin)
+
+    ids_vehiculos = list(dict.fromkeys(ids_vehiculos))
+    vehiculos = VehiculoRepository().obtener_por_ids(ids_vehiculos)
+    faltantes = set(ids_vehiculos) - {v.id_vehiculo for v in vehiculos}
+    if faltantes:
+        raise ValueError(f"No se encontraron los vehículos: {', '.join(map(str, sorted(faltantes)))}")
+
+    cotizaciones = []
+    for vehiculo in vehiculos:
+        tarifa_base = vehiculo.tarifa_base_dia
+        clave = cache_cotizaciones.clave(tipo_tarifa, parametros, tarifa_base, dias, km_recorridos)
+        monto, _ = cache_cotizaciones.obtener(
+            clave, lambda: estrategia.calcular(tarifa_base, inicio, fin, km_recorridos)
+        )
+        cotizaciones.append({
+            "id_vehiculo": vehiculo.id_vehiculo,
+            "patente": vehiculo.patente,
+            "tarifa_base_dia": tarifa_base,
+            "monto": monto,
+        })
+
+    return {
+        "estrategia": tipo_tarifa,
+        "fecha_inicio": inicio.isoformat(),
+        "fecha_fin": fin.isoformat(),
+        "dias": dias,
+        "km_recorridos": km_recorridos,
+        "cotizaciones": cotizaciones,
+    }
@@ -1,5 +1,6 @@
 from app.models.Vehiculo import Vehiculo
 from app.repository.VehiculoRepository import VehiculoRepository
+from app.repository.Versionado import leer_version
 
 # Reglas de negocio relacionadas con Vehiculo
 
@@ -40,37 +41,16 @@ def obtener_todos_vehiculos_service():
     return repo.obtener_todos()
 
 
-def obtener_vehiculos_disponibles_service(fecha_inicio: str, fecha_prevista: str):
-    """Devuelve vehículos disponibles en un rango de fechas."""
-    from app.repository.Alquiler import AlquilerRepository
-    from app.repository.MantenimientoRepository import MantenimientoRepository
-
-    vehiculo_repo = VehiculoRepository()
-    alquiler_repo = AlquilerRepository()
-    mantenimiento_repo = MantenimientoRepository()
-
-    # Obtener todos los vehículos habilitados
-    todos_vehiculos = vehiculo_repo.obtener_todos()
-    vehiculos_habilitados = [v for v in todos_vehiculos if v.habilitado]
-
-    # Filtrar solo los disponibles (sin alquileres conflictivos y sin mantenimiento)
-    vehiculos_disponibles = []
-    for vehiculo in vehiculos_habilitados:
-        # Verificar que no esté en mantenimiento
-        en_mantenimiento = mantenimiento_repo.vehiculo_en_mantenimiento(vehiculo.id_vehiculo)
-        if en_mantenimiento:
-            continue
+def iterar_vehiculos_service():
+    """Recorre todos los vehículos sin cargarlos en memoria (para streaming)."""
+    repo = VehiculoRepository()
+    return repo.iterar_todos()
 
-        # Verificar disponibilidad de alquileres
-        disponible = alquiler_repo.verificar_disponibilidad(
-            vehiculo_id=vehiculo.id_vehiculo,
-            fecha_inicio=fecha_inicio,
-            fecha_prevista=fecha_prevista
-        )
-        if disponible:
-            vehiculos_disponibles.append(vehiculo)
 
-    return vehiculos_disponibles
+def obtener_vehiculos_disponibles_service(fecha_inicio: str, fecha_prevista: str):
+    """Devuelve vehículos disponibles en un rango de fechas."""
+    repo = VehiculoRepository()
+    return repo.obtener_disponibles(fecha_inicio, fecha_prevista)
 
 
 def actualizar_vehiculo_service(id_vehiculo: int, data: dict):
@@ -100,6 +80,9 @@ def actualizar_vehiculo_service(id_vehiculo: int, data: dict):
     if "foto_url" in data:
         vehiculo.foto_url = data["foto_url"]
 
+    # Versión que leyó el cliente: si otro la cambió en el medio, actualizar lanza ConflictoDeVersion
+    vehiculo.version = leer_version(data)
+
     return repo.actualizar(vehiculo)
 
 
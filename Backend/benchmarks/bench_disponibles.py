@@ -0,0 +1,132 @@
+"""
+Benchmark de /vehiculos/disponibles: consulta única vs. el recorrido N+1 anterior.
+
+Crea bases temporales con flotas de distinto tamaño (con alquileres, reservas y
+mantenimientos mezclados), mide ambas implementaciones y verifica que devuelvan
+los mismos vehículos cuando no hay reservas en conflicto.
+
+    python3 -m benchmarks.bench_disponibles [--tamanios 50,500,5000,50000] [--repeticiones 5]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from app.database.database import DB_PATH, configurar_pool
+from app.database.migrations import aplicar_migraciones
+from app.repository.Alquiler import AlquilerRepository
+from app.repository.MantenimientoRepository import MantenimientoRepository
+from app.repository.VehiculoRepository import VehiculoRepository
+
+FECHA_INICIO = "2025-06-10"
+FECHA_PREVISTA = "2025-06-15"
+
+
+def crear_base(ruta: str, cantidad_vehiculos: int, semilla: int = 42):
+    """Crea una base con el esquema actual y una flota sintética."""
+    origen = sqlite3.connect(DB_PATH)
+    tablas = [fila[0] for fila in origen.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND sql IS NOT NULL"
+    )]
+    origen.close()
+
+    conn = sqlite3.connect(ruta)
+    for sql in tablas:
+        conn.execute(sql)
+    aplicar_migraciones(conn)
+
+    rnd = random.Random(semilla)
+    conn.executemany(
+        "INSERT INTO vehiculos (patente, marca, modelo, anio, tarifa_base_dia, km_actual, habilitado) "
+        "VALUES (?, 'Marca', 'Modelo', 2022, ?, 0, ?)",
+        [(f"BEN{i:06d}", rnd.randint(5000, 12000), int(rnd.random() > 0.05)) for i in range(cantidad_vehiculos)]
+    )
+
+    alquileres = []
+    for vehiculo_id in range(1, cantidad_vehiculos + 1):
+        for _ in range(3):
+            dia = rnd.randint(1, 28)
+            mes = rnd.randint(1, 12)
+            inicio = f"2025-{mes:02d}-{dia:02d}"
+            fin = f"2025-{mes:02d}-{min(dia + rnd.randint(1, 6), 28):02d}"
+            alquileres.append((1, vehiculo_id, rnd.choice([1, 2, 3, 3]), inicio, fin, fin if rnd.random() > 0.3 else None))
+    conn.executemany(
+        "INSERT INTO alquileres (cliente_id, vehiculo_id, estado_alquiler_id, fecha_inicio, fecha_prevista, "
+        "fecha_entrega, km_salida) VALUES (?, ?, ?, ?, ?, ?, 0)",
+        alquileres
+    )
+
+    conn.executemany(
+        "INSERT INTO mantenimientos (vehiculo_id, estado_mantenimiento, fecha_programada) VALUES (?, ?, '2025-06-01')",
+        [(rnd.randint(1, cantidad_vehiculos), rnd.choice(["PROGRAMADO", "COMPLETADO"]))
+         for _ in range(max(1, cantidad_vehiculos // 20))]
+    )
+    conn.commit()
+    conn.close()
+
+
+def disponibles_n_mas_1(fecha_inicio: str, fecha_prevista: str):
+    """Implementación anterior: una consulta por vehículo para mantenimiento y alquileres."""
+    vehiculo_repo = VehiculoRepository()
+    alquiler_repo = AlquilerRepository()
+    mantenimiento_repo = MantenimientoRepository()
+
+    disponibles = []
+    for vehiculo in vehiculo_repo.obtener_todos():
+        if not vehiculo.habilitado:
+            continue
+        if mantenimiento_repo.vehiculo_en_mantenimiento(vehiculo.id_vehiculo):
+            continue
+        if alquiler_repo.verificar_disponibilidad(vehiculo.id_vehiculo, fecha_inicio, fecha_prevista):
+            disponibles.append(vehiculo)
+    return disponibles
+
+
+def disponibles_consulta_unica(fecha_inicio: str, fecha_prevista: str):
+    return VehiculoRepository().obtener_disponibles(fecha_inicio, fecha_prevista)
+
+
+def medir(funcion, repeticiones: int) -> tuple[float, int]:
+    tiempos = []
+    resultado = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(FECHA_INICIO, FECHA_PREVISTA)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000, len(resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanios", default="50,500,5000,50000")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--sin-n-mas-1", action="store_true", help="No medir la implementación anterior")
+    args = parser.parse_args()
+
+    print(f"{'vehiculos':>10} {'consulta unica (ms)':>20} {'us/vehiculo':>12} {'N+1 (ms)':>12} {'disponibles':>12}")
+    for tamanio in [int(t) for t in args.tamanios.split(",")]:
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = os.path.join(carpeta, "bench.db")
+            crear_base(ruta, tamanio)
+            pool = configurar_pool(db_path=ruta)
+
+            ms_unica, cantidad = medir(disponibles_consulta_unica, args.repeticiones)
+            ms_n_mas_1 = "-"
+            if not args.sin_n_mas_1:
+                ms, cantidad_anterior = medir(disponibles_n_mas_1, 1)
+                ms_n_mas_1 = f"{ms:.1f}"
+                # La consulta única además excluye reservas; sin reservas los resultados coinciden
+                if cantidad_anterior != cantidad:
+                    print(f"  ! resultados distintos: N+1={cantidad_anterior} consulta única={cantidad}")
+
+            print(f"{tamanio:>10} {ms_unica:>20.2f} {ms_unica * 1000 / tamanio:>12.2f} {ms_n_mas_1:>12} {cantidad:>12}")
+            pool.cerrar()
+
+    configurar_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Microbenchmark de TarifaFactory: creación por llamada contra instancias compartidas.
+
+Compara, por tipo de tarifa, construir la estrategia en cada llamada (la factory
+anterior con if/elif), crear_estrategia() con y sin kwargs y el
+lookup obtener(), y verifica que todos calculen el mismo monto:
+
+    python3 -m benchmarks.bench_factory_tarifas [--llamadas 200000] [--repeticiones 5]
+"""
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from app.models.factories.TarifaFactory import TarifaFactory
+from app.models.strategies.TarifaStrategy import (
+    TarifaSimple,
+    TarifaConDescuentoSemanal,
+    TarifaPorKilometraje,
+    TarifaPremium
+)
+
+
+def crear_por_llamada(tipo_tarifa: str, **kwargs):
+    """La factory anterior al registro: if/elif y una instancia nueva en cada llamada."""
+    tipo_tarifa = tipo_tarifa.lower()
+    if tipo_tarifa == 'simple':
+        return TarifaSimple()
+    elif tipo_tarifa == 'semanal':
+        return TarifaConDescuentoSemanal()
+    elif tipo_tarifa == 'kilometraje':
+        return TarifaPorKilometraje(costo_por_km=kwargs.get('costo_por_km', 50.0))
+    elif tipo_tarifa == 'premium':
+        return TarifaPremium(costo_por_km=kwargs.get('costo_por_km', 30.0))
+    raise ValueError(f"Tipo de tarifa '{tipo_tarifa}' no válido")
+
+
+def medir(funcion, llamadas: int, repeticiones: int) -> float:
+    """Mediana de nanosegundos por llamada."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter_ns()
+        for _ in range(llamadas):
+            funcion()
+        tiempos.append((time.perf_counter_ns() - inicio) / llamadas)
+    return statistics.median(tiempos)
+
+
+def bloques_asignados(funcion, llamadas: int) -> float:
+    """Bloques de memoria que quedan asignados por llamada (aprox.), medidos con tracemalloc."""
+    retenidos = []
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    for _ in range(llamadas):
+        retenidos.append(funcion())
+    despues = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    bloques = sum(s.count_diff for s in despues.compare_to(antes, "filename"))
+    return max(bloques - llamadas, 0) / llamadas  # descuenta el crecimiento de `retenidos`
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llamadas", type=int, default=200_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    inicio, fin = datetime(2025, 6, 1), datetime(2025, 6, 9)
+    print(f"ns por llamada (mediana de {args.repeticiones}), bloques retenidos por llamada entre paréntesis")
+    print(f"{'tipo':>12} {'por llamada':>16} {'crear_estrategia':>18} {'con kwargs':>16} {'obtener':>14}")
+    distintos = 0
+    for tipo in TarifaFactory.tipos_disponibles():
+        variantes = [
+            lambda: crear_por_llamada(tipo, costo_por_km=40.0),
+            lambda: TarifaFactory.crear_estrategia(tipo),
+            lambda: TarifaFactory.crear_estrategia(tipo, costo_por_km=40.0),
+            lambda: TarifaFactory.obtener(tipo),
+        ]
+        columnas = []
+        for variante in variantes:
+            ns = medir(variante, args.llamadas, args.repeticiones)
+            bloques = bloques_asignados(variante, min(args.llamadas, 20_000))
+            columnas.append(f"{ns:.0f} ({bloques:.1f})")
+
+        montos = {
+            round(crear_por_llamada(tipo, costo_por_km=40.0).calcular(8000, inicio, fin, 120), 2),
+            round(TarifaFactory.crear_estrategia(tipo, costo_por_km=40.0).calcular(8000, inicio, fin, 120), 2),
+        }
+        if len(montos) != 1 or TarifaFactory.obtener(tipo) is not TarifaFactory.crear_estrategia(tipo):
+            distintos += 1
+            print(f"  ! {tipo}: la instancia compartida no coincide con la creada por llamada")
+        print(f"{tipo:>12} {columnas[0]:>16} {columnas[1]:>18} {columnas[2]:>16} {columnas[3]:>14}")
+
+    if distintos:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark de hidratación de modelos: Vehiculo con __dict__ y sqlite3.Row por nombre
+contra Vehiculo con __slots__ y el mapeo compilado de MapeadorFilas.
+
+Crea una base temporal con la tabla vehiculos, carga la tabla completa con
+cada implementación y muestra el tiempo (mediana) y la memoria que ocupan los
+objetos cargados. Verifica que ambas produzcan los mismos datos:
+
+    python3 -m benchmarks.bench_hidratacion [--filas 1000000] [--repeticiones 3]
+"""
+import argparse
+import gc
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app.database.database import DB_PATH
+from app.models.Vehiculo import Vehiculo
+from app.repository.VehiculoRepository import MAPEADOR_VEHICULO
+
+# El modelo anterior: el mismo __init__, con los atributos en un __dict__ por instancia
+VehiculoConDict = type("VehiculoConDict", (), {"__init__": Vehiculo.__init__, "to_dict": Vehiculo.to_dict})
+
+
+def crear_base(ruta: str, filas: int, semilla: int = 42):
+    """Crea una base con la tabla vehiculos del esquema actual y `filas` vehículos."""
+    origen = sqlite3.connect(DB_PATH)
+    sql = origen.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'vehiculos'").fetchone()[0]
+    origen.close()
+
+    rnd = random.Random(semilla)
+    conn = sqlite3.connect(ruta)
+    conn.execute(sql)
+    # La columna version la agrega la migración 5; la base de origen puede no tenerla aplicada
+    if "version" not in {columna[1] for columna in conn.execute("PRAGMA table_info(vehiculos)")}:
+        conn.execute("ALTER TABLE vehiculos ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    conn.executemany(
+        "INSERT INTO vehiculos (patente, marca, modelo, anio, tarifa_base_dia, km_actual, habilitado, "
+        "km_service_cada, km_ultimo_service, seguro_venc) VALUES (?, 'Marca', 'Modelo', ?, ?, ?, ?, 10000, 0, '2026-01-01')",
+        ((f"H{i:07d}", rnd.randint(2010, 2025), rnd.randint(5000, 12000), rnd.randint(0, 200000),
+          int(rnd.random() > 0.05)) for i in range(filas))
+    )
+    conn.commit()
+    conn.close()
+
+
+def cargar_anterior(conn) -> list:
+    """Carga anterior: filas sqlite3.Row y constructor con kwargs leídos por nombre."""
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    cursor.execute("SELECT * FROM vehiculos")
+    vehiculos = []
+    for fila in cursor.fetchall():
+        vehiculos.append(VehiculoConDict(
+            id_vehiculo=fila["id_vehiculo"],
+            patente=fila["patente"],
+            marca=fila["marca"],
+            modelo=fila["modelo"],
+            anio=fila["anio"],
+            tarifa_base_dia=fila["tarifa_base_dia"],
+            km_actual=fila["km_actual"],
+            habilitado=bool(fila["habilitado"]),
+            seguro_venc=fila["seguro_venc"],
+            vtv_venc=fila["vtv_venc"],
+            km_service_cada=fila["km_service_cada"],
+            km_ultimo_service=fila["km_ultimo_service"],
+            fecha_ultimo_service=fila["fecha_ultimo_service"],
+            foto_url=fila["foto_url"],
+            version=fila["version"],
+        ))
+    return vehiculos
+
+
+def cargar_compilado(conn) -> list:
+    return MAPEADOR_VEHICULO.todas(conn.cursor(), "SELECT * FROM vehiculos")
+
+
+def medir_tiempo(cargar, conn, repeticiones: int) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = cargar(conn)
+        tiempos.append(time.perf_counter() - inicio)
+        del resultado
+    return statistics.median(tiempos)
+
+
+def medir_memoria(cargar, conn) -> tuple[int, int, list]:
+    """Bytes retenidos por la lista cargada y pico durante la carga."""
+    gc.collect()
+    tracemalloc.start()
+    resultado = cargar(conn)
+    retenidos, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retenidos, pico, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "hidratacion.db")
+        crear_base(ruta, args.filas)
+        conn = sqlite3.connect(ruta)
+
+        print(f"{args.filas} vehículos")
+        print(f"{'implementación':>22} {'tiempo (s)':>11} {'retenido (MB)':>14} {'pico (MB)':>10}")
+        datos = {}
+        for nombre, cargar in (("__dict__ + Row", cargar_anterior), ("__slots__ + compilado", cargar_compilado)):
+            segundos = medir_tiempo(cargar, conn, args.repeticiones)
+            retenidos, pico, resultado = medir_memoria(cargar, conn)
+            datos[nombre] = [v.to_dict() for v in resultado[:1000]] + [resultado[-1].to_dict()]
+            del resultado
+            print(f"{nombre:>22} {segundos:>11.2f} {retenidos / 2**20:>14.1f} {pico / 2**20:>10.1f}")
+        conn.close()
+
+    anterior, compilado = datos.values()
+    if anterior != compilado:
+        print("  ! las implementaciones devuelven datos distintos")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Suite de benchmarks de los endpoints y caminos calientes de los repositorios.
+
+Para cada tamaño de base (cantidad de alquileres) genera una base sintética con
+app/database/generar_datos.py (se guarda en --datos y se reutiliza entre corridas),
+trabaja sobre una copia y mide:
+- por el test client de Flask: /vehiculos/disponibles, /vehiculos/con-estado,
+  /alquileres/ (completo y una página) y cada ruta GET de /reportes/ (con el
+  cache de reportes vacío, es decir el cálculo real);
+- directo: crear_alquiler_service y AlquilerRepository.verificar_disponibilidad,
+  con el índice de disponibilidad y contra la base.
+
+Informa latencia p50, p95 y p99 y operaciones por segundo, y guarda el resultado en
+JSON. Con --baseline compara contra un resultado guardado y termina con código 1 si
+algún caso empeoró más que --umbral:
+
+    python3 -m benchmarks.bench_suite --salida baseline.json
+    python3 -m benchmarks.bench_suite --baseline baseline.json [--umbral 0.25] [--metrica p95] [--diferencia-minima 1]
+
+Los tiempos dependen de la máquina: comparar solo contra baselines tomados en la misma.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+TAMANIOS = "10000,100000"
+METRICAS = ("p50", "p95", "p99")
+VEHICULOS_ALTAS = 10
+
+
+def percentil(tiempos_ordenados: list, p: float) -> float:
+    """Percentil por rango más cercano de una lista ordenada."""
+    indice = max(0, math.ceil(p / 100 * len(tiempos_ordenados)) - 1)
+    return tiempos_ordenados[min(indice, len(tiempos_ordenados) - 1)]
+
+
+def medir(funcion, iteraciones: int, calentamiento: int, tiempo_maximo: float, antes=None) -> dict:
+    """
+    Ejecuta `funcion(i)` hasta `iteraciones` veces (o hasta gastar `tiempo_maximo` segundos,
+    con un mínimo de 5) y devuelve sus percentiles. `antes(i)` corre fuera de la medición.
+    """
+    for i in range(calentamiento):
+        if antes:
+            antes(i)
+        funcion(i)
+
+    tiempos = []
+    limite = time.perf_counter() + tiempo_maximo
+    for i in range(calentamiento, calentamiento + iteraciones):
+        if antes:
+            antes(i)
+        inicio = time.perf_counter()
+        funcion(i)
+        tiempos.append(time.perf_counter() - inicio)
+        if len(tiempos) >= 5 and time.perf_counter() > limite:
+            break
+
+    tiempos.sort()
+    return {
+        "n": len(tiempos),
+        "p50_ms": round(percentil(tiempos, 50) * 1000, 3),
+        "p95_ms": round(percentil(tiempos, 95) * 1000, 3),
+        "p99_ms": round(percentil(tiempos, 99) * 1000, 3),
+        "ops_s": round(len(tiempos) / sum(tiempos), 1),
+    }
+
+
+def preparar_base(alquileres: int, directorio: str, semilla: int, hasta: date) -> str:
+    """Genera (o reutiliza) la base sintética de un tamaño y devuelve su ruta."""
+    from app.database.generar_datos import crear_base, generar
+
+    ruta = os.path.join(directorio, f"bench_{alquileres}_{semilla}_{hasta.isoformat()}.db")
+    if os.path.exists(ruta):
+        return ruta
+
+    print(f"Generando base de {alquileres} alquileres en {ruta} ...")
+    temporal = ruta + ".generando"
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(temporal + sufijo):
+            os.remove(temporal + sufijo)
+    crear_base(temporal)
+    conn = sqlite3.connect(temporal)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            generar(conn, {
+                "vehiculos": max(20, alquileres // 500),
+                "clientes": max(100, alquileres // 5),
+                "alquileres": alquileres,
+                "pagos": alquileres,
+                "incidentes": alquileres * 3 // 100,
+                "reservas": alquileres // 10,
+                "mantenimientos": max(10, alquileres // 50),
+            }, semilla=semilla, hasta=hasta)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def casos(app, rnd: random.Random) -> dict:
+    """Casos a medir sobre la base configurada en el pool: nombre -> (función, antes)."""
+    from app.database.database import get_connection
+    from app.repository.Alquiler import AlquilerRepository
+    from app.repository.CacheReportes import cache_reportes
+    from app.repository.IndiceDisponibilidad import indice_disponibilidad
+    from app.services.AlquilerService import crear_alquiler_service
+
+    cliente = app.test_client()
+    hoy = date.today()
+
+    def get(url):
+        def pedir(_):
+            respuesta = cliente.get(url)
+            if respuesta.status_code != 200:
+                raise RuntimeError(f"GET {url} respondió {respuesta.status_code}: {respuesta.get_data(as_text=True)[:200]}")
+            respuesta.get_data()
+        return pedir
+
+    def vaciar_cache(_):
+        cache_reportes.limpiar()
+
+    with get_connection() as conn:
+        todos = [fila[0] for fila in conn.execute("SELECT id_vehiculo FROM vehiculos")]
+        # En la base generada casi todos los vehículos tienen un alquiler PENDIENTE sin fecha
+        # de fin; las altas se miden sobre vehículos propios del benchmark, sin alquileres
+        conn.executemany(
+            "INSERT INTO vehiculos (patente, marca, modelo, anio, tarifa_base_dia, km_actual, habilitado) "
+            "VALUES (?, 'Bench', 'Bench', 2024, 8000, 0, 1)",
+            [(f"BENCH{i:02d}",) for i in range(VEHICULOS_ALTAS)]
+        )
+        conn.commit()
+        vehiculos = [fila[0] for fila in conn.execute("SELECT id_vehiculo FROM vehiculos WHERE marca = 'Bench'")]
+        clientes = [fila[0] for fila in conn.execute("SELECT id_cliente FROM clientes WHERE habilitado = 1 LIMIT 1000")]
+        historia = conn.execute("SELECT MIN(fecha_inicio), MAX(fecha_inicio) FROM alquileres").fetchone()
+
+    desde = date.fromisoformat(historia[0])
+    dias_historia = (date.fromisoformat(historia[1]) - desde).days
+    fechas = []
+    for _ in range(1000):
+        inicio = desde + timedelta(days=rnd.randint(0, dias_historia))
+        fechas.append((rnd.choice(todos), inicio.isoformat(), (inicio + timedelta(days=rnd.randint(1, 10))).isoformat()))
+
+    creados = []
+
+    def crear_alquiler(i):
+        # Vehículos libres por turno, con fechas más allá de la historia generada
+        inicio = hoy + timedelta(days=400 + i)
+        creados.append(crear_alquiler_service({
+            "cliente_id": clientes[i % len(clientes)],
+            "vehiculo_id": vehiculos[i % len(vehiculos)],
+            "fecha_inicio": inicio.isoformat(),
+            "fecha_prevista": (inicio + timedelta(days=3)).isoformat(),
+            "km_salida": 0,
+        }).id_alquiler)
+
+    def cancelar_anterior(_):
+        # Un alquiler PENDIENTE sin entrega ocupa el vehículo sin fecha de fin: se cancela
+        # el anterior (fuera de la medición) para que el vehículo vuelva a estar libre
+        if creados:
+            id_alquiler = creados.pop()
+            with get_connection() as conn:
+                conn.execute("UPDATE alquileres SET estado_alquiler_id = 4 WHERE id_alquiler = ?", (id_alquiler,))
+                conn.commit()
+            indice_disponibilidad.quitar_alquiler(id_alquiler)
+
+    repo_indice = AlquilerRepository()
+    repo_sql = AlquilerRepository(indice=None)
+
+    def verificar(repo):
+        def verificar_disponibilidad(i):
+            repo.verificar_disponibilidad(*fechas[i % len(fechas)])
+        return verificar_disponibilidad
+
+    consulta = (hoy + timedelta(days=3)).isoformat(), (hoy + timedelta(days=10)).isoformat()
+    resultado = {
+        "GET /vehiculos/disponibles": (get(f"/vehiculos/disponibles?fecha_inicio={consulta[0]}"
+                                           f"&fecha_prevista={consulta[1]}"), None),
+        "GET /vehiculos/con-estado": (get("/vehiculos/con-estado"), None),
+        "GET /alquileres/": (get("/alquileres/"), None),
+        "GET /alquileres/?limit=50": (get("/alquileres/?limit=50&estado_id=3"), None),
+    }
+    for regla in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if regla.rule.startswith("/reportes/") and "GET" in regla.methods and regla.rule != "/reportes/cache":
+            url = regla.rule + (f"?anio={hoy.year - 1}" if regla.rule.endswith("ingresos-mensuales") else "")
+            resultado[f"GET {url}"] = (get(url), vaciar_cache)
+    resultado["crear_alquiler_service"] = (crear_alquiler, cancelar_anterior)
+    resultado["verificar_disponibilidad (índice)"] = (verificar(repo_indice), None)
+    resultado["verificar_disponibilidad (SQL)"] = (verificar(repo_sql), None)
+
+    if not indice_disponibilidad.cargado:
+        del resultado["verificar_disponibilidad (índice)"]
+    return resultado
+
+
+def correr(args) -> dict:
+    os.environ["ESTADO_VEHICULOS_BARRIDO"] = "0"
+    from app import create_app
+    from app.database.database import configurar_pool
+    from app.repository.CacheReportes import cache_reportes
+
+    hasta = args.hasta or date.today()
+    os.makedirs(args.datos, exist_ok=True)
+    resultados = {}
+    for alquileres in [int(t) for t in args.tamanios.split(",")]:
+        base = preparar_base(alquileres, args.datos, args.semilla, hasta)
+        # Se mide sobre una copia: crear_alquiler_service escribe en la base
+        with tempfile.TemporaryDirectory() as directorio:
+            copia = os.path.join(directorio, "bench.db")
+            shutil.copyfile(base, copia)
+            configurar_pool(db_path=copia)
+            cache_reportes.limpiar()
+            app = create_app()
+
+            print(f"\n{alquileres} alquileres")
+            print(f"{'caso':<44} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9}")
+            resultados[str(alquileres)] = {}
+            for nombre, (funcion, antes) in casos(app, random.Random(args.semilla)).items():
+                medicion = medir(funcion, args.iteraciones, args.calentamiento, args.tiempo_maximo, antes)
+                resultados[str(alquileres)][nombre] = medicion
+                print(f"{nombre:<44} {medicion['n']:>5} {medicion['p50_ms']:>9.2f} {medicion['p95_ms']:>9.2f} "
+                      f"{medicion['p99_ms']:>9.2f} {medicion['ops_s']:>9.1f}")
+            configurar_pool()
+
+    return {
+        "meta": {
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "semilla": args.semilla,
+            "hasta": hasta.isoformat(),
+            "iteraciones": args.iteraciones,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "maquina": platform.node(),
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(actual: dict, baseline: dict, metrica: str, umbral: float, diferencia_minima: float) -> list[str]:
+    """
+    Casos cuya métrica empeoró más que el umbral (relativo) respecto del baseline.
+
+    Diferencias de menos de `diferencia_minima` ms no cuentan: en casos de décimas de
+    milisegundo el ruido de la máquina supera cualquier umbral relativo.
+    """
+    clave = f"{metrica}_ms"
+    regresiones = []
+    print(f"\nComparación con el baseline ({metrica}, umbral {umbral:.0%})")
+    for tamanio, casos_actuales in actual["resultados"].items():
+        casos_base = baseline.get("resultados", {}).get(tamanio, {})
+        for nombre, medicion in casos_actuales.items():
+            if nombre not in casos_base:
+                continue
+            antes, ahora = casos_base[nombre][clave], medicion[clave]
+            cambio = (ahora - antes) / antes if antes else 0.0
+            empeoro = cambio > umbral and ahora - antes > diferencia_minima
+            marca = "REGRESIÓN" if empeoro else ""
+            print(f"{tamanio:>9} {nombre:<44} {antes:>9.2f} -> {ahora:>9.2f} ms {cambio:>+8.1%} {marca}")
+            if empeoro:
+                regresiones.append(f"{tamanio} {nombre}: {antes:.2f} -> {ahora:.2f} ms ({cambio:+.1%})")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanios", default=TAMANIOS, help="Cantidades de alquileres separadas por coma")
+    parser.add_argument("--iteraciones", type=int, default=200)
+    parser.add_argument("--calentamiento", type=int, default=3)
+    parser.add_argument("--tiempo-maximo", type=float, default=10, help="Segundos por caso como máximo")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Último día de la historia generada (hoy por defecto)")
+    parser.add_argument("--datos", default=os.path.join(tempfile.gettempdir(), "tp_dao_bench"),
+                        help="Carpeta donde se guardan las bases generadas")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el resultado")
+    parser.add_argument("--baseline", help="Resultado JSON anterior contra el cual comparar")
+    parser.add_argument("--umbral", type=float, default=0.25, help="Empeoramiento relativo tolerado (0.25 = 25%%)")
+    parser.add_argument("--metrica", choices=METRICAS, default="p95")
+    parser.add_argument("--diferencia-minima", type=float, default=1.0,
+                        help="ms de empeoramiento por debajo de los cuales no hay regresión")
+    args = parser.parse_args()
+
+    resultado = correr(args)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        print(f"\nResultado guardado en {args.salida}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as archivo:
+            regresiones = comparar(resultado, json.load(archivo), args.metrica, args.umbral,
+                                   args.diferencia_minima)
+        if regresiones:
+            print(f"\n✗ {len(regresiones)} casos empeoraron más de {args.umbral:.0%}:")
+            for regresion in regresiones:
+                print(f"  {regresion}")
+            sys.exit(1)
+        print("\n✓ Sin regresiones respecto del baseline")
+
+
+if __name__ == "__main__":
+    main()
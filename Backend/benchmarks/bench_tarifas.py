@@ -0,0 +1,76 @@
+"""
+Benchmark del cálculo de tarifas por lotes contra el cálculo de a un par.
+
+Cotiza una flota sintética para varias duraciones con cada estrategia, por los
+dos caminos (calcular() en un loop y calcular_lote()), verifica que los montos
+sean idénticos y muestra los tiempos:
+
+    python3 -m benchmarks.bench_tarifas [--vehiculos 2000] [--duraciones 1,3,7,14,30] [--repeticiones 5]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.models.factories.TarifaFactory import TarifaFactory
+
+
+def medir(funcion, repeticiones: int) -> tuple[float, list]:
+    tiempos = []
+    resultado = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vehiculos", type=int, default=2000)
+    parser.add_argument("--duraciones", default="0,1,3,7,14,30")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.semilla)
+    duraciones = [int(d) for d in args.duraciones.split(",")]
+    inicio = datetime(2025, 6, 1)
+
+    # Un par (vehículo, período) por cada vehículo y duración
+    tarifas, inicios, fines, kms = [], [], [], []
+    for _ in range(args.vehiculos):
+        tarifa = round(rnd.uniform(4000, 15000), 2)
+        for dias in duraciones:
+            tarifas.append(tarifa)
+            inicios.append(inicio)
+            fines.append(inicio + timedelta(days=dias))
+            kms.append(rnd.randint(0, 800))
+
+    print(f"{len(tarifas)} pares (vehículo, período)")
+    print(f"{'estrategia':>12} {'de a uno (ms)':>14} {'lote (ms)':>10} {'aceleración':>12}")
+    diferencias = 0
+    for tipo in TarifaFactory.tipos_disponibles():
+        estrategia = TarifaFactory.crear_estrategia(tipo)
+
+        def de_a_uno():
+            return [estrategia.calcular(t, i, f, k) for t, i, f, k in zip(tarifas, inicios, fines, kms)]
+
+        def lote():
+            return estrategia.calcular_lote(tarifas, inicios, fines, kms)
+
+        ms_uno, esperado = medir(de_a_uno, args.repeticiones)
+        ms_lote, obtenido = medir(lote, args.repeticiones)
+        if obtenido != esperado:
+            diferencias += sum(1 for a, b in zip(obtenido, esperado) if a != b)
+            print(f"  ! {tipo}: el lote no coincide con calcular()")
+        print(f"{tipo:>12} {ms_uno:>14.2f} {ms_lote:>10.2f} {ms_uno / ms_lote:>11.1f}x")
+
+    if diferencias:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
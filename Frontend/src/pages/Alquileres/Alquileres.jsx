@@ -90,7 +90,7 @@ const Alquileres = () => {
   const handleSave = async (alquilerData) => {
     try {
       if (selectedAlquiler) {
-        await alquilerService.update(selectedAlquiler.id_alquiler, alquilerData)
+        await alquilerService.update(selectedAlquiler.id_alquiler, { ...alquilerData, version: selectedAlquiler.version })
       } else {
         await alquilerService.create(alquilerData)
       }
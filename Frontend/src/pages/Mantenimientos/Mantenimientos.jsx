@@ -57,7 +57,7 @@ const Mantenimientos = () => {
   const handleSave = async (mantenimientoData) => {
     try {
       if (selectedMantenimiento) {
-        await mantenimientoService.update(selectedMantenimiento.id_mantenimiento, mantenimientoData)
+        await mantenimientoService.update(selectedMantenimiento.id_mantenimiento, { ...mantenimientoData, version: selectedMantenimiento.version })
       } else {
         await mantenimientoService.create(mantenimientoData)
       }
@@ -90,7 +90,7 @@ const Reservas = () => {
   const handleSave = async (reservaData) => {
     try {
       if (selectedReserva) {
-        await reservaService.update(selectedReserva.id_reserva, reservaData)
+        await reservaService.update(selectedReserva.id_reserva, { ...reservaData, version: selectedReserva.version })
       } else {
         await reservaService.create(reservaData)
       }
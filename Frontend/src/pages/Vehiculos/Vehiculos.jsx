@@ -58,7 +58,7 @@ const Vehiculos = () => {
   const handleSave = async (vehiculoData) => {
     try {
       if (selectedVehiculo) {
-        await vehiculoService.update(selectedVehiculo.id_vehiculo, vehiculoData)
+        await vehiculoService.update(selectedVehiculo.id_vehiculo, { ...vehiculoData, version: selectedVehiculo.version })
       } else {
         await vehiculoService.create(vehiculoData)
       }